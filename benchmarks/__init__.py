@@ -0,0 +1 @@
+"""Offline component benchmarks (see runBenchmarks.py)."""
@@ -0,0 +1,121 @@
+"""
+Golden cases: the Parsing Agent prompt's examples against the rule-based compiler.
+
+The examples in parsingAgent.parsing_examples() are rendered into the Parsing
+Agent (and single-hop Guard Agent) prompt. Structured examples (no query_texts)
+must compile to exactly the same ChromaQueryParams with compile_query(), and the
+semantic ones must be left to the LLM, so both paths resolve a question the same
+way. Checked for today and for dates around month and year boundaries.
+
+The compiled filters are also paged through a MetadataIndex of synthetic
+reports, to check the page order: newest first for "last N" / "latest"
+questions, oldest first otherwise.
+
+Usage:
+    python -m benchmarks.goldenQueries
+"""
+
+import json
+import os
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+# Read by src.utils.constants at import
+os.environ.setdefault("GEMINI_API_KEY", "offline-golden-queries")
+
+from src.agents.parsingAgent import parsing_examples, query_parameter_rules  # noqa: E402
+from src.collections.metadataIndex import MetadataIndex  # noqa: E402
+from src.tools.queryCompiler import compile_query  # noqa: E402
+
+# Month and year boundaries, where relative dates are easiest to get wrong
+CHECK_DATES = [
+    datetime(2025, 10, 16, 14, 30, tzinfo=timezone.utc),
+    datetime(2025, 3, 1, 0, 5, tzinfo=timezone.utc),
+    datetime(2026, 1, 1, 23, 55, tzinfo=timezone.utc),
+    datetime(2024, 2, 29, 12, 0, tzinfo=timezone.utc),
+]
+
+
+def check(now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """
+    Compare compile_query() with the prompt's examples for one date.
+
+    Args:
+        now: Date the examples and the compiler resolve relative dates against
+
+    Returns:
+        One entry per disagreement: {"date", "query", "expected", "compiled"}
+    """
+    now = now or datetime.now(timezone.utc)
+    failures = []
+
+    if f"Today's date is {now:%Y-%m-%d}." not in query_parameter_rules(now):
+        failures.append({"date": f"{now:%Y-%m-%d}", "query": "(prompt)", "expected": "today's date", "compiled": None})
+
+    for query, expected in parsing_examples(now):
+        compiled = compile_query(query, now=now)
+        if expected["query_texts"] is None:
+            ok = compiled is not None and _normalized(compiled.model_dump()) == _normalized(expected)
+            ok = ok and _page_in_order(compiled, now)
+        else:
+            # Semantic content: the fast path must not answer it
+            ok = compiled is None
+        if not ok:
+            failures.append({
+                "date": f"{now:%Y-%m-%d}",
+                "query": query,
+                "expected": expected if expected["query_texts"] is None else None,
+                "compiled": compiled.model_dump() if compiled else None
+            })
+
+    return failures
+
+
+def _page_in_order(params, now: datetime) -> bool:
+    """First page of a compiled filter over synthetic reports, in the order the params ask for."""
+    index = _synthetic_index(now)
+    ids, _ = index.select_page(json.loads(params.where_filter), 0, params.n_results, params.newest_first)
+    timestamps = [int(report_id.rsplit("-", 1)[1]) for report_id in ids]
+    return timestamps == sorted(timestamps, reverse=params.newest_first)
+
+
+def _synthetic_index(now: datetime) -> MetadataIndex:
+    """Hourly reports for every example site/guard over the last 60 days, inserted out of order."""
+    index = MetadataIndex()
+    rows = []
+    for hour in range(60 * 24):
+        timestamp = int((now - timedelta(hours=hour)).timestamp())
+        for site, guard in (("S01", "G07"), ("S04", "G03")):
+            rows.append((f"{site}-{guard}-{timestamp}", {"siteId": site, "guardId": guard, "timestamp": timestamp}))
+    # The fixed date of the examples
+    timestamp = int(datetime(2025, 8, 30, 9, tzinfo=timezone.utc).timestamp())
+    rows.append((f"S04-G03-{timestamp}", {"siteId": "S04", "guardId": "G03", "timestamp": timestamp}))
+    random.Random(0).shuffle(rows)
+    index.upsert([report_id for report_id, _ in rows], [metadata for _, metadata in rows])
+    return index
+
+
+def _normalized(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Compare filters as JSON values, not strings."""
+    where_filter = params.get("where_filter")
+    return {**params, "where_filter": json.loads(where_filter) if where_filter else None}
+
+
+def main():
+    dates = [datetime.now(timezone.utc)] + CHECK_DATES
+    failures = [failure for now in dates for failure in check(now)]
+    cases = len(dates) * len(parsing_examples())
+
+    for failure in failures:
+        print(f"FAIL [{failure['date']}] {failure['query']}", file=sys.stderr)
+        print(f"  expected: {failure['expected']}", file=sys.stderr)
+        print(f"  compiled: {failure['compiled']}", file=sys.stderr)
+
+    print(f"[GoldenQueries] {cases - len(failures)}/{cases} cases agree", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""
+In-memory, Motor-compatible MongoDB stand-in for the offline benchmarks.
+
+Implements the subset of the Motor API that ConversationService and
+ConversationWriter use (find_one / find with projection, update_one,
+find_one_and_update, bulk_write of UpdateOne, delete_one / delete_many,
+create_index with unique keys) and the update operators they send
+($set, $setOnInsert, $inc, $push with $each, $unset).
+
+Every call awaits a configurable simulated round trip, so results reflect the
+number of database calls a code path makes, not just Python time.
+"""
+
+import asyncio
+import copy
+import itertools
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+_MISSING = object()
+
+
+def _get(document: Dict, path: str) -> Any:
+    """Value at a dotted path, or _MISSING."""
+    value = document
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _values(document: Dict, path: str) -> List[Any]:
+    """Values a query path reaches, descending into arrays of subdocuments ("messages.seq")."""
+    values = [document]
+    for part in path.split("."):
+        reached = []
+        for value in values:
+            for item in value if isinstance(value, list) else [value]:
+                if isinstance(item, dict) and part in item:
+                    reached.append(item[part])
+        values = reached
+    return values or [_MISSING]
+
+
+def _matches_condition(value: Any, condition: Any) -> bool:
+    if isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition):
+        for operator, operand in condition.items():
+            if operator == "$exists":
+                if (value is not _MISSING) != bool(operand):
+                    return False
+                continue
+            if operator == "$ne":
+                if value == operand:
+                    return False
+                continue
+            if operator == "$nin":
+                if value in operand:
+                    return False
+                continue
+            if value is _MISSING:
+                return False
+            if operator == "$eq" and not value == operand:
+                return False
+            if operator == "$in" and value not in operand:
+                return False
+            if operator == "$gt" and not value > operand:
+                return False
+            if operator == "$gte" and not value >= operand:
+                return False
+            if operator == "$lt" and not value < operand:
+                return False
+            if operator == "$lte" and not value <= operand:
+                return False
+            if operator not in ("$eq", "$in", "$gt", "$gte", "$lt", "$lte"):
+                raise NotImplementedError(f"Query operator {operator} is not supported")
+        return True
+    return value is not _MISSING and value == condition
+
+
+def matches(document: Dict, query: Dict) -> bool:
+    """Whether a document matches a (simple) MongoDB query."""
+    for key, condition in query.items():
+        if key == "$and":
+            if not all(matches(document, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(document, sub) for sub in condition):
+                return False
+        else:
+            values = _values(document, key)
+            negative = isinstance(condition, dict) and condition and set(condition) <= {"$ne", "$nin"}
+            # Like MongoDB: $ne / $nin hold for no array element, other conditions for any
+            found = all if negative else any
+            if not found(_matches_condition(value, condition) for value in values):
+                return False
+    return True
+
+
+def _project(document: Dict, projection: Optional[Dict]) -> Dict:
+    """Copy of a document with an inclusion projection applied (as BSON decoding would copy it)."""
+    if not projection:
+        return copy.deepcopy(document)
+
+    included = [key for key, flag in projection.items() if flag and key != "_id"]
+    if included:
+        result = {key: copy.deepcopy(document[key]) for key in included if key in document}
+        if projection.get("_id", 1) and "_id" in document:
+            result["_id"] = document["_id"]
+        return result
+
+    excluded = {key for key, flag in projection.items() if not flag}
+    return {key: copy.deepcopy(value) for key, value in document.items() if key not in excluded}
+
+
+def _apply_update(document: Dict, update: Dict, inserting: bool):
+    """Apply update operators to a document in place."""
+    for operator, fields in update.items():
+        if operator == "$setOnInsert":
+            if inserting:
+                document.update(copy.deepcopy(fields))
+        elif operator == "$set":
+            document.update(copy.deepcopy(fields))
+        elif operator == "$inc":
+            for key, amount in fields.items():
+                document[key] = document.get(key, 0) + amount
+        elif operator == "$push":
+            for key, value in fields.items():
+                items = value["$each"] if isinstance(value, dict) and "$each" in value else [value]
+                document.setdefault(key, []).extend(copy.deepcopy(items))
+        elif operator == "$unset":
+            for key in fields:
+                document.pop(key, None)
+        else:
+            raise NotImplementedError(f"Update operator {operator} is not supported")
+
+
+class InMemoryCursor:
+    """Result of find(): async iteration, sort() and to_list()."""
+
+    def __init__(self, collection: "InMemoryCollection", query: Dict, projection: Optional[Dict]):
+        self._collection = collection
+        self._query = query
+        self._projection = projection
+        self._sort: List[Tuple[str, int]] = []
+        self._documents: Optional[List[Dict]] = None
+
+    def sort(self, key, direction: int = 1) -> "InMemoryCursor":
+        self._sort = list(key) if isinstance(key, list) else [(key, direction)]
+        return self
+
+    async def _load(self) -> List[Dict]:
+        if self._documents is None:
+            await self._collection._round_trip()
+            documents = [doc for doc in self._collection._documents if matches(doc, self._query)]
+            for key, direction in reversed(self._sort):
+                documents.sort(key=lambda doc: _get(doc, key), reverse=direction < 0)
+            self._documents = [_project(doc, self._projection) for doc in documents]
+        return self._documents
+
+    async def to_list(self, length: Optional[int] = None) -> List[Dict]:
+        documents = await self._load()
+        return documents if length is None else documents[:length]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in await self._load():
+            yield document
+
+
+class InMemoryCollection:
+    """One collection: a list of documents plus unique index keys."""
+
+    def __init__(self, name: str, latency_seconds: float):
+        self.name = name
+        self.latency_seconds = latency_seconds
+        self.calls = 0
+        self._documents: List[Dict] = []
+        self._unique_keys: List[Tuple[str, ...]] = []
+        self._ids = itertools.count(1)
+
+    async def _round_trip(self):
+        self.calls += 1
+        await asyncio.sleep(self.latency_seconds)
+
+    def _find(self, query: Dict) -> Optional[Dict]:
+        for document in self._documents:
+            if matches(document, query):
+                return document
+        return None
+
+    def _check_unique(self, candidate: Dict, ignore: Optional[Dict] = None):
+        for keys in self._unique_keys:
+            values = tuple(candidate.get(key) for key in keys)
+            for document in self._documents:
+                if document is not ignore and tuple(document.get(key) for key in keys) == values:
+                    raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: {keys}")
+
+    def _upsert_document(self, query: Dict, update: Dict) -> Dict:
+        """Insert the document an upsert creates: equality fields of the query plus the update."""
+        document = {"_id": next(self._ids)}
+        for key, condition in query.items():
+            if not key.startswith("$") and not (isinstance(condition, dict) and any(k.startswith("$") for k in condition)):
+                document[key] = copy.deepcopy(condition)
+        _apply_update(document, update, inserting=True)
+        self._check_unique(document)
+        self._documents.append(document)
+        return document
+
+    def _update(self, query: Dict, update: Dict, upsert: bool) -> Tuple[Optional[Dict], Optional[Dict], Any]:
+        """Update the first match; returns (before, after, upserted id)."""
+        document = self._find(query)
+        if document is None:
+            if not upsert:
+                return None, None, None
+            document = self._upsert_document(query, update)
+            return None, document, document["_id"]
+
+        before = copy.deepcopy(document)
+        _apply_update(document, update, inserting=False)
+        return before, document, None
+
+    async def create_index(self, keys, unique: bool = False, **kwargs) -> str:
+        await self._round_trip()
+        names = tuple(key for key, _ in keys) if isinstance(keys, list) else (keys,)
+        if unique and names not in self._unique_keys:
+            self._unique_keys.append(names)
+        return "_".join(f"{name}_1" for name in names)
+
+    async def insert_one(self, document: Dict):
+        await self._round_trip()
+        document = copy.deepcopy(document)
+        document.setdefault("_id", next(self._ids))
+        self._check_unique(document)
+        self._documents.append(document)
+        return SimpleNamespace(inserted_id=document["_id"])
+
+    async def find_one(self, query: Optional[Dict] = None, projection: Optional[Dict] = None) -> Optional[Dict]:
+        await self._round_trip()
+        document = self._find(query or {})
+        return None if document is None else _project(document, projection)
+
+    def find(self, query: Optional[Dict] = None, projection: Optional[Dict] = None) -> InMemoryCursor:
+        return InMemoryCursor(self, query or {}, projection)
+
+    async def count_documents(self, query: Dict) -> int:
+        await self._round_trip()
+        return sum(1 for document in self._documents if matches(document, query))
+
+    async def update_one(self, query: Dict, update: Dict, upsert: bool = False):
+        await self._round_trip()
+        before, after, upserted_id = self._update(query, update, upsert)
+        return SimpleNamespace(
+            matched_count=0 if before is None else 1,
+            modified_count=0 if before is None or before == after else 1,
+            upserted_id=upserted_id
+        )
+
+    async def find_one_and_update(
+        self,
+        query: Dict,
+        update: Dict,
+        projection: Optional[Dict] = None,
+        upsert: bool = False,
+        return_document: bool = ReturnDocument.BEFORE
+    ) -> Optional[Dict]:
+        await self._round_trip()
+        before, after, _ = self._update(query, update, upsert)
+        document = after if return_document == ReturnDocument.AFTER else before
+        return None if document is None else _project(document, projection)
+
+    async def bulk_write(self, operations: List, ordered: bool = True):
+        """Apply UpdateOne operations in one round trip (duplicate keys raise BulkWriteError)."""
+        await self._round_trip()
+        matched = modified = upserted = 0
+        errors = []
+        for index, operation in enumerate(operations):
+            try:
+                before, after, upserted_id = self._update(operation._filter, operation._doc, operation._upsert)
+            except DuplicateKeyError as e:
+                errors.append({"index": index, "code": 11000, "errmsg": str(e)})
+                if ordered:
+                    break
+                continue
+            if upserted_id is not None:
+                upserted += 1
+            elif before is not None:
+                matched += 1
+                modified += before != after
+
+        if errors:
+            raise BulkWriteError({
+                "writeErrors": errors, "nMatched": matched, "nModified": modified, "nUpserted": upserted
+            })
+        return SimpleNamespace(matched_count=matched, modified_count=modified, upserted_count=upserted)
+
+    async def delete_one(self, query: Dict):
+        await self._round_trip()
+        document = self._find(query)
+        if document is not None:
+            self._documents.remove(document)
+        return SimpleNamespace(deleted_count=0 if document is None else 1)
+
+    async def delete_many(self, query: Dict):
+        await self._round_trip()
+        kept = [document for document in self._documents if not matches(document, query)]
+        deleted = len(self._documents) - len(kept)
+        self._documents = kept
+        return SimpleNamespace(deleted_count=deleted)
+
+
+class InMemoryDatabase:
+    """Collections are created on first access, like Motor's attribute access."""
+
+    def __init__(self, latency_seconds: float):
+        self._latency_seconds = latency_seconds
+        self._collections: Dict[str, InMemoryCollection] = {}
+
+    def __getattr__(self, name: str) -> InMemoryCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def __getitem__(self, name: str) -> InMemoryCollection:
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections[name] = InMemoryCollection(name, self._latency_seconds)
+        return collection
+
+    def calls(self) -> Dict[str, int]:
+        """Database round trips per collection."""
+        return {name: collection.calls for name, collection in self._collections.items()}
+
+
+class InMemoryMongoClient:
+    """
+    Drop-in for AsyncIOMotorClient, passed to mongodb.connect(client=...).
+
+    Args:
+        latency_ms: Simulated round trip per database call
+    """
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_seconds = latency_ms / 1000
+        self._databases: Dict[str, InMemoryDatabase] = {}
+        self.admin = SimpleNamespace(command=self._command)
+
+    async def _command(self, name: str, *args, **kwargs) -> Dict:
+        await asyncio.sleep(self.latency_seconds)
+        return {"ok": 1.0}
+
+    def __getitem__(self, name: str) -> InMemoryDatabase:
+        database = self._databases.get(name)
+        if database is None:
+            database = self._databases[name] = InMemoryDatabase(self.latency_seconds)
+        return database
+
+    def close(self):
+        pass
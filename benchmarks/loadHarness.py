@@ -0,0 +1,429 @@
+"""
+In-process load harness for /chat: how many concurrent guards can one worker serve?
+
+Drives the real FastAPI app (main.app, lifespan included) through an httpx
+ASGI client, with the stand-ins of the offline benchmarks: stubbed LLMs with
+log-normal latency, the in-memory MongoDB store and a snapshot of synthetic
+reports embedded with the hash embedding.
+
+Virtual users run a closed loop (request, think time, next request) over a
+weighted mix of workloads:
+- filter: site / guard lookups the rule-based fast path compiles
+- semantic: free-text questions resolved by the Parsing Agent
+- all: "all reports from site ..." (n_results 1000, paged)
+each on a new conversation or one of a pool of long, pre-seeded conversations.
+
+Reported: throughput, client latency per workload, p50/p95/p99 per stage (from
+the Server-Timing header) and event-loop lag. Each --slo is checked at the end;
+the exit status is 1 when one is violated.
+
+Usage:
+    python -m benchmarks.loadHarness --concurrency 32 --ramp 10 --duration 60 \\
+        --slo latency.p99=8000 --slo loop_lag.p99=50 --slo error_rate=0.01
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from unittest import mock
+
+from benchmarks.syntheticReports import EVENTS, LOCATIONS, VEHICLES, write_reports
+
+WORKLOADS = {
+    "filter": [
+        "Show reports from site {site}",
+        "What did guard {guard} report?",
+        "Top 10 reports from site {site}",
+    ],
+    "semantic": [
+        "Any {color} {model} loitering near the {location}?",
+        "Were there reports of {event} at site {site}?",
+        "Anything suspicious near the {location} involving a {model}?",
+    ],
+    "all": [
+        "All reports from site {site}",
+    ],
+}
+
+# Statistics an SLO can bound (error_rate and throughput take no statistic)
+STATISTICS = ("p50", "p95", "p99", "mean", "max")
+
+_SERVER_TIMING_ENTRY = re.compile(r"\s*([^;,\s]+);dur=([0-9.]+)")
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """'filter=4,semantic=4,all=2' -> normalized workload weights."""
+    weights = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in WORKLOADS:
+            raise argparse.ArgumentTypeError(f"Unknown workload {name!r} (available: {', '.join(WORKLOADS)})")
+        weights[name] = float(weight or 1)
+    total = sum(weights.values())
+    if total <= 0:
+        raise argparse.ArgumentTypeError("Workload weights must add up to more than 0")
+    return {name: weight / total for name, weight in weights.items()}
+
+
+def parse_slo(text: str) -> Tuple[str, Optional[str], float]:
+    """
+    'latency.p99=8000' -> ("latency", "p99", 8000.0); 'error_rate=0.01' -> ("error_rate", None, 0.01).
+
+    Metrics: latency (client side, ms), loop_lag (ms), any Server-Timing stage
+    (e.g. chroma, guard_llm, tool.retrieve_security_reports, total), error_rate, throughput.
+    """
+    key, _, limit = text.partition("=")
+    try:
+        value = float(limit)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"SLO {text!r} needs a numeric limit (e.g. latency.p99=8000)")
+
+    if key in ("error_rate", "throughput"):
+        return key, None, value
+    metric, _, statistic = key.rpartition(".")
+    if not metric or statistic not in STATISTICS:
+        raise argparse.ArgumentTypeError(f"SLO {text!r} must be <metric>.<{'|'.join(STATISTICS)}>=<ms>, error_rate=<ratio> or throughput=<rps>")
+    return metric, statistic, value
+
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    """Server-Timing header -> {stage: milliseconds}."""
+    return {name: float(duration) for name, duration in _SERVER_TIMING_ENTRY.findall(header or "")}
+
+
+class LoopLagMonitor:
+    """Samples how late a periodic timer fires: time the event loop was blocked."""
+
+    def __init__(self, interval_ms: float = 10.0):
+        self.interval = interval_ms / 1000
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> List[float]:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        return self.samples
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - expected) * 1000)
+
+
+class LoadRun:
+    """One load test: data preparation, virtual users and the collected samples."""
+
+    def __init__(self, args: argparse.Namespace, work_dir: str):
+        self.args = args
+        self.work_dir = work_dir
+        self.random = random.Random(args.seed)
+        self.records: List[Dict[str, Any]] = []
+        self.long_conversations = [f"load-long-{i}" for i in range(args.long_conversations)]
+        self._new_conversations = 0
+
+    def build_snapshot(self):
+        """Ingest synthetic reports into the snapshot directory (CHROMA_SNAPSHOT_DIR) the app loads read-only."""
+        from benchmarks.localModels import HashEmbeddingFunction
+        from src.collections.chromadb import SecurityReportDatabase
+
+        reports_path = os.path.join(self.work_dir, "reports.ndjson")
+        snapshot_dir = os.environ["CHROMA_SNAPSHOT_DIR"]
+        write_reports(reports_path, self.args.reports, seed=self.args.seed)
+        db = SecurityReportDatabase(persist_directory=snapshot_dir, embedding_function=HashEmbeddingFunction())
+        db.ingest_data(reports_path)
+        db.write_snapshot_manifest(reports_path)
+
+    async def seed_conversations(self):
+        """Give the long conversations their history (and rolling summaries)."""
+        from src.services.conversationService import ConversationService
+
+        for conversation_id in self.long_conversations:
+            for turn in range(self.args.long_messages // 2):
+                await ConversationService.save_message_pair(
+                    conversation_id,
+                    f"Question {turn}: anything at site S{turn % 5 + 1:02d}?",
+                    f"Answer {turn}: " + "Guard observed a red Toyota Camry loitering near the north gate. " * 6
+                )
+
+    def next_request(self) -> Tuple[str, str, Dict[str, Any]]:
+        """Pick (workload, conversation kind, request body) from the mix."""
+        rng = self.random
+        workload = rng.choices(list(self.args.mix), list(self.args.mix.values()))[0]
+        color, model = rng.choice(VEHICLES)
+        query = rng.choice(WORKLOADS[workload]).format(
+            site=f"S{rng.randint(1, 50):02d}",
+            guard=f"G{rng.randint(1, 200):03d}",
+            color=color,
+            model=model,
+            location=rng.choice(LOCATIONS),
+            event=rng.choice(EVENTS)
+        )
+
+        if self.long_conversations and rng.random() < self.args.long_ratio:
+            return workload, "long", {"query": query, "conversationId": rng.choice(self.long_conversations)}
+        self._new_conversations += 1
+        return workload, "new", {"query": query, "conversationId": f"load-new-{self._new_conversations}"}
+
+    async def user(self, client, start_at: float, stop_at: float):
+        """One virtual guard: requests back to back (plus think time) until stop_at."""
+        await asyncio.sleep(max(0.0, start_at - time.perf_counter()))
+        while time.perf_counter() < stop_at:
+            workload, conversation, body = self.next_request()
+            started = time.perf_counter()
+            try:
+                response = await client.post("/chat", json=body)
+                status = response.status_code
+                stages = parse_server_timing(response.headers.get("server-timing", ""))
+            except Exception as e:
+                status, stages = 0, {}
+                print(f"[LoadHarness] Request failed: {str(e)}", file=sys.stderr)
+            finished = time.perf_counter()
+
+            self.records.append({
+                "workload": workload,
+                "conversation": conversation,
+                "status": status,
+                "latency_ms": (finished - started) * 1000,
+                "stages": stages,
+                "finished_at": finished
+            })
+            if self.args.think_ms:
+                await asyncio.sleep(self.args.think_ms / 1000)
+
+    async def drive(self, client) -> Tuple[float, float]:
+        """Start the users over the ramp and wait for them; returns (steady state start, end)."""
+        args = self.args
+        started = time.perf_counter()
+        steady_from = started + args.ramp
+        stop_at = steady_from + args.duration
+        users = [
+            asyncio.create_task(self.user(client, started + args.ramp * index / args.concurrency, stop_at))
+            for index in range(args.concurrency)
+        ]
+        await asyncio.gather(*users)
+        return steady_from, time.perf_counter()
+
+
+def build_report(
+    records: List[Dict[str, Any]],
+    loop_lag: List[float],
+    steady_from: float,
+    ended: float
+) -> Dict[str, Any]:
+    """Throughput, latency per workload, per-stage percentiles and loop lag."""
+    from benchmarks.runBenchmarks import summarize
+
+    failed = [record for record in records if record["status"] != 200]
+    steady = [record for record in records if record["finished_at"] >= steady_from]
+    steady_seconds = max(ended - steady_from, 1e-9)
+
+    latency = {"overall": summarize([record["latency_ms"] for record in records])} if records else {}
+    groups: Dict[str, List[float]] = {}
+    for record in records:
+        groups.setdefault(record["workload"], []).append(record["latency_ms"])
+        groups.setdefault(f"{record['workload']}/{record['conversation']}", []).append(record["latency_ms"])
+    for name, samples in sorted(groups.items()):
+        latency[name] = summarize(samples)
+
+    stage_samples: Dict[str, List[float]] = {}
+    for record in records:
+        if record["status"] == 200:
+            for stage, duration in record["stages"].items():
+                stage_samples.setdefault(stage, []).append(duration)
+
+    return {
+        "requests": len(records),
+        "errors": len(failed),
+        "error_rate": round(len(failed) / len(records), 4) if records else 0.0,
+        "throughput_rps": round(len(steady) / steady_seconds, 2),
+        "latency": latency,
+        "stages": {stage: summarize(samples) for stage, samples in sorted(stage_samples.items())},
+        "loop_lag": summarize(loop_lag) if loop_lag else None,
+    }
+
+
+def check_slos(report: Dict[str, Any], slos: List[Tuple[str, Optional[str], float]]) -> List[Dict[str, Any]]:
+    """Evaluate SLOs against a report; a metric with no samples counts as violated."""
+    checks = []
+    for metric, statistic, limit in slos:
+        if metric == "error_rate":
+            actual, ok = report["error_rate"], report["error_rate"] <= limit
+        elif metric == "throughput":
+            actual, ok = report["throughput_rps"], report["throughput_rps"] >= limit
+        else:
+            if metric == "latency":
+                summary = report["latency"].get("overall")
+            elif metric == "loop_lag":
+                summary = report["loop_lag"]
+            else:
+                summary = report["stages"].get(metric)
+            actual = summary[statistic] if summary else None
+            ok = actual is not None and actual <= limit
+
+        checks.append({
+            "slo": f"{metric}.{statistic}" if statistic else metric,
+            "limit": limit,
+            "actual": actual,
+            "ok": ok
+        })
+    return checks
+
+
+def print_report(report: Dict[str, Any], checks: List[Dict[str, Any]]):
+    out = sys.stderr
+    print(f"\nRequests: {report['requests']}  errors: {report['errors']} ({report['error_rate']:.2%})  "
+          f"steady-state throughput: {report['throughput_rps']} req/s", file=out)
+
+    print(f"\n{'latency (ms)':<36} {'n':>6} {'p50':>9} {'p95':>9} {'p99':>9}", file=out)
+    for name, summary in report["latency"].items():
+        print(f"{name:<36} {summary['n']:>6} {summary['p50']:>9.1f} {summary['p95']:>9.1f} {summary['p99']:>9.1f}", file=out)
+
+    print(f"\n{'stage (ms)':<36} {'n':>6} {'p50':>9} {'p95':>9} {'p99':>9}", file=out)
+    for name, summary in report["stages"].items():
+        print(f"{name:<36} {summary['n']:>6} {summary['p50']:>9.1f} {summary['p95']:>9.1f} {summary['p99']:>9.1f}", file=out)
+
+    if report["loop_lag"]:
+        lag = report["loop_lag"]
+        print(f"\nEvent loop lag (ms): p50 {lag['p50']:.1f}  p95 {lag['p95']:.1f}  p99 {lag['p99']:.1f}  max {lag['max']:.1f}", file=out)
+
+    if report.get("parse_speculation"):
+        speculation = report["parse_speculation"]
+        print(f"\nSpeculative parsing: hit rate {speculation['hit_rate']:.0%} ({speculation['hit']:g} hits, "
+              f"{speculation['miss']:g} misses, {speculation['unused']:g} unused)  "
+              f"saved {speculation['saved_ms_per_hit']:.0f}ms per hit", file=out)
+
+    if checks:
+        print("\nSLOs:", file=out)
+        for check in checks:
+            actual = "no data" if check["actual"] is None else f"{check['actual']:,.3f}"
+            print(f"  {'OK  ' if check['ok'] else 'FAIL'} {check['slo']:<36} {actual:>12} (limit {check['limit']:,})", file=out)
+
+
+async def run(args: argparse.Namespace, work_dir: str) -> Dict[str, Any]:
+    # src is imported only now: constants are read from the environment set up in main()
+    import httpx
+    from chromadb.utils import embedding_functions
+
+    from benchmarks.inMemoryMongo import InMemoryMongoClient
+    from benchmarks.localModels import HashEmbeddingFunction, local_models
+    from benchmarks.runBenchmarks import _quiet, environment
+
+    load = LoadRun(args, work_dir)
+
+    # The app opens the snapshot with ChromaDB's default embedding function; with
+    # --embedding hash that is the hash embedding the snapshot was built with
+    embedding_patch = mock.patch.object(
+        embedding_functions,
+        "DefaultEmbeddingFunction",
+        lambda: HashEmbeddingFunction(latency_ms_per_text=args.embed_latency_ms)
+    ) if args.embedding == "hash" else contextlib.nullcontext()
+
+    with _quiet(args.verbose), embedding_patch, local_models(latency_ms=args.llm_latency_ms, sigma=args.llm_sigma, seed=args.seed):
+        load.build_snapshot()
+
+        from main import app
+        from src.db.mongodb import mongodb
+
+        # Connected before the lifespan runs, so its connect() keeps this client
+        await mongodb.connect(client=InMemoryMongoClient(latency_ms=args.mongo_latency_ms))
+        await load.seed_conversations()
+
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://guardowl", timeout=None) as client:
+                print(f"[LoadHarness] {args.concurrency} users, {args.ramp:g}s ramp, {args.duration:g}s steady state", file=sys.stderr)
+                monitor = LoopLagMonitor()
+                monitor.start()
+                steady_from, ended = await load.drive(client)
+                loop_lag = await monitor.stop()
+
+    report = build_report(load.records, loop_lag, steady_from, ended)
+    if args.speculative_parsing:
+        from src.agents.parsingAgent import speculation_stats
+        report["parse_speculation"] = speculation_stats()
+    checks = check_slos(report, args.slo)
+    return {
+        "version": 1,
+        "environment": environment(),
+        "args": vars(args),
+        "report": report,
+        "slo": checks,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent /chat load test against the in-process app")
+    parser.add_argument("--concurrency", type=int, default=16, help="Virtual users")
+    parser.add_argument("--ramp", type=float, default=5.0, help="Seconds over which users start")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of steady state after the ramp")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Pause between a user's requests")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("filter=4,semantic=4,all=2"),
+                        help="Workload weights, e.g. filter=4,semantic=4,all=2")
+    parser.add_argument("--long-ratio", type=float, default=0.5, help="Share of requests on long conversations")
+    parser.add_argument("--long-conversations", type=int, default=20, help="Pool of long conversations")
+    parser.add_argument("--long-messages", type=int, default=60, help="Messages seeded per long conversation")
+    parser.add_argument("--reports", type=int, default=20000, help="Synthetic reports in the snapshot")
+    parser.add_argument("--llm-latency-ms", type=float, default=800.0, help="Median latency per model turn")
+    parser.add_argument("--llm-sigma", type=float, default=0.4, help="Log-normal shape of the model latency")
+    parser.add_argument("--mongo-latency-ms", type=float, default=2.0, help="Simulated MongoDB round trip")
+    parser.add_argument("--agent-mode", choices=["two_hop", "single_hop"], default="two_hop",
+                        help="Guard Agent report lookup mode (GUARD_AGENT_MODE)")
+    parser.add_argument("--speculative-parsing", action="store_true",
+                        help="Parse questions in parallel with the Guard Agent's first turn (PARSE_SPECULATION_ENABLED)")
+    parser.add_argument("--embedding", choices=["hash", "onnx"], default="hash",
+                        help="hash (no model download) or ChromaDB's ONNX model")
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0, help="Simulated hash embedding cost per text")
+    parser.add_argument("--slo", type=parse_slo, action="append", default=[],
+                        help="e.g. latency.p99=8000, chroma.p95=50, loop_lag.p99=50, error_rate=0.01, throughput=5")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="load_results.json", help="Results file")
+    parser.add_argument("--keep-dir", action="store_true", help="Keep the generated snapshot")
+    parser.add_argument("--verbose", action="store_true", help="Show the app's own output")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="guardowl-load-")
+    # Read by src.utils.constants at import: offline settings for the app under test
+    os.environ.setdefault("GEMINI_API_KEY", "offline-load-test")
+    os.environ["QUERY_EMBEDDING_CACHE_PATH"] = ""
+    os.environ["CHROMA_SNAPSHOT_DIR"] = os.path.join(work_dir, "snapshot")
+    os.environ["GUARD_AGENT_MODE"] = args.agent_mode
+    os.environ["PARSE_SPECULATION_ENABLED"] = "true" if args.speculative_parsing else "false"
+
+    try:
+        results = asyncio.run(run(args, work_dir))
+    finally:
+        if args.keep_dir:
+            print(f"Load test data kept in {work_dir}", file=sys.stderr)
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print_report(results["report"], results["slo"])
+    print(f"\nResults written to {args.out}", file=sys.stderr)
+    if not all(check["ok"] for check in results["slo"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
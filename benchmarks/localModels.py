@@ -0,0 +1,166 @@
+"""
+Local stand-ins for Gemini and the ONNX embedding model.
+
+The agents keep their real prompts, tools and output types; only the model
+behind them is swapped (agent.override) for pydantic-ai FunctionModel /
+TestModel wrapped in SimulatedLatencyModel, so a benchmark run pays a
+configurable, known model latency instead of a network call.
+"""
+
+import asyncio
+import hashlib
+import random
+import re
+import time
+from contextlib import ExitStack, contextmanager
+from typing import Any, Dict, Iterator, List
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+from pydantic_ai.messages import ModelMessage, ModelRequest, ModelResponse, TextPart, ToolCallPart, ToolReturnPart, UserPromptPart
+from pydantic_ai.models import Model
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+from pydantic_ai.models.test import TestModel
+from pydantic_ai.models.wrapper import WrapperModel
+
+from src.ai.timedModel import TimedModel
+from src.tools.queryCompiler import compile_query
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+class SimulatedLatencyModel(WrapperModel):
+    """
+    Wraps a local model and waits a simulated latency per turn.
+
+    With sigma > 0 the latency is log-normal with median latency_ms, which
+    matches the long right tail of hosted LLM response times.
+
+    Args:
+        wrapped: Model producing the responses (FunctionModel, TestModel)
+        latency_ms: Simulated time per model turn (the median when sigma > 0)
+        jitter_ms: Uniform random extra latency in [0, jitter_ms]
+        seed: Seed of the random latency, for reproducible runs
+        sigma: Log-normal shape (0 = fixed latency; 0.3-0.5 is typical for LLM APIs)
+    """
+
+    def __init__(self, wrapped: Model, latency_ms: float = 0.0, jitter_ms: float = 0.0, seed: int = 0, sigma: float = 0.0):
+        super().__init__(wrapped)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.sigma = sigma
+        self._random = random.Random(seed)
+        self.calls = 0
+        self.simulated_seconds = 0.0
+
+    async def request(self, *args: Any, **kwargs: Any) -> ModelResponse:
+        latency_ms = self.latency_ms * self._random.lognormvariate(0, self.sigma) if self.sigma > 0 else self.latency_ms
+        delay = (latency_ms + self._random.uniform(0, self.jitter_ms)) / 1000
+        self.calls += 1
+        self.simulated_seconds += delay
+        await asyncio.sleep(delay)
+        return await super().request(*args, **kwargs)
+
+
+class HashEmbeddingFunction(EmbeddingFunction[Documents]):
+    """
+    Deterministic bag-of-words embedding (hashed into `dimensions` buckets).
+
+    Reports sharing words land close together, which is enough to exercise
+    vector search; latency_ms_per_text stands in for the ONNX model's cost.
+    """
+
+    def __init__(self, dimensions: int = 384, latency_ms_per_text: float = 0.0):
+        self.dimensions = dimensions
+        self.latency_ms_per_text = latency_ms_per_text
+
+    def __call__(self, input: Documents) -> Embeddings:
+        if self.latency_ms_per_text:
+            time.sleep(self.latency_ms_per_text * len(input) / 1000)
+
+        vectors = np.zeros((len(input), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(input):
+            for token in _TOKEN_PATTERN.findall(text.lower()):
+                digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+                vectors[row, int.from_bytes(digest, "little") % self.dimensions] += 1.0
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return list(vectors / norms)
+
+
+def _last_request(messages: List[ModelMessage]) -> ModelRequest:
+    return next(message for message in reversed(messages) if isinstance(message, ModelRequest))
+
+
+def _last_prompt(messages: List[ModelMessage]) -> str:
+    for message in reversed(messages):
+        if isinstance(message, ModelRequest):
+            for part in message.parts:
+                if isinstance(part, UserPromptPart) and isinstance(part.content, str):
+                    return part.content
+    return ""
+
+
+def guard_response(messages: List[ModelMessage], info: AgentInfo) -> ModelResponse:
+    """
+    Guard Agent stand-in: one report lookup, then an answer quoting the start of the tool result.
+
+    The lookup is retrieve_security_reports(user_query) in two-hop mode. In single-hop
+    mode it is search_security_reports with the parameters the rule-based compiler
+    derives, or the whole question as semantic query (what the Parsing Agent
+    stand-in would return).
+    """
+    returns = [part for part in _last_request(messages).parts if isinstance(part, ToolReturnPart)]
+    if returns:
+        content = str(returns[0].content)
+        return ModelResponse(parts=[TextPart(f"Here is what the reports show: {content[:400]}")])
+
+    question = _last_prompt(messages)
+    tools = {tool.name for tool in info.function_tools}
+    if "search_security_reports" in tools:
+        compiled = compile_query(question)
+        params = compiled.model_dump(exclude_none=True) if compiled else {"query_texts": question[:200], "n_results": 10}
+        return ModelResponse(parts=[ToolCallPart("search_security_reports", params)])
+    if "retrieve_security_reports" in tools:
+        return ModelResponse(parts=[ToolCallPart("retrieve_security_reports", {"user_query": question})])
+    return ModelResponse(parts=[TextPart("I can only help with security reports.")])
+
+
+def parsing_response(messages: List[ModelMessage], info: AgentInfo) -> ModelResponse:
+    """Parsing Agent stand-in: the whole question as semantic query, no filter."""
+    params = {"query_texts": _last_prompt(messages)[:200], "where_filter": None, "n_results": 10}
+    return ModelResponse(parts=[ToolCallPart(info.output_tools[0].name, params)])
+
+
+@contextmanager
+def local_models(
+    latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    seed: int = 0,
+    sigma: float = 0.0
+) -> Iterator[Dict[str, SimulatedLatencyModel]]:
+    """
+    Swap the Guard, Parsing and Summarization agents' models for local stand-ins.
+
+    Stage timing (guard_llm, parse_llm, summary_llm) is kept, so metrics and
+    Server-Timing look the same as with Gemini.
+
+    Yields:
+        The simulated models by stage name (calls and simulated_seconds per model)
+    """
+    from src.agents.guardAgent import agent as guard_agent
+    from src.agents.parsingAgent import parsing_agent
+    from src.agents.summarizationAgent import summarization_agent
+
+    models = {
+        "guard_llm": SimulatedLatencyModel(FunctionModel(guard_response), latency_ms, jitter_ms, seed, sigma),
+        "parse_llm": SimulatedLatencyModel(FunctionModel(parsing_response), latency_ms, jitter_ms, seed + 1, sigma),
+        "summary_llm": SimulatedLatencyModel(TestModel(), latency_ms, jitter_ms, seed + 2, sigma),
+    }
+    agents = {"guard_llm": guard_agent, "parse_llm": parsing_agent, "summary_llm": summarization_agent}
+
+    with ExitStack() as stack:
+        for stage, model in models.items():
+            stack.enter_context(agents[stage].override(model=TimedModel(model, stage)))
+        yield models
@@ -0,0 +1,504 @@
+"""
+Offline component benchmarks: no Gemini, MongoDB Atlas or ONNX model needed.
+
+Suites (all on local stand-ins, see localModels.py and inMemoryMongo.py):
+- ingest: SecurityReportDatabase.ingest_data of synthetic reports into a temp
+  Chroma directory, then metadata / keyword index builds
+- reports: ReportsTool filter, vector, hybrid and natural language queries,
+  cold (caches cleared before every call) and warm
+- formatting: format_reports of 20-1000 reports and the retrieve_security_reports tool
+- conversation: ConversationService saves and history reads on the in-memory store
+- agent: Guard Agent runs on FunctionModel in two-hop and single-hop mode; "overhead"
+  excludes the simulated model latency
+
+Results are written as JSON (environment, arguments, one entry per metric).
+--compare checks them against an earlier results file and exits with status 1
+when a metric regressed by more than --threshold.
+
+Usage:
+    python -m benchmarks.runBenchmarks --reports 20000 --out baseline.json
+    python -m benchmarks.runBenchmarks --reports 20000 --compare baseline.json
+"""
+
+import os
+
+# Settings read at import time by src.utils.constants: no API key needed, no query
+# vectors persisted from (or to) a real run
+os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+os.environ["QUERY_EMBEDDING_CACHE_PATH"] = ""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+from benchmarks.inMemoryMongo import InMemoryMongoClient
+from benchmarks.localModels import HashEmbeddingFunction, local_models
+from benchmarks.syntheticReports import END_DATE, write_reports
+from src.agents import guardAgent
+from src.agents.parsingAgent import parse_cache
+from src.collections.chromadb import SecurityReportDatabase
+from src.db.mongodb import mongodb
+from src.models.chromadb import ChromaQueryParams
+from src.services.conversationService import ConversationService
+from src.services.conversationWriter import conversation_writer
+from src.tools.reportFormatter import format_reports, format_page_note
+from src.tools.reportsToolClass import ReportsTool
+from src.utils.constants import GUARD_AGENT_MODE, PARSE_SPECULATION_ENABLED
+
+RESULTS_VERSION = 1
+SUITES = ["ingest", "reports", "formatting", "conversation", "agent"]
+
+# Units where a larger value is better; everything else is a duration
+HIGHER_IS_BETTER_UNITS = {"reports/s", "ops/s"}
+
+DAY = 24 * 60 * 60
+LAST_DAY = int(END_DATE.timestamp()) - DAY
+
+# name -> (where filter, query text, n_results); run through ReportsTool.search
+SEARCH_CASES = {
+    "filter_site": ({"siteId": "S04"}, None, 1000),
+    "filter_site_day": ({"$and": [{"siteId": "S04"}, {"timestamp": {"$gte": LAST_DAY}}, {"timestamp": {"$lt": LAST_DAY + DAY}}]}, None, 100),
+    "semantic": (None, "red Toyota Camry loitering near the north gate", 10),
+    "semantic_site": ({"siteId": "S01"}, "Honda Civic", 10),
+}
+
+# name -> natural language question; run through ReportsTool.execute
+QUESTION_CASES = {
+    "question_fast_path": "All reports from Site S04",
+    "question_parsing_agent": "anything odd going on with cars hanging around the gates?",
+}
+
+
+def summarize(samples: List[float], unit: str = "ms") -> Dict[str, Any]:
+    """Distribution of samples (percentiles by linear interpolation)."""
+    values = np.array(samples, dtype=np.float64)
+    return {
+        "unit": unit,
+        "n": len(samples),
+        "mean": round(float(values.mean()), 3),
+        "p50": round(float(np.percentile(values, 50)), 3),
+        "p95": round(float(np.percentile(values, 95)), 3),
+        "p99": round(float(np.percentile(values, 99)), 3),
+        "min": round(float(values.min()), 3),
+        "max": round(float(values.max()), 3),
+    }
+
+
+async def measure(
+    call: Callable[[], Awaitable[Any]],
+    iterations: int,
+    warmup: int = 1,
+    before: Optional[Callable[[], None]] = None
+) -> Dict[str, Any]:
+    """
+    Time an async call.
+
+    Args:
+        call: Coroutine function to time
+        iterations: Timed calls
+        warmup: Untimed calls first (imports, thread pool start, ...)
+        before: Run untimed before every call (e.g. clearing caches)
+
+    Returns:
+        summarize() of the durations in milliseconds
+    """
+    for _ in range(warmup):
+        if before:
+            before()
+        await call()
+
+    samples = []
+    for _ in range(iterations):
+        if before:
+            before()
+        started = time.perf_counter()
+        await call()
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples)
+
+
+class BenchmarkRun:
+    """State shared by the suites of one run (temp directory, database, tools)."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.work_dir = tempfile.mkdtemp(prefix="guardowl-bench-")
+        self.db: Optional[SecurityReportDatabase] = None
+        self.tools: Dict[str, ReportsTool] = {}
+
+    def record(self, name: str, metric: Dict[str, Any]):
+        self.results[name] = metric
+        value = metric.get("p50", metric.get("value"))
+        _report(f"  {name:<48} {value:>12,.3f} {metric['unit']}")
+
+    def database(self) -> SecurityReportDatabase:
+        """The benchmark Chroma database, ingested on first use."""
+        if self.db is None:
+            self.suite_ingest()
+        return self.db
+
+    def tool(self, name: str) -> ReportsTool:
+        """ReportsTool variants: hybrid (indexes), vector (indexes, no hybrid), chroma (no indexes)."""
+        if name not in self.tools:
+            db = self.database()
+            indexed = name != "chroma"
+            self.tools[name] = ReportsTool(
+                collection=db.get_collection(),
+                embedding_function=db.embedding_function,
+                metadata_index=db.metadata_index if indexed else None,
+                keyword_index=db.keyword_index if indexed else None,
+                search_mode="hybrid" if name == "hybrid" else "vector"
+            )
+        return self.tools[name]
+
+    def close(self):
+        for tool in self.tools.values():
+            tool.query_layer.shutdown()
+        if self.args.keep_dir:
+            _report(f"Benchmark data kept in {self.work_dir}")
+        else:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    # Suites
+
+    def suite_ingest(self):
+        args = self.args
+        reports_path = args.reports_file
+        if not reports_path:
+            reports_path = os.path.join(self.work_dir, "reports.ndjson")
+            with _quiet(args.verbose):
+                generated = write_reports(reports_path, args.reports, seed=args.seed)
+            self.record("generate.reports_per_sec", {"unit": "reports/s", "value": round(generated["reports"] / generated["seconds"], 1)})
+
+        embedding_function = HashEmbeddingFunction(latency_ms_per_text=args.embed_latency_ms)
+        with _quiet(args.verbose):
+            self.db = SecurityReportDatabase(
+                persist_directory=os.path.join(self.work_dir, "chroma"),
+                embedding_function=embedding_function
+            )
+            ingest = self.db.ingest_data(reports_path)
+        self.record("ingest.reports_per_sec", {"unit": "reports/s", "value": round(ingest["reports_per_sec"], 1)})
+
+        for name, build in (("metadata", self.db.build_metadata_index), ("keyword", self.db.build_keyword_index)):
+            started = time.perf_counter()
+            with _quiet(args.verbose):
+                build()
+            self.record(f"ingest.{name}_index_build", {"unit": "ms", "value": round((time.perf_counter() - started) * 1000, 3)})
+
+    async def suite_reports(self):
+        args = self.args
+        for case, (where, text, n_results) in SEARCH_CASES.items():
+            params = ChromaQueryParams(
+                query_texts=text,
+                where_filter=json.dumps(where) if where else None,
+                n_results=n_results
+            )
+            variants = ["hybrid", "vector"] if text else ["hybrid", "chroma"]
+            for variant in variants:
+                tool = self.tool(variant)
+                label = f"reports.{case}.{'index' if variant == 'hybrid' and not text else variant}"
+                with _quiet(args.verbose):
+                    cold = await measure(lambda: tool.search(params), args.iterations, before=lambda: _clear_caches(tool))
+                    warm = await measure(lambda: tool.search(params), args.iterations)
+                self.record(f"{label}.cold", cold)
+                self.record(f"{label}.warm", warm)
+
+        tool = self.tool("hybrid")
+        with local_models(latency_ms=args.llm_latency_ms, seed=args.seed):
+            for case, question in QUESTION_CASES.items():
+                with _quiet(args.verbose):
+                    cold = await measure(lambda: tool.execute(question), args.iterations, before=lambda: _clear_caches(tool))
+                self.record(f"reports.{case}.cold", cold)
+
+    async def suite_formatting(self):
+        args = self.args
+        collection = self.database().get_collection()
+        for size in (20, 200, 1000):
+            page = collection.get(limit=size, include=["documents", "metadatas"])
+            results = [
+                {"id": report_id, "text": text, "metadata": metadata}
+                for report_id, text, metadata in zip(page["ids"], page["documents"], page["metadatas"])
+            ]
+            result = {"results": results, "count": len(results), "offset": 0, "total": size * 5, "ordering": "time", "next_cursor": "benchmark"}
+            for mode in ("compact", "full"):
+                self.record(
+                    f"formatting.{mode}_{size}",
+                    await measure(lambda: _async(lambda: format_reports(results, mode=mode) + format_page_note(result)), args.iterations)
+                )
+
+        # The whole tool call as the Guard Agent makes it (fast path parse, search, formatting)
+        tool = self.tool("hybrid")
+        guardAgent.set_reports_tool(tool)
+        with _quiet(args.verbose):
+            cold = await measure(
+                lambda: guardAgent.retrieve_security_reports(None, QUESTION_CASES["question_fast_path"]),
+                args.iterations,
+                before=lambda: _clear_caches(tool)
+            )
+        self.record("formatting.retrieve_security_reports.cold", cold)
+
+    async def suite_conversation(self):
+        args = self.args
+        client = InMemoryMongoClient(latency_ms=args.mongo_latency_ms)
+        histories = {}
+        with local_models(latency_ms=args.llm_latency_ms, seed=args.seed), _quiet(args.verbose):
+            await mongodb.connect(client=client)
+            try:
+                counter = iter(range(10 ** 9))
+                save = await measure(
+                    lambda: ConversationService.save_message_pair(f"bench-save-{next(counter)}", "Any Camry reports?", "Found 3 reports."),
+                    args.iterations
+                )
+
+                # Long conversations: messages for several buckets and a rolling summary
+                for length in (10, 200):
+                    conversation_id = f"bench-history-{length}"
+                    for turn in range(length // 2):
+                        await ConversationService.save_message_pair(
+                            conversation_id,
+                            f"Question {turn}: any incidents at site S0{turn % 5 + 1}?",
+                            f"Answer {turn}: " + "Guard observed a red Toyota Camry near the north gate. " * 5
+                        )
+                    await _drain_summaries()
+                    histories[length] = await measure(lambda: ConversationService.get_conversation_history(conversation_id), args.iterations)
+                    await _drain_summaries()
+
+                # A turn through the write-behind writer followed by the next turn's history read
+                conversation_writer.start()
+                turn_id = "bench-writer"
+                async def queued_turn():
+                    await conversation_writer.enqueue(turn_id, "Any Camry reports?", "Found 3 reports.")
+                    await ConversationService.get_conversation_history(turn_id)
+                queued = await measure(queued_turn, args.iterations)
+                await conversation_writer.close()
+                await _drain_summaries()
+            finally:
+                await mongodb.close()
+
+        self.record("conversation.save_pair", save)
+        for length, history in histories.items():
+            self.record(f"conversation.history_{length}", history)
+        self.record("conversation.queued_turn", queued)
+
+    async def suite_agent(self):
+        args = self.args
+        tool = self.tool("hybrid")
+        guardAgent.set_reports_tool(tool)
+
+        # Both report lookup modes (see GUARD_AGENT_MODE), two-hop also with speculative
+        # parsing (see PARSE_SPECULATION_ENABLED); llm_calls counts model turns per run
+        variants = [
+            ("two_hop", "two_hop", False),
+            ("two_hop_speculative", "two_hop", True),
+            ("single_hop", "single_hop", False),
+        ]
+        with local_models(latency_ms=args.llm_latency_ms, seed=args.seed) as models:
+            try:
+                for label, mode, speculative in variants:
+                    guardAgent.set_guard_agent_mode(mode)
+                    guardAgent.set_parse_speculation(speculative)
+                    for case, question in QUESTION_CASES.items():
+                        totals, overheads, calls = [], [], []
+                        for iteration in range(args.iterations + 1):
+                            _clear_caches(tool)
+                            simulated = sum(model.simulated_seconds for model in models.values())
+                            turns = sum(model.calls for model in models.values())
+                            started = time.perf_counter()
+                            with _quiet(args.verbose):
+                                async with guardAgent.speculative_parse(question):
+                                    await guardAgent.agent.run(question)
+                            elapsed = time.perf_counter() - started
+                            if iteration == 0:
+                                continue    # warm-up
+                            simulated = sum(model.simulated_seconds for model in models.values()) - simulated
+                            totals.append(elapsed * 1000)
+                            overheads.append((elapsed - simulated) * 1000)
+                            calls.append(sum(model.calls for model in models.values()) - turns)
+                        self.record(f"agent.{label}.{case}.total", summarize(totals))
+                        if not speculative:
+                            # Model turns overlap with speculation, so wall time minus model time means nothing
+                            self.record(f"agent.{label}.{case}.overhead", summarize(overheads))
+                        self.record(f"agent.{label}.{case}.llm_calls", summarize(calls, unit="calls"))
+            finally:
+                guardAgent.set_guard_agent_mode(GUARD_AGENT_MODE)
+                guardAgent.set_parse_speculation(PARSE_SPECULATION_ENABLED)
+
+
+def _clear_caches(tool: ReportsTool):
+    """Forget cached results, query vectors and parses, so the next call does the full work."""
+    tool.result_cache.clear()
+    tool.embedder.cache.clear()
+    parse_cache.clear()
+
+
+async def _drain_summaries():
+    """Wait for background summary refreshes (they would otherwise overlap the next measurement)."""
+    while ConversationService._summary_tasks:
+        await asyncio.gather(*list(ConversationService._summary_tasks.values()), return_exceptions=True)
+
+
+async def _async(fn: Callable[[], Any]) -> Any:
+    return fn()
+
+
+def _report(line: str):
+    print(line, file=sys.stderr, flush=True)
+
+
+@contextlib.contextmanager
+def _quiet(verbose: bool):
+    """Silence the components' progress prints (they would dominate the timings and the output)."""
+    if verbose:
+        yield
+        return
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def environment() -> Dict[str, Any]:
+    """Where the results come from, stored with them."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+
+    import chromadb
+    import pydantic_ai
+    return {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "chromadb": chromadb.__version__,
+        "pydantic_ai": getattr(pydantic_ai, "__version__", None),
+    }
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """
+    Compare two results files metric by metric (p50 of distributions, else value).
+
+    Args:
+        baseline: Earlier results
+        current: Results of this run
+        threshold: Relative change counted as a regression (0.2 = 20% slower / less throughput)
+
+    Returns:
+        One row per metric present in both: name, unit, baseline, current, change, regressed
+    """
+    rows = []
+    for name, metric in current["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None or previous.get("unit") != metric["unit"]:
+            continue
+        old = previous.get("p50", previous.get("value"))
+        new = metric.get("p50", metric.get("value"))
+        if old is None or new is None or old <= 0:
+            continue
+
+        change = (new - old) / old
+        worse = -change if metric["unit"] in HIGHER_IS_BETTER_UNITS else change
+        rows.append({
+            "name": name,
+            "unit": metric["unit"],
+            "baseline": old,
+            "current": new,
+            "change": round(change, 4),
+            "regressed": worse > threshold
+        })
+    return rows
+
+
+def _print_comparison(rows: List[Dict[str, Any]], baseline: Dict[str, Any], current: Dict[str, Any]):
+    differing = [
+        key for key in ("reports", "llm_latency_ms", "mongo_latency_ms", "embed_latency_ms")
+        if baseline.get("args", {}).get(key) != current["args"].get(key)
+    ]
+    if differing:
+        _report(f"Warning: baseline was run with different settings ({', '.join(differing)})")
+
+    _report(f"\n{'metric':<50} {'baseline':>12} {'current':>12} {'change':>9}")
+    for row in rows:
+        flag = "  REGRESSED" if row["regressed"] else ""
+        _report(f"{row['name']:<50} {row['baseline']:>12,.3f} {row['current']:>12,.3f} {row['change']:>+8.1%}{flag}")
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    suites = args.suites.split(",") if args.suites else SUITES
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        raise SystemExit(f"Unknown suites: {', '.join(sorted(unknown))} (available: {', '.join(SUITES)})")
+
+    bench = BenchmarkRun(args)
+    started = time.perf_counter()
+    try:
+        for suite in SUITES:
+            if suite not in suites:
+                continue
+            _report(f"[{suite}]")
+            method = getattr(bench, f"suite_{suite}")
+            if asyncio.iscoroutinefunction(method):
+                await method()
+            else:
+                method()
+    finally:
+        bench.close()
+
+    return {
+        "version": RESULTS_VERSION,
+        "environment": environment(),
+        "args": vars(args),
+        "seconds": round(time.perf_counter() - started, 1),
+        "results": bench.results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline GuardOwl component benchmarks")
+    parser.add_argument("--suites", help=f"Comma-separated subset of: {', '.join(SUITES)}")
+    parser.add_argument("--reports", type=int, default=20000, help="Synthetic reports to generate and ingest")
+    parser.add_argument("--reports-file", help="Ingest this JSON/NDJSON file instead of generating reports")
+    parser.add_argument("--iterations", type=int, default=30, help="Timed calls per measurement")
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0, help="Simulated latency per model turn")
+    parser.add_argument("--mongo-latency-ms", type=float, default=1.0, help="Simulated MongoDB round trip")
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0, help="Simulated embedding cost per text")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="benchmark_results.json", help="Results file")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative slowdown counted as a regression")
+    parser.add_argument("--keep-dir", action="store_true", help="Keep the generated reports and Chroma directory")
+    parser.add_argument("--verbose", action="store_true", help="Show the components' own output")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    _report(f"Results written to {args.out} ({results['seconds']}s)")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        rows = compare_results(baseline, results, args.threshold)
+        _print_comparison(rows, baseline, results)
+        regressions = [row["name"] for row in rows if row["regressed"]]
+        if regressions:
+            _report(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        _report(f"\nNo regressions above {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Synthetic security reports shaped like src/collections/data.json.
+
+Reports are generated from the same sentence patterns, vehicles and locations
+as the real data, spread over more sites, guards and days, so ingest, filter
+and search benchmarks can run at any scale (up to millions of reports).
+Generation is streamed: a 1M-report file never sits in memory.
+
+Usage:
+    python -m benchmarks.syntheticReports --count 1000000 --out reports.ndjson
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator
+
+SEED_DATA_PATH = "src/collections/data.json"
+
+# "Today" of the Parsing Agent prompt: relative date queries land inside the generated range
+END_DATE = datetime(2025, 10, 17, tzinfo=timezone.utc)
+
+VEHICLES = [
+    ("red", "Toyota Camry"), ("blue", "Honda Civic"), ("white", "Ford F-150"),
+    ("silver", "Chevy Malibu"), ("black", "BMW 3 Series"), ("grey", "Nissan Altima"),
+    ("green", "Subaru Outback"), ("white", "Tesla Model 3"), ("black", "Jeep Wrangler"),
+    ("silver", "Hyundai Elantra"),
+]
+
+LOCATIONS = [
+    "north gate", "south gate", "east gate", "west gate", "loading dock",
+    "garage entrance", "main lobby", "parking lot B", "rear fence", "server room door",
+]
+
+EVENTS = ["loitering", "trespass", "tailgating", "alarm triggered", "door left ajar", "geofence breach"]
+
+OUTCOMES = [
+    "no further action", "notified supervisor", "PD non-emergency informed",
+    "area cleared", "returned to route", "verbal warning issued",
+]
+
+# (weight, template) - the sentence patterns of data.json
+TEMPLATES = [
+    (30, "Routine patrol, no incident. Checked {location}."),
+    (20, "Short geofence exit detected; guard re-entered within {minutes} minutes."),
+    (20, "Guard observed a {color} {model} loitering near the {location}. Color: {color}. Model: {model}."),
+    (15, "Possible {event} at the {location}; {outcome}."),
+    (10, "Report of {event} at {location}. Vehicle seen: {color} {model}. Color: {color}. Model: {model}."),
+    (5, "{event_title} detected near {location}. Guard recorded details."),
+]
+
+
+def generate_reports(
+    count: int,
+    sites: int = 50,
+    guards: int = 200,
+    days: int = 90,
+    seed: int = 42,
+    include_seed_data: bool = True
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield `count` reports in the data.json shape (id, siteId, date, guardId, text).
+
+    Args:
+        count: Number of reports
+        sites: Number of distinct sites (S01, S02, ...)
+        guards: Number of distinct guards (G01, G02, ...)
+        days: Days covered, ending at END_DATE
+        seed: Random seed; the same arguments always produce the same reports
+        include_seed_data: Start with the real reports of data.json (their ids are kept)
+
+    Yields:
+        Report dictionaries
+    """
+    produced = 0
+    if include_seed_data:
+        with open(SEED_DATA_PATH, "r") as f:
+            for report in json.load(f)[:count]:
+                yield report
+                produced += 1
+
+    rng = random.Random(seed)
+    weights = [weight for weight, _ in TEMPLATES]
+    templates = [template for _, template in TEMPLATES]
+    start = END_DATE - timedelta(days=days)
+    span_minutes = days * 24 * 60
+    site_width = max(2, len(str(sites)))
+    guard_width = max(2, len(str(guards)))
+
+    for position in range(produced, count):
+        color, model = rng.choice(VEHICLES)
+        event = rng.choice(EVENTS)
+        text = rng.choices(templates, weights)[0].format(
+            location=rng.choice(LOCATIONS),
+            minutes=rng.randint(1, 9),
+            color=color,
+            model=model,
+            event=event,
+            event_title=event.title(),
+            outcome=rng.choice(OUTCOMES)
+        )
+        # Five-minute resolution, like the real reports
+        date = start + timedelta(minutes=rng.randrange(0, span_minutes, 5))
+        yield {
+            "id": f"syn{position:08d}",
+            "siteId": f"S{rng.randint(1, sites):0{site_width}d}",
+            "date": date.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "guardId": f"G{rng.randint(1, guards):0{guard_width}d}",
+            "text": text
+        }
+
+
+def write_reports(path: str, count: int, file_format: str = "ndjson", **options) -> Dict[str, Any]:
+    """
+    Stream generated reports to a JSON array or NDJSON file.
+
+    Args:
+        path: Output file
+        count: Number of reports
+        file_format: "ndjson" (one report per line) or "json" (one array)
+        **options: Passed to generate_reports
+
+    Returns:
+        {"path", "reports", "seconds"}
+    """
+    started = time.perf_counter()
+    written = 0
+    with open(path, "w") as f:
+        if file_format == "json":
+            f.write("[\n")
+        for report in generate_reports(count, **options):
+            line = json.dumps(report)
+            if file_format == "json":
+                f.write(("" if written == 0 else ",\n") + line)
+            else:
+                f.write(line + "\n")
+            written += 1
+        if file_format == "json":
+            f.write("\n]\n")
+
+    seconds = time.perf_counter() - started
+    print(f"[SyntheticReports] Wrote {written} reports to {path} in {seconds:.1f}s")
+    return {"path": path, "reports": written, "seconds": seconds}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic security reports shaped like data.json")
+    parser.add_argument("--count", type=int, default=100000, help="Number of reports")
+    parser.add_argument("--out", default="synthetic_reports.ndjson", help="Output file")
+    parser.add_argument("--format", choices=["ndjson", "json"], default="ndjson", dest="file_format")
+    parser.add_argument("--sites", type=int, default=50)
+    parser.add_argument("--guards", type=int, default=200)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-seed-data", action="store_true", help="Do not start with the reports of data.json")
+    args = parser.parse_args()
+
+    write_reports(
+        args.out,
+        args.count,
+        file_format=args.file_format,
+        sites=args.sites,
+        guards=args.guards,
+        days=args.days,
+        seed=args.seed,
+        include_seed_data=not args.no_seed_data
+    )
+
+
+if __name__ == "__main__":
+    main()
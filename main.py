@@ -4,71 +4,137 @@ from fastapi import FastAPI
 from contextlib import asynccontextmanager
 import logfire
 
-from src.routers import chatbotRouter
+from src.routers import chatbotRouter, reportsRouter, metricsRouter
 from src.collections.chromadb import SecurityReportDatabase
 from src.tools.reportsToolClass import ReportsTool
 from src.agents.guardAgent import set_reports_tool
-from src.utils.constants import CHROMA_PERSIST_DIR
+from src.agents.parsingAgent import parse_cache, parse_path_counts, speculation_stats
+from src.utils.constants import (
+    CHROMA_PERSIST_DIR,
+    CHROMA_SNAPSHOT_DIR,
+    CHROMA_SNAPSHOT_STRICT,
+    METADATA_INDEX_ENABLED,
+    KEYWORD_INDEX_ENABLED,
+    GUARD_AGENT_MODE,
+    PARSE_SPECULATION_ENABLED,
+)
 from src.db.mongodb import mongodb  # NEW: Import MongoDB manager
+from src.services.conversationService import ConversationService
+from src.services.conversationWriter import conversation_writer
+from src.utils.metrics import ServerTimingMiddleware, register_component
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Application lifespan manager - runs on startup and shutdown.
-    Initializes MongoDB Atlas and ChromaDB, ingests data if collection is empty.
+    Initializes MongoDB Atlas and ChromaDB, syncs new or changed reports into the collection.
     """
     print("[Startup] Starting application...")
 
     # Initialize MongoDB connection
     print("[Startup] Connecting to MongoDB Atlas...")
     await mongodb.connect()
+    await ConversationService.migrate_legacy_conversations()
+    conversation_writer.start()
 
     print("[Startup] Initializing ChromaDB...")
 
-    # Initialize ChromaDB
-    db = SecurityReportDatabase(persist_directory=CHROMA_PERSIST_DIR)
-    collection = db.get_collection()
-
-    # Check if collection is empty and ingest data if needed
-    try:
-        count = collection.count()
-        print(f"[Startup] ChromaDB collection has {count} documents")
-
-        if count == 0:
-            print("[Startup] Collection is empty. Ingesting data from src/collections/data.json...")
-            db.ingest_data("src/collections/data.json")
-            print(f"[Startup] Data ingestion complete. Collection now has {collection.count()} documents")
-        else:
-            print("[Startup] Collection already populated. Skipping data ingestion.")
-    except Exception as e:
-        print(f"[Startup] Error during ChromaDB initialization: {str(e)}")
-        raise
+    if CHROMA_SNAPSHOT_DIR:
+        # Prebuilt index: mount read-only, no ingestion or embedding at startup
+        print(f"[Startup] Loading index snapshot from {CHROMA_SNAPSHOT_DIR}...")
+        db = SecurityReportDatabase.open_snapshot(CHROMA_SNAPSHOT_DIR, strict=CHROMA_SNAPSHOT_STRICT)
+        collection = db.get_collection()
+        print(f"[Startup] Snapshot loaded. Collection has {collection.count()} documents")
+    else:
+        # Initialize ChromaDB
+        db = SecurityReportDatabase(persist_directory=CHROMA_PERSIST_DIR)
+        collection = db.get_collection()
+
+        # Sync the collection with the reports file: only new or changed reports are embedded
+        try:
+            count = collection.count()
+            print(f"[Startup] ChromaDB collection has {count} documents")
+
+            print("[Startup] Syncing reports from src/collections/data.json...")
+            changes = db.sync_data("src/collections/data.json")
+            print(
+                f"[Startup] Sync complete: {changes['added']} added, {changes['updated']} updated, "
+                f"{changes['deleted']} deleted. Collection now has {collection.count()} documents"
+            )
+        except Exception as e:
+            print(f"[Startup] Error during ChromaDB initialization: {str(e)}")
+            raise
+
+    # Columnar metadata index for pure-filter queries, kept in sync by later ingests
+    metadata_index = db.build_metadata_index() if METADATA_INDEX_ENABLED else None
+    # BM25 keyword index for hybrid search, kept in sync the same way
+    keyword_index = db.build_keyword_index() if KEYWORD_INDEX_ENABLED else None
 
     # Initialize Reports Tool with the collection
-    reports_tool = ReportsTool(collection=collection)
+    reports_tool = ReportsTool(
+        collection=collection,
+        embedding_function=db.embedding_function,
+        metadata_index=metadata_index,
+        keyword_index=keyword_index
+    )
+
+    # Pre-embed the most frequent historical queries (also loads the ONNX model)
+    await reports_tool.embedder.warm_up()
 
     # Set the reports tool for the Guard Agent
     set_reports_tool(reports_tool)
+    print(f"[Startup] Guard Agent report lookups: {GUARD_AGENT_MODE}")
+    if PARSE_SPECULATION_ENABLED and GUARD_AGENT_MODE == "two_hop":
+        print("[Startup] Speculative query parsing enabled")
+
+    # Component stats exported as gauges on /metrics
+    register_component("conversation_writer", conversation_writer.stats)
+    register_component("query_pool", reports_tool.query_layer.stats)
+    register_component("result_cache", reports_tool.result_cache.stats)
+    register_component("query_embedding_cache", reports_tool.embedder.stats)
+    register_component("parse_cache", parse_cache.stats)
+    register_component("parse_path", lambda: dict(parse_path_counts))
+    register_component("parse_speculation", speculation_stats)
+    if metadata_index is not None:
+        register_component("metadata_index", metadata_index.stats)
+    if keyword_index is not None:
+        register_component("keyword_index", keyword_index.stats)
     print("[Startup] Reports Tool initialized and connected to Guard Agent")
     print("[Startup] Application startup complete")
 
     yield
 
     print("[Shutdown] Application shutting down...")
+    reports_tool.embedder.save()
+    reports_tool.query_layer.shutdown()
+    # Write queued message pairs before the MongoDB connection goes away
+    await conversation_writer.close()
+    # Summary refreshes scheduled by those writes still use the connection too
+    await ConversationService.shutdown()
     await mongodb.close()
     print("[Shutdown] Application shutdown complete")
 
 
-logfire.configure()
+# Traces go to Logfire only when a token is configured; /metrics and Server-Timing work either way
+logfire.configure(send_to_logfire='if-token-present')
 logfire.instrument_pydantic_ai()
 
 app = FastAPI(lifespan=lifespan)
 
+# Per-request stage timings (Server-Timing header) and request duration histograms
+app.add_middleware(ServerTimingMiddleware)
+
 # Include the router in the main application
 app.include_router(
     chatbotRouter.router
 )
+app.include_router(
+    reportsRouter.router
+)
+app.include_router(
+    metricsRouter.router
+)
 
 # Root endpoint
 @app.get("/")
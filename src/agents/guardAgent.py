@@ -1,9 +1,17 @@
 from pydantic_ai import Agent, RunContext
-from typing import Dict, Any
+from typing import Dict, Any, List, Literal, Optional
 import json
+from contextlib import nullcontext
 from pydantic_ai.settings import ModelSettings
+from pydantic_ai.tools import ToolDefinition
 
 from src.ai.allModels import gemini_model
+from src.ai.timedModel import TimedModel
+from src.agents.parsingAgent import query_parameter_rules, speculate_query_params
+from src.models.chromadb import ChromaQueryParams
+from src.tools.reportFormatter import format_reports, format_aggregation, format_page_note
+from src.utils.constants import GUARD_AGENT_MODE, DEFAULT_N_RESULTS, PARSE_SPECULATION_ENABLED
+from src.utils.metrics import timed_stage
 
 # The Guard Agent will be initialized with the reports_tool_instance
 # This will be set up during application startup
@@ -14,15 +22,70 @@ def set_reports_tool(tool_instance):
     global reports_tool_instance
     reports_tool_instance = tool_instance
 
+def get_reports_tool():
+    """Return the reports tool instance (None until startup has set it)."""
+    return reports_tool_instance
+
+# How report lookups reach the database (see GUARD_AGENT_MODE):
+# - "two_hop": retrieve_security_reports(user_query), parameters built by the Parsing Agent
+# - "single_hop": search_security_reports(query_texts, where_filter, n_results, newest_first), filled in by this agent
+GUARD_AGENT_MODES = ("two_hop", "single_hop")
+guard_agent_mode = "two_hop"
+
+def set_guard_agent_mode(mode: str):
+    """Select the report lookup tool the Guard Agent is offered ("two_hop" or "single_hop")."""
+    global guard_agent_mode
+    if mode not in GUARD_AGENT_MODES:
+        raise ValueError(f"Unknown guard agent mode {mode!r} (expected one of: {', '.join(GUARD_AGENT_MODES)})")
+    guard_agent_mode = mode
+
+set_guard_agent_mode(GUARD_AGENT_MODE)
+
+# Speculative parsing (see PARSE_SPECULATION_ENABLED): two-hop runs start the Parsing Agent
+# on the raw question in parallel with this agent's first turn
+parse_speculation_enabled = PARSE_SPECULATION_ENABLED
+
+def set_parse_speculation(enabled: bool):
+    """Turn speculative parsing of two-hop runs on or off."""
+    global parse_speculation_enabled
+    parse_speculation_enabled = enabled
+
+def speculative_parse(user_query: str):
+    """
+    Context to run the Guard Agent in: speculatively parses the question while the agent plans.
+
+    A no-op unless speculative parsing is on and the agent is in two-hop mode (single-hop
+    runs never call the Parsing Agent).
+
+    Args:
+        user_query: The user's question, as passed to the agent
+    """
+    if not parse_speculation_enabled or guard_agent_mode != "two_hop":
+        return nullcontext()
+    return speculate_query_params(user_query)
+
 agent = Agent(
     name="Guard Agent",
-    model=gemini_model,
+    model=TimedModel(gemini_model, "guard_llm"),
     retries=3,  # Retry up to 3 times on failure
 )
 
 @agent.system_prompt
 def guard_instructions():
-    return """
+    if guard_agent_mode == "single_hop":
+        # Same instructions, with the structured search tool
+        return GUARD_INSTRUCTIONS.replace("retrieve_security_reports", "search_security_reports")
+    return GUARD_INSTRUCTIONS
+
+@agent.instructions
+def single_hop_instructions():
+    # Instructions are evaluated on every run (also with message history), so the
+    # parameter rules' dates are always today's
+    if guard_agent_mode == "single_hop":
+        return SINGLE_HOP_INSTRUCTIONS + query_parameter_rules()
+    return ""
+
+GUARD_INSTRUCTIONS = """
     You are an AI assistant for security guards. You help them with:
     1. Retrieving and analyzing security reports from the database
     2. Answering questions about security protocols and procedures
@@ -66,6 +129,22 @@ def guard_instructions():
     When a user asks about security reports, incidents, guards, sites, or activities,
     you MUST use the retrieve_security_reports tool to fetch the relevant data from the database.
 
+    COUNTS AND TRENDS:
+    - For "how many", "per site", "per guard", "busiest day", "what time of day" or trend questions,
+      use the aggregate_security_reports tool instead of retrieving reports and counting them yourself
+    - Example: "how many incidents per site last month" -> aggregate_security_reports(
+      filter_query="reports last month", group_by=["siteId"])
+    - Example: "geofence exits per day at S01 this week" -> aggregate_security_reports(
+      filter_query="geofence exits at S01 this week", group_by=["day"])
+    - Use retrieve_security_reports afterwards only if the user also wants to see the reports themselves
+
+    LARGE RESULTS (PAGES):
+    - Report lists come back one page at a time. A "[Page: reports 1-20 of 340 ...]" note means
+      more reports match than are shown
+    - Answer from the first page, say how many reports matched when the total is given, and offer
+      to show more; call retrieve_security_reports again with the note's cursor only when the user
+      asks for the next page or needs the complete list
+
     After retrieving reports, synthesize the results into a clear, conversational summary that
     directly answers the user's question. Be concise but informative.
 
@@ -81,8 +160,13 @@ def guard_instructions():
     - If retrieved reports do NOT contain information related to the user's question, simply state
       that no relevant reports were found - DO NOT mention, describe, or reference the content of
       irrelevant reports in any way
+    - Report lists may group near-identical reports into one entry ("N reports (...)") with the
+      sites, guards and dates involved; treat the count as the number of matching reports
+    - If the report list ends with a "[Truncated: ...]" note, say the answer covers only part of
+      the matching reports and suggest narrowing the site, guard or date range
     - Pay attention to relevance scores when provided - reports with high distance scores (>1.0)
-      may not be relevant and should be excluded from your response entirely
+      may not be relevant and should be excluded from your response entirely, unless they are
+      marked "Keyword match" (those contain the searched terms verbatim)
     - NEVER fabricate, invent, or make up information that is not present in the retrieved reports
     - If you cannot answer a question based on the available reports, clearly state this limitation
       without describing what the irrelevant reports actually contained
@@ -99,16 +183,38 @@ def guard_instructions():
     Always prioritize the safety and security of individuals and property.
     """
 
-@agent.tool
-async def retrieve_security_reports(context: RunContext, user_query: str) -> str:
+SINGLE_HOP_INSTRUCTIONS = """
+    QUERY PARAMETERS (search_security_reports):
+    - search_security_reports takes the search parameters directly: build query_texts, where_filter,
+      n_results and newest_first from the user's question (and the conversation) with the rules below
+    - "search for Camry" means query_texts="Camry"; "at Site S04" adds {"siteId": "S04"} to where_filter
+    - To get the next page, pass only the cursor from the "[Page: ...]" note
+    """
+
+
+async def _two_hop_only(context: RunContext, tool_def: ToolDefinition) -> Optional[ToolDefinition]:
+    """Offer the tool only in two-hop mode."""
+    return tool_def if guard_agent_mode == "two_hop" else None
+
+
+async def _single_hop_only(context: RunContext, tool_def: ToolDefinition) -> Optional[ToolDefinition]:
+    """Offer the tool only in single-hop mode."""
+    return tool_def if guard_agent_mode == "single_hop" else None
+
+
+@agent.tool(prepare=_two_hop_only)
+async def retrieve_security_reports(context: RunContext, user_query: str, cursor: Optional[str] = None) -> str:
     """
     Retrieve security reports from the ChromaDB database based on natural language queries.
 
     This tool handles both semantic search (e.g., "white vehicle incidents") and metadata
     filtering (e.g., "all reports from Site S04" or "Guard G03's activities on August 30th").
+    Large results come back one page at a time.
 
     Args:
         user_query: The user's natural language query about security reports
+        cursor: To get the next page of a previous result, the cursor value from its "[Page: ...]" note
+            (pass the same user_query)
 
     Returns:
         A formatted string containing the retrieved reports or an error message
@@ -118,36 +224,111 @@ async def retrieve_security_reports(context: RunContext, user_query: str) -> str
 
     try:
         # Call the reports tool
-        result = await reports_tool_instance.execute(user_query)
+        with timed_stage("tool:retrieve_security_reports"):
+            result = await reports_tool_instance.execute(user_query, cursor=cursor)
 
         # If query failed, return the error message
         if not result["success"]:
             return result["message"]
 
-        # Format the results for the agent to synthesize
-        formatted_output = f"Found {result['count']} reports:\n\n"
+        # Format the results for the agent to synthesize (near-identical reports grouped, size capped)
+        return format_reports(result['results']) + format_page_note(result)
 
-        for i, report in enumerate(result['results'], 1):
-            metadata = report['metadata']
-            formatted_output += f"{i}. Report {report['id']}\n"
-            formatted_output += f"   Site: {metadata.get('siteId', 'N/A')}, "
-            formatted_output += f"Guard: {metadata.get('guardId', 'N/A')}, "
-            # Use date_str for display (original ISO format), fall back to date if not available
-            formatted_output += f"Date: {metadata.get('date_str', metadata.get('date', 'N/A'))}\n"
-            formatted_output += f"   {report['text']}\n"
+    except Exception as e:
+        return f"Error retrieving reports: {str(e)}"
 
-            # Include distance for semantic searches
-            if 'distance' in report:
-                formatted_output += f"   (Relevance score: {report['distance']:.2f})\n"
 
-            formatted_output += "\n"
+@agent.tool(prepare=_single_hop_only)
+async def search_security_reports(
+    context: RunContext,
+    query_texts: Optional[str] = None,
+    where_filter: Optional[str] = None,
+    n_results: int = DEFAULT_N_RESULTS,
+    newest_first: bool = False,
+    cursor: Optional[str] = None
+) -> str:
+    """
+    Search security reports in the ChromaDB database with structured parameters.
+
+    Use query_texts for what happened (semantic search) and where_filter for who, where and when
+    (exact metadata filters). Large results come back one page at a time.
 
-        return formatted_output
+    Args:
+        query_texts: The incident concept to search for (e.g. "loitering", "white vehicle incident");
+            null for a pure filter such as "all reports from Site S04"
+        where_filter: ChromaDB metadata filter as a JSON string on siteId, guardId and timestamp
+            (e.g. '{"$and": [{"siteId": "S04"}, {"timestamp": {"$gte": 1760486400}}]}'); null for no filter
+        n_results: Maximum number of reports (5 by default, 10 for activities, 1000 for "all")
+        newest_first: true for the "last", "latest" or "most recent" reports (filter results are oldest first otherwise)
+        cursor: To get the next page of a previous result, the cursor value from its "[Page: ...]" note
+            (the other parameters are then ignored)
+
+    Returns:
+        A formatted string containing the retrieved reports or an error message
+    """
+    if reports_tool_instance is None:
+        return "Error: Reports database is not available. Please contact support."
+
+    if not (query_texts or where_filter or cursor):
+        return "Error: Provide query_texts, where_filter or cursor."
+
+    try:
+        # Parameters come straight from the model: no Parsing Agent round trip
+        with timed_stage("tool:search_security_reports"):
+            params = None if cursor else ChromaQueryParams(
+                query_texts=query_texts,
+                where_filter=where_filter,
+                n_results=n_results,
+                newest_first=newest_first
+            )
+            result = await reports_tool_instance.search(params, cursor=cursor)
+
+        if not result["success"]:
+            return result["message"]
+
+        return format_reports(result['results']) + format_page_note(result, tool_name="search_security_reports")
 
     except Exception as e:
         return f"Error retrieving reports: {str(e)}"
 
 
+@agent.tool
+async def aggregate_security_reports(
+    context: RunContext,
+    filter_query: str = "",
+    group_by: Optional[List[Literal["siteId", "guardId", "day", "hour", "hour_of_day"]]] = None
+) -> str:
+    """
+    Count security reports, optionally grouped by site, guard or time, computed directly on the database.
+
+    Use for counting and trend questions ("how many incidents per site last month",
+    "which guard filed the most reports", "what time of night do geofence exits happen").
+
+    Args:
+        filter_query: Which reports to count, in natural language without the counting part
+            (e.g. "reports last month", "geofence exits at S01"). Empty counts all reports.
+        group_by: Up to two dimensions: "siteId", "guardId", "day" (daily histogram),
+            "hour" (hourly timeline) or "hour_of_day" (distribution over 00:00-23:00). Empty for a single total.
+
+    Returns:
+        A Markdown table of counts, or an error message
+    """
+    if reports_tool_instance is None:
+        return "Error: Reports database is not available. Please contact support."
+
+    try:
+        with timed_stage("tool:aggregate_security_reports"):
+            result = await reports_tool_instance.aggregate(filter_query, (group_by or [])[:2])
+
+        if not result["success"]:
+            return result["message"]
+
+        return format_aggregation(result)
+
+    except Exception as e:
+        return f"Error aggregating reports: {str(e)}"
+
+
 @agent.tool
 def call_support(context: RunContext, issue: str) -> str:
     """
@@ -1,21 +1,141 @@
+import asyncio
+import difflib
+import json
+import re
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from pydantic_ai import Agent
 from src.models.chromadb import ChromaQueryParams
 from src.ai.allModels import gemini_model
+from src.ai.timedModel import TimedModel
+from src.tools.queryCompiler import ACTIVITY_N_RESULTS, compile_query
+from src.utils.cache import LRUCache
+from src.utils.constants import (
+    DEFAULT_N_RESULTS,
+    MAX_N_RESULTS,
+    PARSE_CACHE_SIZE,
+    PARSE_CACHE_TTL_SECONDS,
+    PARSE_SPECULATION_MIN_SIMILARITY,
+)
+from src.utils.metrics import record_parse_speculation
+
+# How each query was resolved ("fast_path" = rule-based compiler, "cache" = earlier
+# Parsing Agent result, "speculative" = Parsing Agent run started with the request,
+# "llm" = Parsing Agent)
+parse_path_counts: Dict[str, int] = {"fast_path": 0, "cache": 0, "speculative": 0, "llm": 0}
+
+# Speculative parses by outcome ("hit" = reused by the tool, "miss" = tool query too
+# different, "unused" = not needed by the run, "failed" = the parse raised) and the
+# parsing time they hid behind the Guard Agent's first turn
+speculation_counts: Dict[str, float] = {"hit": 0, "miss": 0, "unused": 0, "failed": 0, "saved_ms": 0.0}
+
+# Parsing Agent results keyed on (normalized query, UTC date), since relative
+# dates change meaning at midnight
+parse_cache = LRUCache(
+    maxsize=PARSE_CACHE_SIZE,
+    ttl_seconds=PARSE_CACHE_TTL_SECONDS,
+    name="ParseCache"
+)
 
 # Create a Parsing Agent that translates natural language to ChromaQueryParams
 parsing_agent = Agent(
     name="Parsing Agent",
-    model=gemini_model,
+    model=TimedModel(gemini_model, "parse_llm"),
     output_type=ChromaQueryParams,
     retries=3,  # Retry up to 3 times on failure
 )
 
-@parsing_agent.system_prompt
-def parsing_instructions():
-    return """
-    You are a query parsing specialist. Your job is to translate natural language security
-    report queries into structured JSON matching the ChromaQueryParams schema.
+def parsing_examples(now: Optional[datetime] = None) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    The (input, output) examples of the parsing rules, dated relative to `now`.
+
+    Examples without query_texts are fully structured, so the rule-based compiler
+    (compile_query) must produce the same output for them; the others must be left
+    to the LLM. benchmarks/goldenQueries.py checks both.
+
+    Args:
+        now: Current time (defaults to the real current UTC time)
+
+    Returns:
+        (user query, ChromaQueryParams fields) pairs, where_filter as a JSON string
+    """
+    today = _utc_midnight(now)
+    yesterday = today - timedelta(days=1)
+    month_start = today.replace(day=1)
+    last_month_start = (month_start - timedelta(days=1)).replace(day=1)
+    day = datetime(2025, 8, 30, tzinfo=timezone.utc)
+
+    def between(start: datetime, end: datetime) -> List[Dict]:
+        return [{"timestamp": {"$gte": _epoch(start)}}, {"timestamp": {"$lt": _epoch(end)}}]
+
+    def output(query_texts: Optional[str], where_filter: Dict, n_results: int, newest_first: bool = False) -> Dict[str, Any]:
+        return {
+            "query_texts": query_texts,
+            "where_filter": json.dumps(where_filter),
+            "n_results": n_results,
+            "newest_first": newest_first
+        }
+
+    return [
+        ("All reports from Site S04", output(None, {"siteId": "S04"}, 1000)),
+        ("Last 10 reports at Site S01", output(None, {"siteId": "S01"}, 10, newest_first=True)),
+        ("Latest report from guard G07", output(None, {"guardId": "G07"}, 10, newest_first=True)),
+        (
+            "Guard G03's reports from site S04 on 2025-08-30",
+            output(None, {"$and": [{"guardId": "G03"}, {"siteId": "S04"}, *between(day, day + timedelta(days=1))]}, 10)
+        ),
+        (
+            "What did guard G03 do yesterday?",
+            output(None, {"$and": [{"guardId": "G03"}, *between(yesterday, today)]}, 10)
+        ),
+        (
+            "What happened at Site S01 last night?",
+            output(None, {"$and": [{"siteId": "S01"}, *between(yesterday, today)]}, 10)
+        ),
+        (
+            "Were there any geofence breaches at the west gate last week?",
+            output("geofence breach west gate", {"$and": between(today - timedelta(days=7), today)}, 10)
+        ),
+        (
+            "Show me last month's incidents",
+            output("incidents", {"$and": between(last_month_start, month_start)}, 1000)
+        ),
+    ]
+
+
+def query_parameter_rules(now: Optional[datetime] = None) -> str:
+    """
+    Field extraction and date rules, shared with the Guard Agent's single-hop mode
+    (where it fills the query parameters itself).
 
+    Built per run: the reference dates are the current UTC date, the same "today"
+    the rule-based compiler and the parse cache key use.
+
+    Args:
+        now: Current time (defaults to the real current UTC time)
+    """
+    today = _utc_midnight(now)
+    yesterday = today - timedelta(days=1)
+    tomorrow = today + timedelta(days=1)
+    week_start = today - timedelta(days=7)
+    month_start = today.replace(day=1)
+    last_month_start = (month_start - timedelta(days=1)).replace(day=1)
+
+    def stamp(day: datetime) -> str:
+        return f"{day:%Y-%m-%d} 00:00:00 UTC = {_epoch(day)}"
+
+    def between(start: datetime, end: datetime) -> str:
+        return f'{{"$and": [{{"timestamp": {{"$gte": {_epoch(start)}}}}}, {{"timestamp": {{"$lt": {_epoch(end)}}}}}]}}'
+
+    examples = "\n".join(
+        f'    Input: "{query}"\n    Output: ' + json.dumps(output, indent=2).replace("\n", "\n    ") + "\n"
+        for query, output in parsing_examples(now)
+    )
+
+    return f"""
     Field extraction rules:
     - query_texts: Extract the SEMANTIC concept (what happened) for vector similarity search.
       Examples: "loitering", "white vehicle incident", "geofence exit", "activities"
@@ -30,67 +150,58 @@ def parsing_instructions():
         * timestamp: Unix timestamp (seconds since epoch) with $gte/$lt for date ranges
       IMPORTANT: Return as a JSON string, not an object
 
-    - n_results: Infer from "top N", "all", or default to 5.
-      Use 1000 for "all" queries. Use 10 for "activities" or "what did" queries.
+    - n_results: Infer from "top N", "last N", "all", or default to {DEFAULT_N_RESULTS}.
+      Use {MAX_N_RESULTS} for "all" queries. Use {ACTIVITY_N_RESULTS} for queries about a specific guard
+      and for "activities", "what did" or "what happened" queries.
+
+    - newest_first: true when the user asks for the "last N", "latest", "newest" or "most recent"
+      reports (filter results are returned oldest first otherwise); false by default.
+      "last night", "last week" and "last month" are date ranges, not an ordering.
 
     RELATIVE DATE HANDLING:
-    Today's date is 2025-10-16. Convert relative dates to Unix timestamps using $gte (>=) and $lt (<) operators.
+    Today's date is {today:%Y-%m-%d}. Convert relative dates to Unix timestamps using $gte (>=) and $lt (<) operators.
     Use the 'timestamp' field for all date filtering.
 
     Key Unix timestamps for reference (seconds since epoch):
-    - 2025-10-15 00:00:00 UTC = 1760486400
-    - 2025-10-16 00:00:00 UTC = 1760572800
-    - 2025-10-17 00:00:00 UTC = 1760659200
-    - 2025-10-09 00:00:00 UTC = 1760083200
-    - 2025-09-01 00:00:00 UTC = 1756684800
-    - 2025-10-01 00:00:00 UTC = 1727740800
+    - {stamp(yesterday)}
+    - {stamp(today)}
+    - {stamp(tomorrow)}
+    - {stamp(week_start)}
+    - {stamp(last_month_start)}
+    - {stamp(month_start)}
 
     - Specific day: Use $gte for start and $lt for next day
-      Example: yesterday → {"$and": [{"timestamp": {"$gte": 1760486400}}, {"timestamp": {"$lt": 1760572800}}]}
+      Example: yesterday → {between(yesterday, today)}
     - Time of day: "last night", "this morning", "tonight" all map to full 24-hour day periods
-      - "last night" → yesterday ({"$and": [{"timestamp": {"$gte": 1760486400}}, {"timestamp": {"$lt": 1760572800}}]})
-      - "this morning/tonight" → today ({"$and": [{"timestamp": {"$gte": 1760572800}}, {"timestamp": {"$lt": 1760659200}}]})
-    - Week range: 7 days, use $gte for first day and $lt for day after last
-      Example: last week → {"$and": [{"timestamp": {"$gte": 1760083200}}, {"timestamp": {"$lt": 1760572800}}]}
-    - Month/Year: Calculate start and end timestamps similarly
+      - "last night" → yesterday ({between(yesterday, today)})
+      - "this morning/tonight" → today ({between(today, tomorrow)})
+    - Week range: 7 days, use $gte for first day and $lt for today
+      Example: last week → {between(week_start, today)}
+    - Month: calendar month, use $gte for its first day and $lt for the next month's first day
+      Example: last month → {between(last_month_start, month_start)}
+    - Year: Calculate start and end timestamps similarly
 
     Examples:
 
-    Input: "All reports from Site S04"
-    Output: {
-      "query_texts": null,
-      "where_filter": "{\\"siteId\\": \\"S04\\"}",
-      "n_results": 1000
-    }
+{examples}"""
 
-    Input: "Guard G03's reports from site S04 on 2025-08-30"
-    Output: {
-      "query_texts": "reports",
-      "where_filter": "{\\"$and\\": [{\\"guardId\\": \\"G03\\"}, {\\"siteId\\": \\"S04\\"}, {\\"timestamp\\": {\\"$gte\\": 1724976000}}, {\\"timestamp\\": {\\"$lt\\": 1725062400}}]}",
-      "n_results": 10
-    }
 
-    Input: "Were there any geofence breaches at the west gate last week?"
-    Output: {
-      "query_texts": "geofence breach west gate",
-      "where_filter": "{\\"$and\\": [{\\"timestamp\\": {\\"$gte\\": 1760083200}}, {\\"timestamp\\": {\\"$lt\\": 1760572800}}]}",
-      "n_results": 10
-    }
+def _utc_midnight(now: Optional[datetime] = None) -> datetime:
+    now = now or datetime.now(timezone.utc)
+    return datetime(now.year, now.month, now.day, tzinfo=timezone.utc)
 
-    Input: "Show me last month's incidents"
-    Output: {
-      "query_texts": "incidents",
-      "where_filter": "{\\"$and\\": [{\\"timestamp\\": {\\"$gte\\": 1756684800}}, {\\"timestamp\\": {\\"$lt\\": 1727740800}}]}",
-      "n_results": 1000
-    }
 
-    Input: "What happened at Site S01 last night?"
-    Output: {
-      "query_texts": "incidents reports activities",
-      "where_filter": "{\\"$and\\": [{\\"siteId\\": \\"S01\\"}, {\\"timestamp\\": {\\"$gte\\": 1760486400}}, {\\"timestamp\\": {\\"$lt\\": 1760572800}}]}",
-      "n_results": 10
-    }
+def _epoch(day: datetime) -> int:
+    return int(day.timestamp())
+
 
+@parsing_agent.instructions
+def parsing_instructions():
+    # Evaluated on every run, so relative dates resolve against the current UTC date
+    return """
+    You are a query parsing specialist. Your job is to translate natural language security
+    report queries into structured JSON matching the ChromaQueryParams schema.
+    """ + query_parameter_rules() + """
     Always return valid JSON matching the ChromaQueryParams schema.
     Be smart about extracting dates - ALWAYS convert relative dates like "yesterday", "last week", "last month" to Unix timestamps.
     """
@@ -107,3 +218,176 @@ async def parse_natural_language_query(user_query: str) -> ChromaQueryParams:
     """
     result = await parsing_agent.run(user_query)
     return result.output
+
+
+def _parse_cache_key(user_query: str) -> Tuple[str, str]:
+    """Normalize the query text and bucket it by the current UTC date."""
+    normalized = re.sub(r"\s+", " ", user_query.lower()).strip().strip("?!. ")
+    date_bucket = datetime.now(timezone.utc).date().isoformat()
+    return normalized, date_bucket
+
+
+async def resolve_query_params(user_query: str) -> Tuple[ChromaQueryParams, str]:
+    """
+    Resolve a natural language query into ChromaQueryParams, skipping the LLM when possible.
+
+    Structured queries (site/guard IDs, "all"/"top N", relative dates) are compiled
+    deterministically. Other queries reuse the run's speculative parse when it matches
+    (see speculate_query_params) or are served from the parse cache, and only cache
+    misses call the Parsing Agent (identical concurrent misses share one call).
+
+    Args:
+        user_query: Natural language query from user
+
+    Returns:
+        (query_params, path) where path is "fast_path", "cache", "speculative" or "llm"
+    """
+    # The first lookup of a run decides on its speculative parse (if one is running)
+    speculation = _current_speculation.get()
+    if speculation is not None and speculation.claimed:
+        speculation = None
+
+    compiled = compile_query(user_query)
+    speculated = None
+    if speculation is not None and compiled is None:
+        speculated = await speculation.reuse(user_query)
+    elif speculation is not None:
+        speculation.cancel("unused")
+
+    if compiled is not None:
+        path = "fast_path"
+        query_params = compiled
+    elif speculated is not None:
+        path = "speculative"
+        query_params = speculated
+    else:
+        cached_params, from_cache = await parse_cache.get_or_load(
+            _parse_cache_key(user_query),
+            lambda: parse_natural_language_query(user_query)
+        )
+        path = "cache" if from_cache else "llm"
+        # Hand out a copy so callers cannot mutate the cached entry
+        query_params = cached_params.model_copy()
+
+    parse_path_counts[path] += 1
+    total = sum(parse_path_counts.values())
+    skipped = parse_path_counts["fast_path"] + parse_path_counts["cache"]
+    print(f"[ParsingAgent] Resolved via {path} (LLM skip rate: {skipped}/{total})")
+
+    return query_params, path
+
+
+class ParseSpeculation:
+    """
+    A Parsing Agent run on the raw question, started before the Guard Agent asks for it.
+
+    The first lookup of the run claims it: close enough to the question, the lookup
+    awaits its result; otherwise (or when no lookup comes) it is cancelled.
+    """
+
+    def __init__(self, user_query: str):
+        self.user_query = user_query
+        self.claimed = False
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.task = asyncio.ensure_future(parse_natural_language_query(user_query))
+        self.task.add_done_callback(self._mark_finished)
+
+    def _mark_finished(self, task: asyncio.Future):
+        self.finished = time.perf_counter()
+
+    def similarity(self, user_query: str) -> float:
+        """difflib ratio of the normalized speculated and requested queries (1.0 = identical)."""
+        return difflib.SequenceMatcher(
+            None, _parse_cache_key(self.user_query)[0], _parse_cache_key(user_query)[0]
+        ).ratio()
+
+    def cancel(self, outcome: str):
+        """Give up on the speculation, recording why (a finished parse still fills the parse cache)."""
+        self.claimed = True
+        if not self.task.done():
+            self.task.cancel()
+        elif not self.task.cancelled() and self.task.exception() is None:
+            parse_cache.set(_parse_cache_key(self.user_query), self.task.result())
+        _record_speculation(outcome)
+
+    async def reuse(self, user_query: str) -> Optional[ChromaQueryParams]:
+        """
+        Claim the speculative result for the tool's query.
+
+        Args:
+            user_query: Query the Guard Agent passed to the tool
+
+        Returns:
+            The speculated ChromaQueryParams, or None when the queries differ too much
+            or the speculative parse failed (the caller parses as usual)
+        """
+        similarity = self.similarity(user_query)
+        if similarity < PARSE_SPECULATION_MIN_SIMILARITY:
+            print(f"[ParsingAgent] Speculative parse discarded (similarity {similarity:.2f})")
+            self.cancel("miss")
+            return None
+
+        self.claimed = True
+        claimed_at = time.perf_counter()
+        try:
+            query_params = await self.task
+        except Exception as e:
+            print(f"[ParsingAgent] Speculative parse failed: {str(e)}")
+            _record_speculation("failed")
+            return None
+
+        # Without speculation the parse would only have started now
+        saved = min(self.finished - self.started, claimed_at - self.started)
+        _record_speculation("hit", saved)
+        print(f"[ParsingAgent] Speculative parse reused (similarity {similarity:.2f}, saved {saved * 1000:.0f}ms)")
+
+        parse_cache.set(_parse_cache_key(user_query), query_params)
+        # Hand out a copy so callers cannot mutate the cached entry
+        return query_params.model_copy()
+
+
+_current_speculation: ContextVar[Optional[ParseSpeculation]] = ContextVar("parse_speculation", default=None)
+
+
+@asynccontextmanager
+async def speculate_query_params(user_query: str) -> AsyncIterator[None]:
+    """
+    Parse the raw question in the background while the enclosed block runs.
+
+    resolve_query_params() calls inside the block (also from tasks they spawn) reuse
+    the result. Questions the rule-based compiler or the parse cache already answer
+    are not speculated on. An unclaimed speculation is cancelled when the block exits.
+
+    Args:
+        user_query: The user's question, as sent to the Guard Agent
+    """
+    if compile_query(user_query) is not None or _parse_cache_key(user_query) in parse_cache:
+        yield
+        return
+
+    speculation = ParseSpeculation(user_query)
+    token = _current_speculation.set(speculation)
+    try:
+        yield
+    finally:
+        _current_speculation.reset(token)
+        if not speculation.claimed:
+            speculation.cancel("unused")
+
+
+def _record_speculation(outcome: str, saved_seconds: float = 0.0):
+    speculation_counts[outcome] += 1
+    speculation_counts["saved_ms"] += saved_seconds * 1000
+    record_parse_speculation(outcome, saved_seconds)
+
+
+def speculation_stats() -> Dict[str, float]:
+    """Speculative parse outcomes, hit rate and saved parsing time."""
+    started = sum(speculation_counts[outcome] for outcome in ("hit", "miss", "unused", "failed"))
+    hits = speculation_counts["hit"]
+    return {
+        **speculation_counts,
+        "hit_rate": hits / started if started else 0.0,
+        "saved_ms_per_hit": speculation_counts["saved_ms"] / hits if hits else 0.0
+    }
@@ -1,7 +1,8 @@
 from pydantic_ai import Agent
 from pydantic import BaseModel
-from typing import List, Dict
+from typing import List, Dict, Optional
 from src.ai.allModels import gemini_model
+from src.ai.timedModel import TimedModel
 
 
 class ConversationSummary(BaseModel):
@@ -13,7 +14,7 @@ class ConversationSummary(BaseModel):
 
 summarization_agent = Agent(
     name="Summarization Agent",
-    model=gemini_model,
+    model=TimedModel(gemini_model, "summary_llm"),
     output_type=ConversationSummary,
     retries=2
 )
@@ -36,6 +37,8 @@ def summarization_instructions():
     - Preserve specific IDs, dates, and numbers
     - Skip pleasantries and confirmations
     - Summarize the SUBSTANCE of what was discussed, not the mechanics
+    - If an existing summary is provided, merge the newer messages into it and return
+      one updated summary (keep earlier facts that still matter, drop what is superseded)
 
     Example Input:
     [1] User: tell me about reports with Camrys
@@ -52,19 +55,29 @@ def summarization_instructions():
     """
 
 
-async def summarize_messages(messages: List[Dict]) -> ConversationSummary:
+async def summarize_messages(
+    messages: List[Dict],
+    previous_summary: Optional[ConversationSummary] = None,
+    start_index: int = 0
+) -> ConversationSummary:
     """
     Summarize a list of messages into a concise context.
 
+    When a previous summary is given, only the newly aged-out messages are sent
+    and the model extends the existing summary instead of starting over.
+
     Args:
         messages: List of message dictionaries to summarize
+        previous_summary: Existing rolling summary to extend (optional)
+        start_index: Position of the first message in the full conversation,
+            used to keep message numbering stable across incremental calls
 
     Returns:
         ConversationSummary with condensed context
     """
     # Format messages for summarization
     formatted_messages = []
-    for i, msg in enumerate(messages, 1):
+    for i, msg in enumerate(messages, start_index + 1):
         role = "User" if msg["role"] == "user" else "Agent"
         content = msg["content"]
 
@@ -76,6 +89,15 @@ async def summarize_messages(messages: List[Dict]) -> ConversationSummary:
 
     conversation_text = "\n".join(formatted_messages)
 
+    if previous_summary is not None:
+        conversation_text = f"""Existing summary of the earlier conversation:
+Summary: {previous_summary.summary}
+Key Entities: {previous_summary.key_entities}
+User Intent: {previous_summary.user_intent}
+
+Update the summary so it also covers these newer messages:
+{conversation_text}"""
+
     print(f"[SummarizationAgent] Summarizing {len(messages)} messages...")
     result = await summarization_agent.run(conversation_text)
     print(f"[SummarizationAgent] Summary created: {result.output.summary[:100]}...")
@@ -0,0 +1,34 @@
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
+from pydantic_ai.models import Model, StreamedResponse
+from pydantic_ai.messages import ModelResponse
+from pydantic_ai.models.wrapper import WrapperModel
+
+from src.utils.metrics import record_llm_usage, timed_stage
+
+
+class TimedModel(WrapperModel):
+    """
+    Wraps a model so every LLM turn is timed as a request stage
+    (e.g. "guard_llm"), for Server-Timing and /metrics, and its token
+    usage is counted under the same stage.
+    """
+
+    def __init__(self, wrapped: Model, stage: str):
+        super().__init__(wrapped)
+        self.stage = stage
+
+    async def request(self, *args: Any, **kwargs: Any) -> ModelResponse:
+        with timed_stage(self.stage):
+            response = await super().request(*args, **kwargs)
+        record_llm_usage(self.stage, response.usage.input_tokens or 0, response.usage.output_tokens or 0)
+        return response
+
+    @asynccontextmanager
+    async def request_stream(self, *args: Any, **kwargs: Any) -> AsyncIterator[StreamedResponse]:
+        with timed_stage(self.stage):
+            async with super().request_stream(*args, **kwargs) as response_stream:
+                yield response_stream
+        usage = response_stream.usage()
+        record_llm_usage(self.stage, usage.input_tokens or 0, usage.output_tokens or 0)
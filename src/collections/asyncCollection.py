@@ -0,0 +1,161 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+from src.utils.constants import CHROMA_QUERY_WORKERS, CHROMA_QUERY_MAX_QUEUE
+from src.utils.metrics import timed_stage
+
+
+class AsyncReportCollection:
+    """
+    Async query layer around a ChromaDB collection.
+
+    ChromaDB's client is synchronous, and collection.query() also runs the ONNX
+    embedding of query_texts. Calls are executed on a dedicated, bounded thread
+    pool so the FastAPI event loop stays free for other requests.
+
+    Admission is bounded: at most max_workers + max_queue calls are handed to the
+    pool; further callers wait on the event loop without blocking it.
+    """
+
+    def __init__(
+        self,
+        collection,
+        max_workers: int = CHROMA_QUERY_WORKERS,
+        max_queue: int = CHROMA_QUERY_MAX_QUEUE
+    ):
+        """
+        Initialize the query layer.
+
+        Args:
+            collection: ChromaDB collection object
+            max_workers: Number of threads running ChromaDB calls concurrently
+            max_queue: Calls allowed to wait for a free thread before callers are held back
+        """
+        self.collection = collection
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="chroma-query"
+        )
+        self._slots = asyncio.Semaphore(max_workers + max_queue)
+
+        # Metrics (updated from worker threads, guarded by lock)
+        self._lock = threading.Lock()
+        self._waiting = 0       # held back before admission
+        self._queued = 0        # admitted, waiting for a free thread
+        self._running = 0       # executing on a thread
+        self._max_queue_depth = 0
+        self._completed = 0
+        self._failed = 0
+        self._total_wait_ms = 0.0
+        self._total_run_ms = 0.0
+
+    async def get(self, **kwargs) -> Dict[str, Any]:
+        """Run collection.get() on the query pool."""
+        return await self._run("chroma", self.collection.get, **kwargs)
+
+    async def query(self, **kwargs) -> Dict[str, Any]:
+        """Run collection.query() (including query embedding) on the query pool."""
+        return await self._run("chroma", self.collection.query, **kwargs)
+
+    async def count(self) -> int:
+        """Run collection.count() on the query pool."""
+        return await self._run("chroma", self.collection.count)
+
+    async def embed(self, embedding_function, texts: List[str]) -> List:
+        """Run an embedding function (ONNX inference) on the query pool."""
+        return await self._run("embed", embedding_function, input=texts)
+
+    async def call(self, stage: str, fn: Callable, **kwargs) -> Any:
+        """Run another blocking lookup (e.g. an in-memory index search) on the query pool, timed as `stage`."""
+        return await self._run(stage, fn, **kwargs)
+
+    async def _run(self, stage: str, fn: Callable, **kwargs) -> Any:
+        """Execute a blocking call on the pool, timed (queue wait included) as a request stage."""
+        with timed_stage(stage):
+            return await self._run_on_pool(fn, **kwargs)
+
+    async def _run_on_pool(self, fn: Callable, **kwargs) -> Any:
+        """Execute a blocking ChromaDB call on the pool and record queue metrics."""
+        submitted = time.perf_counter()
+
+        with self._lock:
+            self._waiting += 1
+            self._update_max_depth()
+
+        if self._slots.locked():
+            print(f"[AsyncReportCollection] Query pool saturated, waiting (queue depth {self.stats()['queue_depth']})")
+
+        async with self._slots:
+            with self._lock:
+                self._waiting -= 1
+                self._queued += 1
+
+            def job():
+                started = time.perf_counter()
+                with self._lock:
+                    self._queued -= 1
+                    self._running += 1
+                    self._total_wait_ms += (started - submitted) * 1000
+
+                failed = False
+                try:
+                    return fn(**kwargs)
+                except Exception:
+                    failed = True
+                    raise
+                finally:
+                    with self._lock:
+                        self._running -= 1
+                        self._total_run_ms += (time.perf_counter() - started) * 1000
+                        if failed:
+                            self._failed += 1
+                        else:
+                            self._completed += 1
+
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, job)
+
+    def _update_max_depth(self):
+        """Track the deepest queue seen (caller holds the lock)."""
+        depth = self._waiting + self._queued
+        if depth > self._max_queue_depth:
+            self._max_queue_depth = depth
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Snapshot of query layer metrics.
+
+        Returns:
+            {
+                "workers": int,
+                "queue_depth": int,      # calls waiting for a thread (admitted or not)
+                "running": int,
+                "max_queue_depth": int,
+                "completed": int,
+                "failed": int,
+                "avg_wait_ms": float,
+                "avg_run_ms": float
+            }
+        """
+        with self._lock:
+            finished = self._completed + self._failed
+            return {
+                "workers": self.max_workers,
+                "queue_depth": self._waiting + self._queued,
+                "running": self._running,
+                "max_queue_depth": self._max_queue_depth,
+                "completed": self._completed,
+                "failed": self._failed,
+                "avg_wait_ms": self._total_wait_ms / finished if finished else 0.0,
+                "avg_run_ms": self._total_run_ms / finished if finished else 0.0
+            }
+
+    def shutdown(self):
+        """Stop accepting work and release the thread pool."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
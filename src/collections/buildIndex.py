@@ -0,0 +1,76 @@
+"""
+Offline index build.
+
+Builds a ChromaDB persist directory from a reports file and writes a versioned
+snapshot manifest, so servers can load the index read-only at startup
+(CHROMA_SNAPSHOT_DIR) instead of embedding the dataset on first boot.
+
+Usage:
+    python -m src.collections.buildIndex --input src/collections/data.json --output snapshots/reports
+    python -m src.collections.buildIndex --input reports.ndjson --output snapshots/reports --archive
+"""
+
+import argparse
+import os
+import shutil
+import sys
+
+from src.collections.chromadb import SecurityReportDatabase
+from src.utils.constants import CHROMA_INGEST_BATCH_SIZE, CHROMA_INGEST_WORKERS
+
+
+def build_index(
+    input_path: str,
+    output_dir: str,
+    batch_size: int = CHROMA_INGEST_BATCH_SIZE,
+    workers: int = CHROMA_INGEST_WORKERS,
+    archive: bool = False
+) -> dict:
+    """
+    Build (or incrementally update) a snapshot directory from a reports file.
+
+    An existing output directory is updated with a delta sync, so rebuilding
+    after a daily export only embeds the new or changed reports.
+
+    Args:
+        input_path: JSON array or NDJSON reports file
+        output_dir: Snapshot directory (ChromaDB persist directory + snapshot.json)
+        batch_size: Reports per upsert
+        workers: Threads computing embeddings in parallel
+        archive: Also write <output_dir>-<snapshotVersion>.tar.gz
+
+    Returns:
+        The snapshot manifest
+    """
+    print(f"[BuildIndex] Building index from {input_path} into {output_dir}")
+
+    db = SecurityReportDatabase(persist_directory=output_dir)
+    db.sync_data(input_path, batch_size=batch_size, workers=workers)
+    manifest = db.write_snapshot_manifest(input_path)
+
+    print(f"[BuildIndex] Snapshot {manifest['snapshotVersion']}: {manifest['count']} reports, "
+          f"model {manifest['embeddingModel']}, schema v{manifest['schemaVersion']}")
+
+    if archive:
+        base_name = f"{output_dir.rstrip(os.sep)}-{manifest['snapshotVersion']}"
+        artifact = shutil.make_archive(base_name, "gztar", root_dir=output_dir)
+        print(f"[BuildIndex] Wrote snapshot artifact {artifact}")
+
+    return manifest
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Build a read-only ChromaDB snapshot of security reports.")
+    parser.add_argument("--input", required=True, help="Reports file (JSON array or NDJSON)")
+    parser.add_argument("--output", required=True, help="Snapshot directory to create or update")
+    parser.add_argument("--batch-size", type=int, default=CHROMA_INGEST_BATCH_SIZE, help="Reports per upsert")
+    parser.add_argument("--workers", type=int, default=CHROMA_INGEST_WORKERS, help="Parallel embedding threads")
+    parser.add_argument("--archive", action="store_true", help="Also write a .tar.gz snapshot artifact")
+    args = parser.parse_args(argv)
+
+    build_index(args.input, args.output, args.batch_size, args.workers, args.archive)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,77 +1,651 @@
 import chromadb
+from chromadb.utils import embedding_functions
+import hashlib
 import json
-from datetime import datetime
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.collections.keywordIndex import KeywordIndex
+from src.collections.metadataIndex import MetadataIndex
+from src.utils.constants import (
+    CHROMA_INGEST_BATCH_SIZE,
+    CHROMA_INGEST_WORKERS,
+    EMBEDDING_MODEL_NAME,
+    INDEX_SCHEMA_VERSION,
+)
+
+SNAPSHOT_MANIFEST = "snapshot.json"
+
+# Incremented on every write to the reports collection. Query result caches
+# compare against it so results are never served across an ingest.
+_ingest_generation = 0
+
+
+def get_ingest_generation() -> int:
+    """Return the current ingest generation."""
+    return _ingest_generation
+
+
+def bump_ingest_generation() -> int:
+    """Mark the reports collection as changed and return the new generation."""
+    global _ingest_generation
+    _ingest_generation += 1
+    return _ingest_generation
+
+
+def iter_report_file(file_path: str, chunk_size: int = 1 << 20) -> Iterator[Dict[str, Any]]:
+    """
+    Stream reports from a JSON array or NDJSON file without loading it whole.
+
+    The format is detected from the first non-whitespace character: '[' means a
+    JSON array (decoded incrementally, one element at a time), anything else is
+    treated as newline-delimited JSON.
+
+    Args:
+        file_path: Path to the reports file
+        chunk_size: Characters read per chunk for JSON arrays
+
+    Yields:
+        One report dictionary at a time
+    """
+    with open(file_path, 'r') as f:
+        first = f.read(1)
+        while first and first.isspace():
+            first = f.read(1)
+
+        if first != '[':
+            # NDJSON: one report per line
+            line = first + f.readline()
+            while line:
+                if line.strip():
+                    yield json.loads(line)
+                line = f.readline()
+            return
+
+        decoder = json.JSONDecoder()
+        buffer = ""
+        eof = False
+
+        while True:
+            # Skip whitespace and element separators
+            position = 0
+            while True:
+                while position < len(buffer) and buffer[position] in " \t\r\n,":
+                    position += 1
+                if position < len(buffer) or eof:
+                    break
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer = buffer[position:] + chunk
+                position = 0
+            buffer = buffer[position:]
+
+            if not buffer:
+                raise ValueError("Unexpected end of file: JSON array is not closed")
+            if buffer[0] == ']':
+                return
+
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                # Element spans the chunk boundary: read more and retry
+                if eof:
+                    raise
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer += chunk
+                continue
+
+            # A bare scalar may be cut off at the chunk boundary (e.g. "3." + "5"):
+            # only accept it once it is followed by a delimiter
+            if not eof and not isinstance(item, (dict, list, str)) and (
+                end == len(buffer) or buffer[end] not in " \t\r\n,]"
+            ):
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer += chunk
+                continue
+
+            buffer = buffer[end:]
+            yield item
+
 
 class SecurityReportDatabase:
     """Handles ChromaDB initialization and data ingestion."""
-    
-    def __init__(self, persist_directory: str = "./chroma_db"):
-        """Initialize ChromaDB client and collection."""
+
+    def __init__(self, persist_directory: str = "./chroma_db", read_only: bool = False, embedding_function=None):
+        """
+        Initialize ChromaDB client and collection.
+
+        Args:
+            persist_directory: ChromaDB persist directory
+            read_only: Open an existing collection only; all ingest methods are refused
+            embedding_function: ChromaDB embedding function (defaults to ChromaDB's default model)
+        """
+        self.persist_directory = persist_directory
+        self.read_only = read_only
         self.client = chromadb.PersistentClient(path=persist_directory)
         self.collection_name = "reports_collection"
-        
+        # Shared with ReportsTool so query vectors come from the same model as documents
+        self.embedding_function = embedding_function or embedding_functions.DefaultEmbeddingFunction()
+        # Columnar metadata index for pure-filter queries (filled by build_metadata_index)
+        self.metadata_index = MetadataIndex()
+        # BM25 index over report text for hybrid search (filled by build_keyword_index)
+        self.keyword_index = KeywordIndex()
+
         # Create or get collection
         try:
-            self.collection = self.client.get_collection(name=self.collection_name)
+            self.collection = self.client.get_collection(
+                name=self.collection_name,
+                embedding_function=self.embedding_function
+            )
             print(f"Loaded existing collection: {self.collection_name}")
         except:
-            self.collection = self.client.create_collection(name=self.collection_name)
+            if read_only:
+                raise ValueError(f"Collection {self.collection_name} not found in {persist_directory}")
+            self.collection = self.client.create_collection(
+                name=self.collection_name,
+                embedding_function=self.embedding_function
+            )
             print(f"Created new collection: {self.collection_name}")
-    
-    def ingest_data(self, json_file_path: str):
+
+    def ingest_data(
+        self,
+        json_file_path: str,
+        batch_size: int = CHROMA_INGEST_BATCH_SIZE,
+        workers: int = CHROMA_INGEST_WORKERS,
+        checkpoint_path: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Stream a JSON array or NDJSON file of reports into the ChromaDB collection.
+
+        Reports are parsed incrementally and written with upsert in fixed-size
+        batches, so memory stays flat regardless of file size. Embeddings for
+        upcoming batches are computed in parallel while earlier batches are written.
+        After each batch a checkpoint records progress; if the ingest crashes,
+        calling ingest_data again on the same unchanged file resumes after the
+        last written batch.
+
+        Args:
+            json_file_path: Path to the JSON/NDJSON file containing security reports
+            batch_size: Reports per upsert (capped at the client's max batch size)
+            workers: Threads computing embeddings in parallel
+            checkpoint_path: Progress file (defaults to ingest_checkpoint.json in the persist directory)
+
+        Returns:
+            {
+                "ingested": int,          # reports written in this run
+                "resumed_from": int,      # reports skipped thanks to the checkpoint
+                "seconds": float,
+                "reports_per_sec": float
+            }
+        """
+        self._ensure_writable()
+        batch_size = max(1, min(batch_size, self.client.get_max_batch_size()))
+        checkpoint_path = checkpoint_path or os.path.join(self.persist_directory, "ingest_checkpoint.json")
+        source = self._source_fingerprint(json_file_path)
+
+        resumed_from = self._read_checkpoint(checkpoint_path, source)
+        if resumed_from:
+            print(f"Resuming ingest of {json_file_path} after {resumed_from} reports")
+
+        manifest = self._load_manifest()
+        started = time.perf_counter()
+        written = 0
+
+        def on_written(batch, total_written):
+            nonlocal written
+            written = total_written
+            ids, _, metadatas = batch
+            for report_id, metadata in zip(ids, metadatas):
+                manifest[report_id] = metadata["contentHash"]
+            self._report_progress(checkpoint_path, source, resumed_from + total_written, total_written, started)
+
+        try:
+            records = self._iter_records(json_file_path, skip=resumed_from)
+            self._upsert_batches(self._batched(records, batch_size), workers, on_written)
+        finally:
+            if written:
+                self._save_manifest(manifest)
+                print(f"Collection updated (ingest generation {get_ingest_generation()})")
+
+        # Completed: nothing left to resume
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+
+        seconds = time.perf_counter() - started
+        rate = written / seconds if seconds > 0 else 0.0
+
+        if written or resumed_from:
+            print(f"Successfully ingested {written} reports into ChromaDB ({rate:.0f} reports/sec)")
+        else:
+            print("No reports to ingest")
+
+        return {
+            "ingested": written,
+            "resumed_from": resumed_from,
+            "seconds": seconds,
+            "reports_per_sec": rate
+        }
+
+    def sync_data(
+        self,
+        json_file_path: str,
+        batch_size: int = CHROMA_INGEST_BATCH_SIZE,
+        workers: int = CHROMA_INGEST_WORKERS
+    ) -> Dict[str, Any]:
+        """
+        Bring the collection in line with a reports file, embedding only what changed.
+
+        Each report's content hash is compared with the ingest manifest: new and
+        edited reports are upserted, reports missing from the file are deleted,
+        and unchanged reports are skipped without re-embedding.
+
+        Args:
+            json_file_path: Path to the JSON/NDJSON file containing security reports
+            batch_size: Reports per upsert (capped at the client's max batch size)
+            workers: Threads computing embeddings in parallel
+
+        Returns:
+            {
+                "added": int,
+                "updated": int,
+                "deleted": int,
+                "unchanged": int,
+                "seconds": float
+            }
+        """
+        self._ensure_writable()
+        batch_size = max(1, min(batch_size, self.client.get_max_batch_size()))
+        manifest = self._load_manifest()
+        started = time.perf_counter()
+
+        changes = {"added": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+        seen = set()
+        duplicates = 0
+
+        def changed_records():
+            nonlocal duplicates
+            for report_id, document_text, metadata in self._iter_records(json_file_path):
+                if report_id in seen:
+                    duplicates += 1
+                    continue
+                seen.add(report_id)
+
+                previous_hash = manifest.get(report_id)
+                if previous_hash == metadata["contentHash"]:
+                    changes["unchanged"] += 1
+                    continue
+
+                changes["added" if report_id not in manifest else "updated"] += 1
+                yield report_id, document_text, metadata
+
+        written = 0
+
+        def on_written(batch, total_written):
+            nonlocal written
+            written = total_written
+            ids, _, metadatas = batch
+            for report_id, metadata in zip(ids, metadatas):
+                manifest[report_id] = metadata["contentHash"]
+            print(f"Delta ingest: upserted {total_written} new/changed reports")
+
+        try:
+            self._upsert_batches(self._batched(changed_records(), batch_size), workers, on_written)
+
+            removed = [report_id for report_id in manifest if report_id not in seen]
+            for start in range(0, len(removed), batch_size):
+                chunk = removed[start:start + batch_size]
+                self.collection.delete(ids=chunk)
+                self._index_delete(chunk)
+                self._record_write(log=False)
+                for report_id in chunk:
+                    manifest.pop(report_id, None)
+                changes["deleted"] += len(chunk)
+        finally:
+            if written or changes["deleted"]:
+                self._save_manifest(manifest)
+                print(f"Collection updated (ingest generation {get_ingest_generation()})")
+
+        if duplicates:
+            print(f"Delta ingest: skipped {duplicates} reports with duplicate ids")
+
+        changes["seconds"] = time.perf_counter() - started
+        print(
+            f"Delta ingest complete: {changes['added']} added, {changes['updated']} updated, "
+            f"{changes['deleted']} deleted, {changes['unchanged']} unchanged ({changes['seconds']:.1f}s)"
+        )
+        return changes
+
+    @property
+    def manifest_path(self) -> str:
+        """Sidecar manifest mapping report id -> content hash of what is in the collection."""
+        return os.path.join(self.persist_directory, "ingest_manifest.json")
+
+    def _load_manifest(self) -> Dict[str, Optional[str]]:
+        """
+        Load the ingest manifest, rebuilding it from collection metadata if missing.
+
+        Reports ingested before content hashes existed map to None, so the next
+        sync re-embeds them once.
+        """
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r') as f:
+                return json.load(f)["reports"]
+
+        manifest = {}
+        page_size = self.client.get_max_batch_size()
+        offset = 0
+
+        while True:
+            page = self.collection.get(include=["metadatas"], limit=page_size, offset=offset)
+            if not page["ids"]:
+                break
+            for report_id, metadata in zip(page["ids"], page["metadatas"]):
+                manifest[report_id] = (metadata or {}).get("contentHash")
+            offset += len(page["ids"])
+
+        if manifest:
+            print(f"Rebuilt ingest manifest from {len(manifest)} reports in the collection")
+        return manifest
+
+    def _save_manifest(self, manifest: Dict[str, Optional[str]]):
+        """Atomically write the ingest manifest."""
+        os.makedirs(self.persist_directory, exist_ok=True)
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"reports": manifest}, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    @staticmethod
+    def _build_record(item: Dict[str, Any], position: int) -> Tuple[str, str, Dict[str, Any]]:
         """
-        Read data.json and populate ChromaDB collection.
-        
+        Convert one report into (id, document, metadata) for ChromaDB.
+
         Args:
-            json_file_path: Path to the JSON file containing security reports
+            item: Report dictionary from the source file
+            position: Position of the report in the file (used for missing IDs)
         """
-        # Read the JSON file
-        with open(json_file_path, 'r') as f:
-            data = json.load(f)
-        
-        if not isinstance(data, list):
+        if not isinstance(item, dict):
             raise ValueError("Expected JSON file to contain a list of reports")
-        
-        # Prepare parallel lists for ChromaDB
-        ids = []
-        documents = []
-        metadatas = []
-        
-        for item in data:
-            # Extract required fields
-            report_id = str(item.get('id', f"report_{len(ids)}"))
-            document_text = item.get('text', '')
-
-            # Build metadata dictionary (exclude 'id' and 'text' from metadata)
-            metadata = {k: v for k, v in item.items() if k not in ['id', 'text']}
-
-            # Convert date string to Unix timestamp for numeric comparison
-            if 'date' in metadata and isinstance(metadata['date'], str):
-                try:
-                    # Parse ISO format date string and convert to Unix timestamp
-                    dt = datetime.fromisoformat(metadata['date'].replace('Z', '+00:00'))
-                    metadata['timestamp'] = int(dt.timestamp())
-                    # Keep original date string for display purposes
-                    metadata['date_str'] = metadata['date']
-                except (ValueError, AttributeError):
-                    # If date parsing fails, keep the original value
-                    pass
 
+        # Extract required fields
+        report_id = str(item.get('id', f"report_{position}"))
+        document_text = item.get('text', '')
+
+        # Build metadata dictionary (exclude 'id' and 'text' from metadata)
+        metadata = {k: v for k, v in item.items() if k not in ['id', 'text']}
+
+        # Hash of the source report, used by sync_data to detect edits
+        metadata['contentHash'] = hashlib.sha256(
+            json.dumps(item, sort_keys=True, default=str).encode('utf-8')
+        ).hexdigest()
+
+        # Convert date string to Unix timestamp for numeric comparison
+        if 'date' in metadata and isinstance(metadata['date'], str):
+            try:
+                # Parse ISO format date string and convert to Unix timestamp
+                dt = datetime.fromisoformat(metadata['date'].replace('Z', '+00:00'))
+                metadata['timestamp'] = int(dt.timestamp())
+                # Keep original date string for display purposes
+                metadata['date_str'] = metadata['date']
+            except (ValueError, AttributeError):
+                # If date parsing fails, keep the original value
+                pass
+
+        return report_id, document_text, metadata
+
+    def _iter_records(self, json_file_path: str, skip: int = 0) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        """Yield (id, document, metadata) for each report, skipping the first `skip` reports."""
+        for position, item in enumerate(iter_report_file(json_file_path)):
+            if position < skip:
+                continue
+            yield self._build_record(item, position)
+
+    @staticmethod
+    def _batched(
+        records: Iterable[Tuple[str, str, Dict[str, Any]]],
+        batch_size: int
+    ) -> Iterator[Tuple[List[str], List[str], List[Dict[str, Any]]]]:
+        """Group records into (ids, documents, metadatas) batches."""
+        ids, documents, metadatas = [], [], []
+
+        for report_id, document_text, metadata in records:
             ids.append(report_id)
             documents.append(document_text)
             metadatas.append(metadata)
-        
-        # Ingest into ChromaDB
+
+            if len(ids) >= batch_size:
+                yield ids, documents, metadatas
+                ids, documents, metadatas = [], [], []
+
         if ids:
-            self.collection.add(
+            yield ids, documents, metadatas
+
+    def _upsert_batches(
+        self,
+        batches: Iterable[Tuple[List[str], List[str], List[Dict[str, Any]]]],
+        workers: int,
+        on_written: Optional[Callable] = None
+    ) -> int:
+        """
+        Embed batches in parallel and upsert them in order.
+
+        Embedding of upcoming batches overlaps with writing earlier ones; at most
+        `workers` batches are held in memory ahead of the writer.
+
+        Args:
+            batches: (ids, documents, metadatas) batches
+            workers: Threads computing embeddings
+            on_written: Called with (batch, total_written) after each upsert
+
+        Returns:
+            Number of reports written
+        """
+        written = 0
+
+        def write(batch, embeddings_future):
+            nonlocal written
+            ids, documents, metadatas = batch
+            self.collection.upsert(
                 ids=ids,
                 documents=documents,
-                metadatas=metadatas
+                metadatas=metadatas,
+                embeddings=embeddings_future.result()
             )
-            print(f"Successfully ingested {len(ids)} reports into ChromaDB")
-        else:
-            print("No reports to ingest")
-    
+            self._index_upsert(ids, documents, metadatas)
+            # The batch is visible to queries now: invalidate cached results per batch,
+            # not only once the whole ingest has finished
+            self._record_write(log=False)
+            written += len(ids)
+            if on_written:
+                on_written(batch, written)
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chroma-ingest") as pool:
+            pending = []
+
+            for batch in batches:
+                pending.append((batch, pool.submit(self.embedding_function, batch[1])))
+                if len(pending) > workers:
+                    write(*pending.pop(0))
+
+            for batch, embeddings_future in pending:
+                write(batch, embeddings_future)
+
+        return written
+
+    def _report_progress(self, checkpoint_path: str, source: Dict[str, Any], processed: int, written: int, started: float):
+        """Persist the checkpoint and log throughput after a batch is written."""
+        self._write_checkpoint(checkpoint_path, source, processed)
+
+        elapsed = time.perf_counter() - started
+        rate = written / elapsed if elapsed > 0 else 0.0
+        print(f"Ingested {processed} reports ({rate:.0f} reports/sec)")
+
+    @staticmethod
+    def _source_fingerprint(json_file_path: str) -> Dict[str, Any]:
+        """Identify the source file so a checkpoint is only reused for the same file contents."""
+        stat = os.stat(json_file_path)
+        return {
+            "path": os.path.abspath(json_file_path),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime
+        }
+
+    @staticmethod
+    def _read_checkpoint(checkpoint_path: str, source: Dict[str, Any]) -> int:
+        """Return the number of reports already ingested from this source (0 if none)."""
+        if not os.path.exists(checkpoint_path):
+            return 0
+
+        try:
+            with open(checkpoint_path, 'r') as f:
+                checkpoint = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return 0
+
+        if checkpoint.get("source") != source:
+            print(f"Ignoring checkpoint {checkpoint_path}: it belongs to a different or modified file")
+            return 0
+
+        return int(checkpoint.get("processed", 0))
+
+    @staticmethod
+    def _write_checkpoint(checkpoint_path: str, source: Dict[str, Any], processed: int):
+        """Atomically record ingest progress."""
+        os.makedirs(os.path.dirname(os.path.abspath(checkpoint_path)), exist_ok=True)
+        tmp_path = f"{checkpoint_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"source": source, "processed": processed}, f)
+        os.replace(tmp_path, checkpoint_path)
+
+    def write_snapshot_manifest(self, source_path: str) -> Dict[str, Any]:
+        """
+        Describe this persist directory as a versioned snapshot artifact.
+
+        The manifest records what the index was built with, so a server loading
+        it can verify the embedding model and metadata schema match its own.
+
+        Args:
+            source_path: Reports file the index was built from
+
+        Returns:
+            The snapshot manifest that was written
+        """
+        digest = hashlib.sha256()
+        with open(source_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+
+        created_at = datetime.now(timezone.utc)
+        manifest = {
+            "snapshotVersion": f"{created_at.strftime('%Y%m%d%H%M%S')}-{digest.hexdigest()[:12]}",
+            "schemaVersion": INDEX_SCHEMA_VERSION,
+            "embeddingModel": EMBEDDING_MODEL_NAME,
+            "collection": self.collection_name,
+            "count": self.collection.count(),
+            "source": {"path": os.path.basename(source_path), "sha256": digest.hexdigest()},
+            "createdAt": created_at.isoformat()
+        }
+
+        with open(os.path.join(self.persist_directory, SNAPSHOT_MANIFEST), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        return manifest
+
+    @classmethod
+    def open_snapshot(cls, snapshot_dir: str, strict: bool = True) -> "SecurityReportDatabase":
+        """
+        Open a prebuilt snapshot read-only, with no ingestion or embedding work.
+
+        The snapshot's embedding model and schema version are checked against this
+        build. On mismatch the load is refused (strict) or a warning is printed.
+        ChromaDB's SQLite store needs write access to its directory even for reads,
+        so a snapshot on a read-only mount is copied to a temporary directory first.
+
+        Args:
+            snapshot_dir: Directory produced by `python -m src.collections.buildIndex`
+            strict: Raise instead of warning on a model/schema mismatch
+
+        Returns:
+            Read-only SecurityReportDatabase over the snapshot
+        """
+        manifest_path = os.path.join(snapshot_dir, SNAPSHOT_MANIFEST)
+        if not os.path.exists(manifest_path):
+            raise ValueError(f"{snapshot_dir} is not an index snapshot (missing {SNAPSHOT_MANIFEST})")
+
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+
+        problems = []
+        if manifest.get("embeddingModel") != EMBEDDING_MODEL_NAME:
+            problems.append(f"embedding model {manifest.get('embeddingModel')!r} != {EMBEDDING_MODEL_NAME!r}")
+        if manifest.get("schemaVersion") != INDEX_SCHEMA_VERSION:
+            problems.append(f"schema version {manifest.get('schemaVersion')!r} != {INDEX_SCHEMA_VERSION}")
+
+        if problems:
+            message = f"Snapshot {manifest.get('snapshotVersion')} is incompatible: {'; '.join(problems)}"
+            if strict:
+                raise ValueError(message)
+            print(f"WARNING: {message}")
+
+        persist_directory = snapshot_dir
+        if not os.access(snapshot_dir, os.W_OK):
+            persist_directory = tempfile.mkdtemp(prefix="chroma-snapshot-")
+            shutil.copytree(snapshot_dir, persist_directory, dirs_exist_ok=True)
+            print(f"Snapshot directory is read-only, opened a copy at {persist_directory}")
+
+        db = cls(persist_directory=persist_directory, read_only=True)
+        db.snapshot_manifest = manifest
+        print(f"Loaded snapshot {manifest.get('snapshotVersion')} ({manifest.get('count')} reports)")
+        return db
+
+    def _ensure_writable(self):
+        """Refuse writes to a snapshot loaded read-only."""
+        if self.read_only:
+            raise RuntimeError("This reports database was opened read-only from a snapshot")
+
+    def _record_write(self, log: bool = True):
+        """
+        Called after every write to the collection (each committed batch of a long ingest).
+        Any new ingest path must call this so cached query results are invalidated.
+
+        Args:
+            log: Print the new generation (off for per-batch calls; ingests log progress themselves)
+        """
+        generation = bump_ingest_generation()
+        if log:
+            print(f"Collection updated (ingest generation {generation})")
+
+    def build_metadata_index(self) -> MetadataIndex:
+        """Load the collection's metadata into the columnar index (kept in sync by later writes)."""
+        self.metadata_index.build(self.collection)
+        return self.metadata_index
+
+    def build_keyword_index(self) -> KeywordIndex:
+        """Load the collection's report text into the BM25 index (kept in sync by later writes)."""
+        self.keyword_index.build(self.collection)
+        return self.keyword_index
+
+    def _index_upsert(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]]):
+        """Mirror an upsert into the in-memory indexes that have been built."""
+        if self.metadata_index.ready:
+            self.metadata_index.upsert(ids, metadatas)
+        if self.keyword_index.ready:
+            self.keyword_index.upsert(ids, documents)
+
+    def _index_delete(self, ids: List[str]):
+        """Mirror a delete into the in-memory indexes that have been built."""
+        if self.metadata_index.ready:
+            self.metadata_index.delete(ids)
+        if self.keyword_index.ready:
+            self.keyword_index.delete(ids)
+
     def get_collection(self):
         """Return the collection object for querying."""
         return self.collection
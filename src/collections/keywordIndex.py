@@ -0,0 +1,225 @@
+"""
+In-memory BM25 inverted index over report text.
+
+Exact-term lookups ("Camry", "north gate") rank poorly on vector distance
+alone. This index scores reports lexically; ReportsTool fuses its ranking
+with the vector ranking (reciprocal rank fusion) in hybrid search mode.
+
+SecurityReportDatabase keeps the index in sync with every upsert and delete.
+"""
+
+import math
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "to", "in", "on", "at", "for", "by", "with",
+    "from", "is", "was", "were", "are", "be", "been", "it", "its", "this", "that",
+    "no", "not", "as", "into", "near", "any", "all", "reports", "report",
+}
+
+# BM25 parameters (the usual defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords, with plural 's' stripped ("gates" -> "gate")."""
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class KeywordIndex:
+    """
+    BM25 inverted index: term -> {row: term frequency}.
+
+    Rows are assigned on first insert; deleted rows are left empty (their
+    postings are removed), so ids never move. Scoring runs on NumPy copies of
+    the postings, cached per term until the term's postings change.
+    """
+
+    def __init__(self, initial_capacity: int = 1024):
+        self._lock = threading.RLock()
+        self._ids: List[Optional[str]] = []
+        self._row_of: Dict[str, int] = {}
+        self._lengths = np.zeros(max(initial_capacity, 1), dtype=np.int32)
+        self._terms: List[Tuple[str, ...]] = []   # distinct terms per row, for removal
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}   # term -> (rows, frequencies)
+        self._total_length = 0
+
+        # Set once the index mirrors the whole collection
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def build(self, collection, page_size: int = 10000):
+        """
+        Index all documents of a ChromaDB collection.
+
+        Args:
+            collection: ChromaDB collection
+            page_size: Reports fetched per get() call
+        """
+        started = time.perf_counter()
+        with self._lock:
+            offset = 0
+            while True:
+                page = collection.get(include=["documents"], limit=page_size, offset=offset)
+                if not page['ids']:
+                    break
+                self.upsert(page['ids'], page['documents'])
+                offset += len(page['ids'])
+            self.ready = True
+
+        print(f"[KeywordIndex] Indexed {len(self)} reports ({len(self._postings)} terms) in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+    def upsert(self, ids: List[str], documents: List[str]):
+        """Index or re-index report texts."""
+        with self._lock:
+            for report_id, document in zip(ids, documents):
+                row = self._row_of.get(report_id)
+                if row is None:
+                    row = len(self._ids)
+                    if row == len(self._lengths):
+                        self._lengths = np.concatenate([self._lengths, np.zeros(len(self._lengths), dtype=np.int32)])
+                    self._ids.append(report_id)
+                    self._terms.append(())
+                    self._row_of[report_id] = row
+                else:
+                    self._remove_row(row)
+
+                counts = Counter(tokenize(document or ""))
+                for term, frequency in counts.items():
+                    self._postings.setdefault(term, {})[row] = frequency
+                    self._arrays.pop(term, None)
+
+                length = sum(counts.values())
+                self._lengths[row] = length
+                self._terms[row] = tuple(counts)
+                self._total_length += length
+
+    def delete(self, ids: Iterable[str]):
+        """Remove reports from the index."""
+        with self._lock:
+            for report_id in ids:
+                row = self._row_of.pop(report_id, None)
+                if row is not None:
+                    self._remove_row(row)
+                    self._ids[row] = None
+
+    def search(
+        self,
+        query: str,
+        limit: int,
+        allowed_ids: Optional[Set[str]] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Rank reports by BM25 score for a query.
+
+        Args:
+            query: Search text
+            limit: Maximum hits to return
+            allowed_ids: Only consider these reports (e.g. the result of a metadata filter)
+
+        Returns:
+            (report id, score) pairs, best first; reports sharing no term are not returned
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        with self._lock:
+            documents = len(self._row_of)
+            if not documents:
+                return []
+            average_length = self._total_length / documents
+
+            allowed_rows = None
+            if allowed_ids is not None:
+                allowed_rows = np.fromiter(
+                    (self._row_of[report_id] for report_id in allowed_ids if report_id in self._row_of),
+                    dtype=np.int64
+                )
+
+            rows_parts, score_parts = [], []
+            for term in terms:
+                arrays = self._term_arrays(term)
+                if arrays is None:
+                    continue
+                rows, frequencies = arrays
+                if allowed_rows is not None:
+                    keep = np.isin(rows, allowed_rows)
+                    rows, frequencies = rows[keep], frequencies[keep]
+
+                df = len(self._postings[term])
+                idf = math.log(1 + (documents - df + 0.5) / (df + 0.5))
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[rows] / average_length)
+                rows_parts.append(rows)
+                score_parts.append(idf * frequencies * (BM25_K1 + 1) / (frequencies + norm))
+
+            if not rows_parts:
+                return []
+
+            # Sum per-term scores per row
+            rows, inverse = np.unique(np.concatenate(rows_parts), return_inverse=True)
+            scores = np.bincount(inverse, weights=np.concatenate(score_parts))
+
+            if len(scores) > limit:
+                top = np.argpartition(-scores, limit - 1)[:limit]
+            else:
+                top = np.arange(len(scores))
+            top = top[np.lexsort((rows[top], -scores[top]))]
+            return [(self._ids[rows[i]], float(scores[i])) for i in top]
+
+    def _term_arrays(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """(rows, frequencies) arrays of a term's postings, built on first use."""
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            postings = self._postings.get(term)
+            if not postings:
+                return None
+            arrays = self._arrays[term] = (
+                np.fromiter(postings.keys(), dtype=np.int64, count=len(postings)),
+                np.fromiter(postings.values(), dtype=np.float64, count=len(postings))
+            )
+        return arrays
+
+    def stats(self) -> Dict:
+        """Size of the index."""
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "reports": len(self._row_of),
+                "terms": len(self._postings),
+                "postings": sum(len(postings) for postings in self._postings.values()),
+                "cached_terms": len(self._arrays)
+            }
+
+    def _remove_row(self, row: int):
+        """Drop a row's postings and length."""
+        for term in self._terms[row]:
+            self._arrays.pop(term, None)
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(row, None)
+                if not postings:
+                    del self._postings[term]
+
+        self._total_length -= self._lengths[row]
+        self._lengths[row] = 0
+        self._terms[row] = ()
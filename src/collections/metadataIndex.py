@@ -0,0 +1,347 @@
+"""
+In-memory columnar index over report metadata.
+
+Holds one NumPy column per indexed field:
+- timestamp: float64 (NaN where missing)
+- siteId / guardId: dictionary-encoded int32 codes (-1 where missing)
+
+ChromaDB `where` filters over these fields are evaluated as vectorized masks,
+so pure-filter queries resolve without ChromaDB's SQLite metadata scan and
+only the final ids are fetched from the collection. Filters on any other field
+raise UnsupportedFilter and the caller falls back to ChromaDB.
+
+SecurityReportDatabase keeps the index in sync with every upsert and delete.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+STRING_FIELDS = ("siteId", "guardId")
+NUMERIC_FIELDS = ("timestamp",)
+
+# Compact the arrays once this share of rows is deleted
+COMPACT_RATIO = 0.5
+
+
+class UnsupportedFilter(ValueError):
+    """The filter uses a field or operator the index cannot evaluate."""
+
+
+class MetadataIndex:
+    """
+    Columnar metadata index with a vectorized `where` evaluator.
+
+    Supports $eq, $ne, $gt, $gte, $lt, $lte, $in, $nin, $and and $or (range
+    operators only on numeric fields). Reports missing a field never match a
+    condition on that field. Matching ids are returned in insertion order.
+    """
+
+    def __init__(self, initial_capacity: int = 1024):
+        """
+        Initialize an empty index (call build() or upsert() to fill it).
+
+        Args:
+            initial_capacity: Rows allocated up front (arrays grow by doubling)
+        """
+        self._lock = threading.RLock()
+        self._capacity = max(initial_capacity, 1)
+        self._size = 0          # rows in use, including deleted ones
+        self._deleted = 0
+
+        self._ids: List[Optional[str]] = []
+        self._row_of: Dict[str, int] = {}
+        self._alive = np.zeros(self._capacity, dtype=bool)
+
+        self._numeric = {name: np.full(self._capacity, np.nan) for name in NUMERIC_FIELDS}
+        self._codes = {name: np.full(self._capacity, -1, dtype=np.int32) for name in STRING_FIELDS}
+        self._dictionary: Dict[str, Dict[str, int]] = {name: {} for name in STRING_FIELDS}
+        self._values: Dict[str, List[str]] = {name: [] for name in STRING_FIELDS}
+
+        # Set once the index mirrors the whole collection
+        self.ready = False
+
+    def __len__(self) -> int:
+        return self._size - self._deleted
+
+    def build(self, collection, page_size: int = 10000):
+        """
+        Load all metadata from a ChromaDB collection.
+
+        Args:
+            collection: ChromaDB collection
+            page_size: Reports fetched per get() call
+        """
+        started = time.perf_counter()
+        with self._lock:
+            offset = 0
+            while True:
+                page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+                if not page['ids']:
+                    break
+                self.upsert(page['ids'], page['metadatas'])
+                offset += len(page['ids'])
+            self.ready = True
+
+        print(f"[MetadataIndex] Indexed {len(self)} reports in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+    def upsert(self, ids: List[str], metadatas: List[Dict[str, Any]]):
+        """Insert or overwrite the metadata of reports (existing reports keep their position)."""
+        with self._lock:
+            new_ids = [report_id for report_id in ids if report_id not in self._row_of]
+            self._ensure_capacity(self._size + len(new_ids))
+
+            for report_id, metadata in zip(ids, metadatas):
+                row = self._row_of.get(report_id)
+                if row is None:
+                    row = self._size
+                    self._size += 1
+                    self._ids.append(report_id)
+                    self._row_of[report_id] = row
+                    self._alive[row] = True
+
+                metadata = metadata or {}
+                for name in NUMERIC_FIELDS:
+                    value = metadata.get(name)
+                    self._numeric[name][row] = value if isinstance(value, (int, float)) and not isinstance(value, bool) else np.nan
+                for name in STRING_FIELDS:
+                    value = metadata.get(name)
+                    self._codes[name][row] = self._encode(name, value) if isinstance(value, str) else -1
+
+    def delete(self, ids: Iterable[str]):
+        """Remove reports from the index."""
+        with self._lock:
+            for report_id in ids:
+                row = self._row_of.pop(report_id, None)
+                if row is None:
+                    continue
+                self._alive[row] = False
+                self._ids[row] = None
+                self._deleted += 1
+
+            if self._deleted > 1024 and self._deleted > self._size * COMPACT_RATIO:
+                self._compact()
+
+    def select(self, where: Optional[Dict[str, Any]], limit: Optional[int] = None) -> List[str]:
+        """
+        Ids of reports matching a ChromaDB where filter, in insertion order.
+
+        Args:
+            where: ChromaDB where filter (None matches every report)
+            limit: Maximum ids to return
+
+        Raises:
+            UnsupportedFilter: the filter cannot be evaluated on the index
+        """
+        with self._lock:
+            rows = np.flatnonzero(self._mask(where))
+            if limit is not None:
+                rows = rows[:limit]
+            return [self._ids[row] for row in rows]
+
+    def select_page(
+        self,
+        where: Optional[Dict[str, Any]],
+        offset: int,
+        limit: int,
+        newest_first: bool = False
+    ) -> Tuple[List[str], int]:
+        """
+        One page of matching ids in timestamp order (oldest first unless newest_first,
+        reports without a timestamp last, ties in insertion order).
+
+        Args:
+            where: ChromaDB where filter (None matches every report)
+            offset: Matches skipped before the page
+            limit: Page size
+            newest_first: Sort by descending timestamp
+
+        Returns:
+            (ids of the page, total number of matches)
+
+        Raises:
+            UnsupportedFilter: the filter cannot be evaluated on the index
+        """
+        with self._lock:
+            rows = np.flatnonzero(self._mask(where))
+            timestamps = self._numeric["timestamp"][rows]
+            # Negated, missing timestamps stay NaN and still sort last
+            order = np.argsort(-timestamps if newest_first else timestamps, kind="stable")
+            page = rows[order[offset:offset + limit]]
+            return [self._ids[row] for row in page], len(rows)
+
+    def count(self, where: Optional[Dict[str, Any]]) -> int:
+        """Number of reports matching a where filter."""
+        with self._lock:
+            return int(np.count_nonzero(self._mask(where)))
+
+    def metadatas(self, where: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Indexed metadata fields of the reports matching a where filter."""
+        with self._lock:
+            rows = np.flatnonzero(self._mask(where))
+            columns = {name: self._numeric[name][rows] for name in NUMERIC_FIELDS}
+            codes = {name: self._codes[name][rows] for name in STRING_FIELDS}
+
+            metadatas = []
+            for i in range(len(rows)):
+                metadata = {}
+                for name, column in columns.items():
+                    if not np.isnan(column[i]):
+                        metadata[name] = int(column[i]) if column[i].is_integer() else float(column[i])
+                for name, column in codes.items():
+                    if column[i] >= 0:
+                        metadata[name] = self._values[name][column[i]]
+                metadatas.append(metadata)
+            return metadatas
+
+    def stats(self) -> Dict[str, Any]:
+        """Size and memory footprint of the index."""
+        with self._lock:
+            nbytes = self._alive.nbytes + sum(column.nbytes for column in self._numeric.values())
+            nbytes += sum(column.nbytes for column in self._codes.values())
+            return {
+                "ready": self.ready,
+                "reports": len(self),
+                "capacity": self._capacity,
+                "array_bytes": nbytes,
+                "distinct": {name: len(values) for name, values in self._values.items()}
+            }
+
+    # ----- filter evaluation -----
+
+    def _mask(self, where: Optional[Dict[str, Any]]) -> np.ndarray:
+        """Boolean mask over the used rows for a where filter."""
+        alive = self._alive[:self._size]
+        if not where:
+            return alive.copy()
+        return self._eval(where) & alive
+
+    def _eval(self, where: Dict[str, Any]) -> np.ndarray:
+        if not isinstance(where, dict) or not where:
+            raise UnsupportedFilter(f"Invalid where clause: {where!r}")
+
+        masks = []
+        for key, value in where.items():
+            if key in ("$and", "$or"):
+                if not isinstance(value, list) or not value:
+                    raise UnsupportedFilter(f"{key} expects a non-empty list")
+                sub_masks = [self._eval(clause) for clause in value]
+                combine = np.logical_and if key == "$and" else np.logical_or
+                masks.append(combine.reduce(sub_masks))
+            elif key.startswith("$"):
+                raise UnsupportedFilter(f"Unsupported operator {key}")
+            elif isinstance(value, dict):
+                if not value:
+                    raise UnsupportedFilter(f"Empty condition for {key}")
+                masks.extend(self._compare(key, op, operand) for op, operand in value.items())
+            else:
+                masks.append(self._compare(key, "$eq", value))
+
+        return np.logical_and.reduce(masks) if len(masks) > 1 else masks[0]
+
+    def _compare(self, field: str, op: str, operand: Any) -> np.ndarray:
+        if field in NUMERIC_FIELDS:
+            return self._compare_numeric(field, op, operand)
+        if field in STRING_FIELDS:
+            return self._compare_string(field, op, operand)
+        raise UnsupportedFilter(f"Field {field!r} is not indexed")
+
+    def _compare_numeric(self, field: str, op: str, operand: Any) -> np.ndarray:
+        column = self._numeric[field][:self._size]
+        present = ~np.isnan(column)
+
+        if op in ("$in", "$nin"):
+            values = self._operand_list(operand, (int, float))
+            matches = np.isin(column, values)
+            return matches if op == "$in" else present & ~matches
+
+        if not isinstance(operand, (int, float)) or isinstance(operand, bool):
+            raise UnsupportedFilter(f"{field} {op} expects a number, got {operand!r}")
+
+        if op == "$eq":
+            return column == operand
+        if op == "$ne":
+            return present & (column != operand)
+        if op == "$gt":
+            return column > operand
+        if op == "$gte":
+            return column >= operand
+        if op == "$lt":
+            return column < operand
+        if op == "$lte":
+            return column <= operand
+        raise UnsupportedFilter(f"Unsupported operator {op}")
+
+    def _compare_string(self, field: str, op: str, operand: Any) -> np.ndarray:
+        codes = self._codes[field][:self._size]
+        dictionary = self._dictionary[field]
+        present = codes >= 0
+
+        if op in ("$in", "$nin"):
+            values = self._operand_list(operand, (str,))
+            matches = np.isin(codes, [dictionary[value] for value in values if value in dictionary])
+            return matches if op == "$in" else present & ~matches
+
+        if not isinstance(operand, str):
+            raise UnsupportedFilter(f"{field} {op} expects a string, got {operand!r}")
+
+        code = dictionary.get(operand, -2)
+        if op == "$eq":
+            return codes == code
+        if op == "$ne":
+            return present & (codes != code)
+        raise UnsupportedFilter(f"Operator {op} is not supported on {field}")
+
+    @staticmethod
+    def _operand_list(operand: Any, types: tuple) -> list:
+        if not isinstance(operand, list) or not all(
+            isinstance(value, types) and not isinstance(value, bool) for value in operand
+        ):
+            raise UnsupportedFilter(f"Expected a list of {types[0].__name__} values, got {operand!r}")
+        return operand
+
+    # ----- storage -----
+
+    def _encode(self, field: str, value: str) -> int:
+        code = self._dictionary[field].get(value)
+        if code is None:
+            code = len(self._values[field])
+            self._dictionary[field][value] = code
+            self._values[field].append(value)
+        return code
+
+    def _ensure_capacity(self, needed: int):
+        if needed <= self._capacity:
+            return
+
+        capacity = self._capacity
+        while capacity < needed:
+            capacity *= 2
+
+        self._alive = self._grow(self._alive, capacity, False)
+        self._numeric = {name: self._grow(column, capacity, np.nan) for name, column in self._numeric.items()}
+        self._codes = {name: self._grow(column, capacity, -1) for name, column in self._codes.items()}
+        self._capacity = capacity
+
+    @staticmethod
+    def _grow(column: np.ndarray, capacity: int, fill) -> np.ndarray:
+        grown = np.full(capacity, fill, dtype=column.dtype)
+        grown[:len(column)] = column
+        return grown
+
+    def _compact(self):
+        """Drop deleted rows, keeping insertion order."""
+        keep = np.flatnonzero(self._alive[:self._size])
+        capacity = max(len(keep) * 2, 1024)
+
+        self._alive = self._grow(np.ones(len(keep), dtype=bool), capacity, False)
+        self._numeric = {name: self._grow(column[keep], capacity, np.nan) for name, column in self._numeric.items()}
+        self._codes = {name: self._grow(column[keep], capacity, -1) for name, column in self._codes.items()}
+        self._ids = [self._ids[row] for row in keep]
+        self._row_of = {report_id: row for row, report_id in enumerate(self._ids)}
+
+        self._capacity = capacity
+        self._size = len(keep)
+        self._deleted = 0
@@ -1,4 +1,5 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING
 from typing import Optional
 from src.utils.constants import MONGODB_URI, MONGODB_DB_NAME
 
@@ -15,13 +16,29 @@ class MongoDBManager:
             cls._instance = super().__new__(cls)
         return cls._instance
 
-    async def connect(self):
-        """Initialize MongoDB connection."""
+    async def connect(self, client=None):
+        """
+        Initialize MongoDB connection.
+
+        Args:
+            client: Motor-compatible client to use instead of connecting to MONGODB_URI
+                (e.g. the in-memory store of the offline benchmarks)
+        """
         if self._client is None:
-            self._client = AsyncIOMotorClient(MONGODB_URI)
+            self._client = client if client is not None else AsyncIOMotorClient(MONGODB_URI)
             # Verify connection
             await self._client.admin.command('ping')
             print(f"[MongoDB] Connected to database: {MONGODB_DB_NAME}")
+            await self.ensure_indexes()
+
+    async def ensure_indexes(self):
+        """Create the indexes conversation reads and writes rely on (no-op if present)."""
+        await self.conversations.create_index(
+            [("conversationId", ASCENDING)], unique=True
+        )
+        await self.conversation_buckets.create_index(
+            [("conversationId", ASCENDING), ("bucket", ASCENDING)], unique=True
+        )
 
     async def close(self):
         """Close MongoDB connection."""
@@ -42,6 +59,11 @@ class MongoDBManager:
         """Get the conversations collection."""
         return self.database.conversations
 
+    @property
+    def conversation_buckets(self):
+        """Get the collection holding conversation messages in fixed-size buckets."""
+        return self.database.conversation_buckets
+
 
 # Global instance
 mongodb = MongoDBManager()
@@ -34,3 +34,12 @@ class ChromaQueryParams(BaseModel):
             "safe number (e.g., 1000)."
         )
     )
+
+    newest_first: bool = Field(
+        False,
+        description=(
+            "Order filter results newest first. Set to true when the user asks for the "
+            "'last', 'latest' or 'most recent' reports; results are oldest first otherwise. "
+            "Semantic searches are always ordered by relevance."
+        )
+    )
@@ -0,0 +1,66 @@
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field, model_validator
+
+from src.utils.constants import DEFAULT_N_RESULTS, MAX_N_RESULTS
+
+
+class ReportSearchRequest(BaseModel):
+    """
+    Structured report search for machine clients (/reports/search).
+    Same fields as ChromaQueryParams, with the where filter as a JSON object.
+    """
+    query_texts: Optional[str] = Field(
+        None,
+        description="Text for semantic similarity search (e.g. 'white sedan near north gate'). Omit for a pure filter."
+    )
+
+    where_filter: Optional[Dict[str, Any]] = Field(
+        None,
+        description=(
+            "ChromaDB 'where' filter on report metadata (siteId, guardId, timestamp). "
+            "Example: {\"$and\": [{\"siteId\": \"S04\"}, {\"timestamp\": {\"$gte\": 1760486400}}]}"
+        )
+    )
+
+    n_results: int = Field(
+        DEFAULT_N_RESULTS,
+        ge=1,
+        le=MAX_N_RESULTS,
+        description="Maximum number of reports across all pages."
+    )
+
+    newest_first: bool = Field(
+        False,
+        description="Page filter results newest first instead of oldest first (semantic searches are ordered by relevance)."
+    )
+
+    cursor: Optional[str] = Field(
+        None,
+        description="next_cursor of a previous response; the other fields are ignored when set."
+    )
+
+    @model_validator(mode="after")
+    def require_criteria(self):
+        if not (self.query_texts or self.where_filter or self.cursor):
+            raise ValueError("Provide query_texts, where_filter or cursor")
+        return self
+
+
+class ReportHit(BaseModel):
+    """One retrieved report."""
+    id: str
+    text: str
+    metadata: Dict[str, Any]
+    distance: Optional[float] = None        # Semantic searches only
+    keyword_score: Optional[float] = None   # Hybrid search keyword matches only
+
+
+class ReportSearchResponse(BaseModel):
+    """One page of report search results."""
+    count: int
+    offset: int
+    total: Optional[int] = None             # Reports across all pages, when known
+    ordering: str                           # "time" / "time_desc" (filter queries) or "relevance"
+    next_cursor: Optional[str] = None
+    results: List[ReportHit]
+    took_ms: float
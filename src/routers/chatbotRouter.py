@@ -1,13 +1,27 @@
+import asyncio
+import json
+import time
 from fastapi import APIRouter
-from pydantic import BaseModel
-from typing import Optional
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any, List
+from pydantic_ai.messages import FunctionToolCallEvent, FunctionToolResultEvent
 
-from src.agents.guardAgent import agent as guardAgent
-from src.services.conversationService import ConversationService
+from src.agents.guardAgent import agent as guardAgent, speculative_parse
+from src.utils.constants import HISTORY_TOKEN_BUDGET, CHAT_BATCH_CONCURRENCY, CHAT_BATCH_MAX_ITEMS
+from src.services.conversationService import ConversationService, ConversationHistory
+from src.services.conversationWriter import conversation_writer
+from src.utils.metrics import timed_stage, record_agent_run, agent_run_tokens
 
 # Create an APIRouter instance
 router = APIRouter()
 
+# Keep references to detached streaming runs so they are not garbage collected
+_streaming_runs = set()
+
+# Bounds concurrent Guard Agent runs across all /chat/batch requests
+_batch_slots = asyncio.Semaphore(CHAT_BATCH_CONCURRENCY)
+
 @router.get("/")
 async def read_all_items():
     return "hello world"
@@ -27,63 +41,294 @@ class ChatRequest(BaseModel):
 async def create_message(request: ChatRequest):
     """
     Invokes the Guard Agent with the user's query and conversation history.
-    Stores the conversation in MongoDB after agent responds.
+    Queues the message pair for MongoDB after agent responds (written in the background).
     """
 
-    # Step 1: Retrieve conversation history (if conversationId provided)
-    message_history = []
-    if request.conversationId:
-        message_history = await ConversationService.get_conversation_history(
-            request.conversationId
-        )
+    # Step 1: Retrieve conversation history (if conversationId provided), fitted to the token budget
+    history = await _load_history(request)
 
     # Step 2: Run agent with message history
-    # Pydantic AI accepts message_history parameter
-    if message_history:
-        response = await guardAgent.run(
-            request.query,
-            message_history=message_history
+    response, agent_output = await _run_agent(request.query, history)
+
+    # Step 3: Queue conversation for MongoDB (write-behind, next read waits for it)
+    usage = _build_usage(response, history)
+    print(f"[ChatbotRouter] Token usage: {usage}")
+    await _queue_exchange(request, agent_output, response, usage)
+
+    # Step 4: Return response
+    return {
+        "query": request.query,
+        "response": response,
+        "conversationId": request.conversationId,
+        "usage": usage
+    }
+
+
+class ChatBatchRequest(BaseModel):
+    items: List[ChatRequest] = Field(..., min_length=1, max_length=CHAT_BATCH_MAX_ITEMS)
+
+@router.post("/chat/batch")
+async def create_messages(request: ChatBatchRequest):
+    """
+    Runs several Guard Agent queries concurrently (at most CHAT_BATCH_CONCURRENCY
+    agent runs at a time across all batches).
+
+    History is fetched once per conversationId and shared by that conversation's
+    items; their message pairs are queued in item order once the batch finishes.
+    A failed item is reported in its result and does not fail the batch.
+    """
+    started = time.perf_counter()
+
+    # Step 1: One history fetch per conversation, all in parallel
+    conversation_ids = list(dict.fromkeys(item.conversationId for item in request.items if item.conversationId))
+    with timed_stage("history"):
+        fetched = await asyncio.gather(
+            *(ConversationService.get_conversation_history(cid) for cid in conversation_ids),
+            return_exceptions=True
         )
-    else:
-        response = await guardAgent.run(request.query)
+    histories = dict(zip(conversation_ids, fetched))
+    history_ms = (time.perf_counter() - started) * 1000
+
+    # Step 2: Run the items under the semaphore
+    runs = await asyncio.gather(*(
+        _run_batch_item(index, item, histories, started)
+        for index, item in enumerate(request.items)
+    ))
 
-    # Step 3: Extract agent response
-    agent_output = response.data if hasattr(response, 'data') else str(response)
+    # Step 3: Queue successful exchanges in item order
+    results = []
+    for item, (result, response) in zip(request.items, runs):
+        if result["success"]:
+            await _queue_exchange(item, result["response"], response, result["usage"])
+        results.append(result)
 
-    # Step 4: Store conversation in MongoDB
-    if request.conversationId:
-        # Extract metadata about tool calls if available
-        metadata = {
-            "model": "gemini-2.0-flash"
+    failed = sum(1 for result in results if not result["success"])
+    print(f"[ChatbotRouter] Batch of {len(results)} finished: {len(results) - failed} succeeded, {failed} failed")
+
+    return {
+        "results": results,
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "timings": {
+            "historyMs": round(history_ms, 1),
+            "totalMs": round((time.perf_counter() - started) * 1000, 1)
+        }
+    }
+
+
+async def _run_batch_item(index: int, item: ChatRequest, histories: Dict[str, Any], started: float):
+    """Run one batch item; returns (result dict, agent response or None)."""
+    result = {"index": index, "query": item.query, "conversationId": item.conversationId, "success": False}
+
+    async with _batch_slots:
+        run_started = time.perf_counter()
+        try:
+            history = histories.get(item.conversationId) if item.conversationId else None
+            if isinstance(history, Exception):
+                raise RuntimeError(f"Could not load conversation history: {str(history)}")
+            history = history or ConversationHistory(token_budget=HISTORY_TOKEN_BUDGET)
+
+            response, agent_output = await _run_agent(item.query, history)
+            result.update(success=True, response=agent_output, usage=_build_usage(response, history))
+        except Exception as e:
+            print(f"[ChatbotRouter] Batch item {index} failed: {str(e)}")
+            response = None
+            result["error"] = str(e)
+
+        finished = time.perf_counter()
+        result["timings"] = {
+            "queueMs": round((run_started - started) * 1000, 1),
+            "runMs": round((finished - run_started) * 1000, 1),
+            "totalMs": round((finished - started) * 1000, 1)
         }
 
-        # Check if agent used tools (tool calls stored in response)
-        if hasattr(response, 'all_messages'):
-            # Extract tool names from messages
-            tool_calls = []
-            for msg in response.all_messages():
-                if hasattr(msg, 'parts'):
-                    for part in msg.parts:
-                        if hasattr(part, 'tool_name'):
-                            tool_calls.append(part.tool_name)
+    return result, response
 
-            if tool_calls:
-                metadata["toolCalls"] = tool_calls
 
-        await ConversationService.save_message_pair(
+async def _run_agent(query: str, history: ConversationHistory):
+    """Run the Guard Agent on a query with its history; returns (response, output text)."""
+    # Pydantic AI accepts message_history parameter
+    with timed_stage("agent"), agent_run_tokens():
+        async with speculative_parse(query):
+            if history.messages:
+                response = await guardAgent.run(query, message_history=history.messages)
+            else:
+                response = await guardAgent.run(query)
+    _record_run_metrics(response)
+
+    # pydantic-ai 1.x exposes the final text as .output (.data on older releases)
+    if hasattr(response, 'output'):
+        agent_output = response.output
+    else:
+        agent_output = response.data if hasattr(response, 'data') else str(response)
+    return response, agent_output
+
+
+async def _queue_exchange(request: ChatRequest, agent_output: str, response, usage: Dict[str, Any]):
+    """Queue the message pair for MongoDB (write-behind) when the request belongs to a conversation."""
+    if not request.conversationId:
+        return
+
+    with timed_stage("save"):
+        await conversation_writer.enqueue(
             conversation_id=request.conversationId,
             user_message=request.query,
             agent_response=agent_output,
-            agent_metadata=metadata
+            agent_metadata=_build_agent_metadata(response, usage)
         )
 
-    # Step 5: Return response
-    return {
-        "query": request.query,
-        "response": response,
-        "conversationId": request.conversationId
+
+async def _load_history(request: ChatRequest) -> ConversationHistory:
+    """Conversation history for the request (empty without a conversationId)."""
+    if not request.conversationId:
+        return ConversationHistory(token_budget=HISTORY_TOKEN_BUDGET)
+    with timed_stage("history"):
+        return await ConversationService.get_conversation_history(request.conversationId)
+
+
+def _record_run_metrics(response):
+    """Tool-call counts of the run, for /metrics (TimedModel records the tokens of every agent)."""
+    if not hasattr(response, 'new_messages'):
+        return
+
+    tool_calls = [
+        part.tool_name
+        for msg in response.new_messages()
+        for part in getattr(msg, 'parts', [])
+        if getattr(part, 'part_kind', None) == 'tool-call'
+    ]
+    record_agent_run(tool_calls)
+
+
+def _build_usage(response, history: ConversationHistory) -> Dict[str, Any]:
+    """History token budget/estimate plus the model's reported token counts for the run."""
+    usage = history.usage()
+
+    if hasattr(response, 'usage'):
+        run_usage = response.usage()
+        usage["inputTokens"] = run_usage.input_tokens
+        usage["outputTokens"] = run_usage.output_tokens
+
+    return usage
+
+
+def _build_agent_metadata(response, usage: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Extract metadata about the agent run (model, tool calls, token usage) for storage."""
+    metadata = {
+        "model": "gemini-2.0-flash"
     }
 
+    if usage:
+        metadata["usage"] = usage
+
+    # Check if agent used tools (tool calls stored in response)
+    if hasattr(response, 'all_messages'):
+        # Extract tool names from messages
+        tool_calls = []
+        for msg in response.all_messages():
+            if hasattr(msg, 'parts'):
+                for part in msg.parts:
+                    if hasattr(part, 'tool_name'):
+                        tool_calls.append(part.tool_name)
+
+        if tool_calls:
+            metadata["toolCalls"] = tool_calls
+
+    return metadata
+
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format a single Server-Sent Events frame."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def _stream_agent_run(request: ChatRequest, queue: asyncio.Queue):
+    """
+    Run the Guard Agent in streaming mode and push SSE frames onto the queue.
+
+    Runs as its own task so a client disconnect does not abort the run:
+    the finished message pair is still persisted for the next turn.
+    """
+    async def forward_tool_events(context, events):
+        async for event in events:
+            if isinstance(event, FunctionToolCallEvent):
+                await queue.put(_sse_event("tool_call", {
+                    "tool": event.part.tool_name,
+                    "args": event.part.args_as_dict()
+                }))
+            elif isinstance(event, FunctionToolResultEvent):
+                await queue.put(_sse_event("tool_result", {
+                    "tool": event.result.tool_name
+                }))
+
+    try:
+        history = await _load_history(request)
+
+        chunks = []
+        with timed_stage("agent"), agent_run_tokens():
+            async with speculative_parse(request.query), guardAgent.run_stream(
+                request.query,
+                message_history=history.messages or None,
+                event_stream_handler=forward_tool_events
+            ) as response:
+                async for delta in response.stream_text(delta=True, debounce_by=None):
+                    chunks.append(delta)
+                    await queue.put(_sse_event("token", {"text": delta}))
+        _record_run_metrics(response)
+
+        agent_output = "".join(chunks)
+        usage = _build_usage(response, history)
+        print(f"[ChatbotRouter] Token usage: {usage}")
+
+        await _queue_exchange(request, agent_output, response, usage)
+
+        await queue.put(_sse_event("done", {
+            "output": agent_output,
+            "conversationId": request.conversationId,
+            "usage": usage
+        }))
+
+    except Exception as e:
+        print(f"[ChatbotRouter] Error in streaming run: {str(e)}")
+        await queue.put(_sse_event("error", {"detail": str(e)}))
+
+    finally:
+        await queue.put(None)
+
+
+@router.post("/chat/stream")
+async def stream_message(request: ChatRequest):
+    """
+    Streams the Guard Agent's response as Server-Sent Events.
+
+    Events:
+    - start: sent immediately, before history is loaded
+    - tool_call / tool_result: tool progress while the agent gathers data
+    - token: markdown response text as it is generated
+    - done: final output once the message pair has been queued for storage
+    - error: the run failed
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def event_stream():
+        yield _sse_event("start", {"query": request.query, "conversationId": request.conversationId})
+
+        task = asyncio.create_task(_stream_agent_run(request, queue))
+        _streaming_runs.add(task)
+        task.add_done_callback(_streaming_runs.discard)
+
+        while True:
+            frame = await queue.get()
+            if frame is None:
+                break
+            yield frame
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 
 @router.delete("/conversation/{conversation_id}")
 async def delete_conversation(conversation_id: str):
@@ -0,0 +1,56 @@
+import json
+import time
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import Response
+
+from src.agents.guardAgent import get_reports_tool
+from src.models.chromadb import ChromaQueryParams
+from src.models.reports import ReportSearchRequest, ReportSearchResponse, ReportHit
+from src.tools.reportsToolClass import NO_RESULTS_MESSAGE, NO_MORE_RESULTS_MESSAGE, INVALID_QUERY_ERROR
+
+# Structured report search for dashboards and supervisor tools (no LLM involved)
+router = APIRouter()
+
+
+@router.post("/reports/search", response_model=ReportSearchResponse)
+async def search_reports(request: ReportSearchRequest):
+    """
+    Searches reports with structured parameters through the ReportsTool query layer
+    (result cache, metadata index, hybrid search), without calling the model.
+    Large results are paged: pass next_cursor back to get the following page.
+    """
+    started = time.perf_counter()
+
+    reports_tool = get_reports_tool()
+    if reports_tool is None:
+        raise HTTPException(status_code=503, detail="Reports database is not available")
+
+    params = ChromaQueryParams(
+        query_texts=request.query_texts,
+        where_filter=json.dumps(request.where_filter) if request.where_filter else None,
+        n_results=request.n_results,
+        newest_first=request.newest_first
+    )
+    result = await reports_tool.search(params, cursor=request.cursor)
+
+    # An empty match is a normal (empty) page, an invalid filter or cursor a bad request,
+    # anything else (ChromaDB, embedding or thread pool failures) a server error
+    if not result["success"]:
+        if result.get("error") == INVALID_QUERY_ERROR:
+            raise HTTPException(status_code=400, detail=result["message"])
+        if result["message"] not in (NO_RESULTS_MESSAGE, NO_MORE_RESULTS_MESSAGE):
+            raise HTTPException(status_code=500, detail=result["message"])
+        result = {**result, "total": 0 if result["message"] == NO_RESULTS_MESSAGE else None}
+
+    response = ReportSearchResponse(
+        count=result["count"],
+        offset=result.get("offset", 0),
+        total=result["total"],
+        ordering=result.get("ordering", "relevance" if params.query_texts else "time_desc" if params.newest_first else "time"),
+        next_cursor=result.get("next_cursor"),
+        results=[ReportHit(**report) for report in result["results"]],
+        took_ms=round((time.perf_counter() - started) * 1000, 2)
+    )
+
+    # Serialized by pydantic-core directly, skipping FastAPI's jsonable_encoder pass
+    return Response(content=response.model_dump_json(), media_type="application/json")
@@ -1,9 +1,23 @@
-from typing import List, Dict, Optional
+import asyncio
+from typing import List, Dict, Optional, Set, Tuple
 from datetime import datetime
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from src.db.mongodb import mongodb
-from src.utils.constants import RECENT_MESSAGES_THRESHOLD, SUMMARIZATION_THRESHOLD
+from src.utils.constants import (
+    HISTORY_TOKEN_BUDGET,
+    HISTORY_MAX_MESSAGES,
+    HISTORY_TRIMMED_MESSAGE_TOKENS,
+    MAX_SUMMARY_TOKENS,
+    CONVERSATION_BUCKET_SIZE,
+)
+from src.utils.metrics import timed_stage
+from src.utils.tokens import estimate_message_tokens, truncate_to_tokens
 from pydantic import BaseModel
 
+# MongoDB duplicate key error code
+DUPLICATE_KEY = 11000
+
 
 class ConversationMessage(BaseModel):
     """Schema for a single message in conversation history."""
@@ -13,46 +27,223 @@ class ConversationMessage(BaseModel):
     metadata: Optional[Dict] = None
 
 
+class ConversationHistory(BaseModel):
+    """History assembled for one agent run, with its token accounting."""
+    messages: List[Dict] = []
+    token_budget: int
+    tokens_used: int = 0
+    messages_trimmed: int = 0  # old tool-heavy replies cut down to fit
+    messages_dropped: int = 0  # messages left out (not yet covered by the summary)
+
+    def usage(self) -> Dict:
+        """Token accounting in the API's camelCase shape."""
+        return {
+            "historyTokenBudget": self.token_budget,
+            "historyTokens": self.tokens_used,
+            "historyMessagesTrimmed": self.messages_trimmed,
+            "historyMessagesDropped": self.messages_dropped
+        }
+
+
 class ConversationService:
     """
     Handles conversation history storage and retrieval from MongoDB.
+
+    Storage layout:
+    - conversations: one small document per conversation
+        {conversationId, messageCount, tokenCount, summary, summarizedUpTo, createdAt, updatedAt}
+    - conversation_buckets: messages in bounded buckets of CONVERSATION_BUCKET_SIZE
+        {conversationId, bucket, count, messages: [{seq, role, content, tokens, timestamp, metadata}]}
+      Message seq n lives in bucket n // CONVERSATION_BUCKET_SIZE, so a read only
+      fetches the buckets covering the requested tail.
+
+    History is assembled against a token budget (HISTORY_TOKEN_BUDGET), not a
+    message count. Once the unsummarized tail no longer fits, a rolling summary
+    on the conversation document covers the older messages:
+    - summary: ConversationSummary of messages[:summarizedUpTo]
+    - summarizedUpTo: high-water mark (number of messages covered by the summary)
+    The summary is extended in the background after each save, so reads never
+    call the summarization agent.
     """
 
+    # Background summary refreshes, one task per conversation
+    _summary_tasks: Dict[str, asyncio.Task] = {}
+    _summary_requested: Set[str] = set()
+
     @staticmethod
-    async def get_conversation_history(conversation_id: str) -> List[Dict]:
+    async def get_conversation_history(
+        conversation_id: str,
+        token_budget: int = HISTORY_TOKEN_BUDGET
+    ) -> ConversationHistory:
         """
-        Retrieve conversation history from MongoDB.
-        Applies smart summarization if conversation exceeds threshold.
+        Retrieve conversation history from MongoDB, fitted to a token budget.
+
+        The stored summary (if any) is counted first. Messages after it are added
+        newest first; when they do not fit, old tool-heavy agent replies are
+        trimmed before the oldest messages are dropped.
 
         Args:
             conversation_id: Unique conversation identifier
+            token_budget: Maximum estimated tokens for the returned history
 
         Returns:
-            List of message dictionaries in Pydantic AI format
-            Returns empty list if conversation not found
+            ConversationHistory with messages in Pydantic AI format and token usage
+            (empty if conversation not found)
         """
+        from src.services.conversationWriter import conversation_writer
+
+        # Read-your-writes: pairs still queued for this conversation are flushed first
+        with timed_stage("history_wait"):
+            await conversation_writer.wait_for(conversation_id)
+
         collection = mongodb.conversations
 
-        conversation = await collection.find_one(
-            {"conversationId": conversation_id}
-        )
+        # Only the small conversation document: summary + counters, no messages
+        with timed_stage("history_read"):
+            conversation = await collection.find_one(
+                {"conversationId": conversation_id},
+                projection={"_id": 0, "messageCount": 1, "summary": 1, "summarizedUpTo": 1}
+            )
 
-        if not conversation or not conversation.get("messages"):
+        if not conversation or not conversation.get("messageCount"):
             print(f"[ConversationService] No history found for: {conversation_id}")
+            return ConversationHistory(token_budget=token_budget)
+
+        total_messages = conversation["messageCount"]
+        summary = conversation.get("summary")
+        summarized_up_to = conversation.get("summarizedUpTo", 0) if summary else 0
+
+        summary_message = ConversationService._build_summary_message(summary) if summary else None
+        summary_tokens = estimate_message_tokens(summary_message) if summary_message else 0
+
+        start = max(summarized_up_to, total_messages - HISTORY_MAX_MESSAGES)
+        with timed_stage("history_read"):
+            messages = await ConversationService._read_messages(conversation_id, start, total_messages)
+
+        kept, tokens_used, trimmed, first_kept = ConversationService._fit_to_budget(
+            messages, token_budget - summary_tokens
+        )
+        first_kept_seq = messages[first_kept]["seq"] if first_kept < len(messages) else total_messages
+
+        # Messages fell out of the history without being summarized yet: catch up in background
+        if first_kept_seq > summarized_up_to:
+            ConversationService.schedule_summary_refresh(conversation_id)
+
+        history = ConversationHistory(
+            messages=([summary_message] if summary_message else []) + ConversationService._convert_to_pydantic_format(kept),
+            token_budget=token_budget,
+            tokens_used=tokens_used + summary_tokens,
+            messages_trimmed=trimmed,
+            messages_dropped=first_kept_seq - summarized_up_to
+        )
+
+        print(
+            f"[ConversationService] History for {conversation_id}: {history.tokens_used}/{token_budget} tokens, "
+            f"{len(kept)} messages{' + summary of ' + str(summarized_up_to) if summary else ''}, "
+            f"{trimmed} trimmed, {history.messages_dropped} dropped"
+        )
+        return history
+
+    @staticmethod
+    def _fit_to_budget(messages: List[Dict], budget: int) -> Tuple[List[Dict], int, int, int]:
+        """
+        Fit messages (ordered by seq) into a token budget.
+
+        In order, until the messages fit:
+        1. Trim old agent replies that carry tool output, oldest first
+        2. Drop the oldest messages (whole user/agent pairs)
+        3. Trim the newest agent reply
+        The newest pair is never dropped.
+
+        Args:
+            messages: Stored message documents
+            budget: Maximum estimated tokens
+
+        Returns:
+            (kept messages, tokens used, number of kept messages trimmed, index of first kept message)
+        """
+        sizes = [msg.get("tokens") or estimate_message_tokens(msg) for msg in messages]
+        fitted = list(messages)
+        total = sum(sizes)
+        trimmed: Set[int] = set()
+        protected = max(0, len(messages) - 2)
+
+        def trim(index: int, max_tokens: int):
+            nonlocal total
+            msg = messages[index]
+            note = f"\n[... trimmed, {sizes[index]} tokens in original reply ...]"
+            # max_tokens covers the whole message, including the note and overhead
+            content_tokens = max_tokens - estimate_message_tokens({"content": note})
+            content = truncate_to_tokens(msg["content"], max(content_tokens, 0))
+            fitted[index] = {**msg, "content": content + note}
+            new_size = estimate_message_tokens(fitted[index])
+            total -= sizes[index] - new_size
+            sizes[index] = new_size
+            trimmed.add(index)
+
+        for index in range(protected):
+            if total <= budget:
+                break
+            msg = messages[index]
+            if (
+                msg["role"] == "agent"
+                and (msg.get("metadata") or {}).get("toolCalls")
+                and sizes[index] > HISTORY_TRIMMED_MESSAGE_TOKENS
+            ):
+                trim(index, HISTORY_TRIMMED_MESSAGE_TOKENS)
+
+        first = 0
+        while total > budget and first < protected:
+            total -= sizes[first]
+            first += 1
+        # Do not start the history with an agent reply whose question was dropped
+        while first < protected and first > 0 and messages[first]["role"] == "agent":
+            total -= sizes[first]
+            first += 1
+
+        if total > budget and messages and messages[-1]["role"] == "agent":
+            trim(len(messages) - 1, max(HISTORY_TRIMMED_MESSAGE_TOKENS, budget - (total - sizes[-1])))
+
+        # Messages trimmed and then dropped anyway count as dropped only
+        return fitted[first:], total, sum(1 for index in trimmed if index >= first), first
+
+    @staticmethod
+    async def _read_messages(conversation_id: str, start: int, end: int) -> List[Dict]:
+        """
+        Read messages with seq in [start, end) from the buckets that hold them.
+
+        Args:
+            conversation_id: Unique conversation identifier
+            start: First message seq (inclusive)
+            end: Last message seq (exclusive)
+
+        Returns:
+            Messages ordered by seq
+        """
+        if end <= start:
             return []
 
-        messages = conversation["messages"]
-        total_messages = len(messages)
-        print(f"[ConversationService] Retrieved {total_messages} messages for: {conversation_id}")
+        cursor = mongodb.conversation_buckets.find(
+            {
+                "conversationId": conversation_id,
+                "bucket": {
+                    "$gte": start // CONVERSATION_BUCKET_SIZE,
+                    "$lte": (end - 1) // CONVERSATION_BUCKET_SIZE
+                }
+            },
+            projection={"_id": 0, "messages": 1}
+        )
 
-        # If conversation is short, return all messages (no summarization)
-        if total_messages <= SUMMARIZATION_THRESHOLD:
-            print(f"[ConversationService] Conversation below threshold ({total_messages} <= {SUMMARIZATION_THRESHOLD}), returning full history")
-            return ConversationService._convert_to_pydantic_format(messages)
+        messages = []
+        async for bucket in cursor:
+            messages.extend(
+                msg for msg in bucket["messages"] if start <= msg["seq"] < end
+            )
 
-        # Otherwise, summarize old messages + keep recent ones full
-        print(f"[ConversationService] Conversation exceeds threshold, applying smart summarization")
-        return await ConversationService._get_summarized_history(messages)
+        # Concurrent saves can push pairs into a bucket out of order
+        messages.sort(key=lambda msg: msg["seq"])
+        print(f"[ConversationService] Read {len(messages)} messages ({start}-{end}) for: {conversation_id}")
+        return messages
 
     @staticmethod
     def _convert_to_pydantic_format(messages: List[Dict]) -> List[Dict]:
@@ -95,9 +286,38 @@ class ConversationService:
             agent_response: Agent's response text
             agent_metadata: Optional metadata about agent's response (tool calls, model, etc.)
         """
-        collection = mongodb.conversations
         now = datetime.now()
+        messages = ConversationService._build_message_pair(
+            user_message, agent_response, agent_metadata, now
+        )
+
+        # Reserve two sequence numbers; creates the conversation on first save
+        conversation = await ConversationService._reserve_sequence(
+            conversation_id, 2, sum(msg["tokens"] for msg in messages), now
+        )
+        seq = conversation["messageCount"] - 2
+        ConversationService._assign_sequence(messages, seq)
+
+        await mongodb.conversation_buckets.bulk_write(
+            ConversationService._bucket_push_operations(conversation_id, messages)
+        )
 
+        if seq == 0:
+            print(f"[ConversationService] Created new conversation: {conversation_id}")
+        else:
+            print(f"[ConversationService] Updated conversation: {conversation_id}")
+
+        # Extend the rolling summary off the request path
+        ConversationService.schedule_summary_refresh(conversation_id)
+
+    @staticmethod
+    def _build_message_pair(
+        user_message: str,
+        agent_response: str,
+        agent_metadata: Optional[Dict],
+        now: datetime
+    ) -> List[Dict]:
+        """Build the stored user/agent message documents (seq is assigned after reservation)."""
         user_msg = {
             "role": "user",
             "content": user_message,
@@ -111,74 +331,304 @@ class ConversationService:
             "metadata": agent_metadata or {}
         }
 
-        # Upsert: update if exists, create if doesn't
-        result = await collection.update_one(
-            {"conversationId": conversation_id},
-            {
-                "$push": {
-                    "messages": {
-                        "$each": [user_msg, agent_msg]
-                    }
-                },
-                "$set": {
-                    "updatedAt": now
-                },
-                "$setOnInsert": {
-                    "createdAt": now
-                }
-            },
-            upsert=True
-        )
+        for msg in (user_msg, agent_msg):
+            msg["tokens"] = estimate_message_tokens(msg)
 
-        if result.upserted_id:
-            print(f"[ConversationService] Created new conversation: {conversation_id}")
-        else:
-            print(f"[ConversationService] Updated conversation: {conversation_id}")
+        return [user_msg, agent_msg]
 
     @staticmethod
-    async def delete_conversation(conversation_id: str):
-        """Delete a conversation and its history."""
-        collection = mongodb.conversations
-        result = await collection.delete_one({"conversationId": conversation_id})
-        print(f"[ConversationService] Deleted conversation: {conversation_id} (deleted: {result.deleted_count})")
+    def _assign_sequence(messages: List[Dict], first_seq: int):
+        """Number messages consecutively starting at first_seq."""
+        for seq, msg in enumerate(messages, first_seq):
+            msg["seq"] = seq
 
     @staticmethod
-    async def _get_summarized_history(messages: List[Dict]) -> List[Dict]:
+    def _bucket_push_operations(conversation_id: str, messages: List[Dict]) -> List[UpdateOne]:
         """
-        Create hybrid history: summary of old messages + full recent messages.
+        Group messages (ordered by seq) into one upserting $push per bucket.
+
+        The filter skips a bucket that already holds the chunk's first seq, so resending
+        the operations after an ambiguous failure cannot store messages twice (the
+        upsert then fails on the unique bucket index instead).
 
         Args:
-            messages: All messages from conversation
+            conversation_id: Unique conversation identifier
+            messages: Message documents carrying their seq
+
+        Returns:
+            UpdateOne operations for conversation_buckets
+        """
+        operations = []
+        start = 0
+        while start < len(messages):
+            bucket = messages[start]["seq"] // CONVERSATION_BUCKET_SIZE
+            end = start
+            while end < len(messages) and messages[end]["seq"] // CONVERSATION_BUCKET_SIZE == bucket:
+                end += 1
+
+            chunk = messages[start:end]
+            operations.append(UpdateOne(
+                {"conversationId": conversation_id, "bucket": bucket, "messages.seq": {"$ne": chunk[0]["seq"]}},
+                {"$push": {"messages": {"$each": chunk}}, "$inc": {"count": len(chunk)}},
+                upsert=True
+            ))
+            start = end
+
+        return operations
+
+    @staticmethod
+    async def _reserve_sequence(conversation_id: str, count: int, tokens: int, now: datetime) -> Dict:
+        """
+        Atomically advance messageCount by `count`, creating the conversation if needed.
+
+        Also adds the messages' estimated tokens to the conversation's tokenCount.
 
         Returns:
-            List with summary message + recent full messages in Pydantic AI format
+            The conversation document after the update (messageCount)
         """
-        from src.agents.summarizationAgent import summarize_messages
+        update = {
+            "$inc": {"messageCount": count, "tokenCount": tokens},
+            "$set": {"updatedAt": now},
+            "$setOnInsert": {"createdAt": now}
+        }
+
+        try:
+            return await mongodb.conversations.find_one_and_update(
+                {"conversationId": conversation_id},
+                update,
+                projection={"_id": 0, "messageCount": 1},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Lost a race creating the same conversation: the document exists now
+            return await mongodb.conversations.find_one_and_update(
+                {"conversationId": conversation_id},
+                update,
+                projection={"_id": 0, "messageCount": 1},
+                return_document=ReturnDocument.AFTER
+            )
+
+    @staticmethod
+    async def delete_conversation(conversation_id: str):
+        """
+        Delete a conversation and its history.
+
+        Pairs still queued in the write-behind writer are written first and a running
+        summary refresh is cancelled, so neither recreates the conversation afterwards.
+        """
+        from src.services.conversationWriter import conversation_writer
+
+        await conversation_writer.wait_for(conversation_id)
 
-        # Split into old and recent
-        messages_to_summarize = messages[:-RECENT_MESSAGES_THRESHOLD]
-        recent_messages = messages[-RECENT_MESSAGES_THRESHOLD:]
+        ConversationService._summary_requested.discard(conversation_id)
+        task = ConversationService._summary_tasks.get(conversation_id)
+        if task is not None and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            # A task cancelled before it started never reaches its own cleanup
+            if ConversationService._summary_tasks.get(conversation_id) is task:
+                ConversationService._summary_tasks.pop(conversation_id)
 
-        print(f"[ConversationService] Summarizing {len(messages_to_summarize)} old messages, keeping {len(recent_messages)} recent")
+        collection = mongodb.conversations
+        result = await collection.delete_one({"conversationId": conversation_id})
+        await mongodb.conversation_buckets.delete_many({"conversationId": conversation_id})
+        print(f"[ConversationService] Deleted conversation: {conversation_id} (deleted: {result.deleted_count})")
+
+    @staticmethod
+    async def migrate_legacy_conversations():
+        """
+        Move conversations stored as one ever-growing `messages` array into buckets.
+
+        Run once at startup. The buckets are written first and the legacy array is
+        only removed once they are stored, so a crash or failed write in between
+        leaves the conversation to be migrated again on the next start. Bucket
+        pushes are idempotent, so a retry (or a concurrent worker) never stores a
+        message twice.
+        """
+        collection = mongodb.conversations
+        migrated = 0
+        failed = 0
+
+        async for legacy in collection.find({"messages": {"$exists": True}}, {"_id": 0, "conversationId": 1, "messages": 1}):
+            conversation_id = legacy["conversationId"]
+            messages = legacy["messages"]
+
+            try:
+                operations = ConversationService._bucket_push_operations(
+                    conversation_id,
+                    [{"seq": seq, **msg} for seq, msg in enumerate(messages)]
+                )
+                if operations:
+                    try:
+                        await mongodb.conversation_buckets.bulk_write(operations, ordered=False)
+                    except BulkWriteError as e:
+                        # A duplicate key means the chunk is already stored (earlier attempt or another worker)
+                        errors = e.details.get("writeErrors", [])
+                        if not errors or any(err.get("code") != DUPLICATE_KEY for err in errors):
+                            raise
+
+                await collection.update_one(
+                    {"conversationId": conversation_id, "messages": {"$exists": True}},
+                    {
+                        "$unset": {"messages": ""},
+                        "$set": {
+                            "messageCount": len(messages),
+                            "tokenCount": sum(estimate_message_tokens(msg) for msg in messages)
+                        }
+                    }
+                )
+                migrated += 1
+            except Exception as e:
+                failed += 1
+                print(f"[ConversationService] Failed to migrate conversation {conversation_id}, kept for retry: {str(e)}")
 
-        # Get summary of old messages
-        summary_result = await summarize_messages(messages_to_summarize)
+        if migrated or failed:
+            print(f"[ConversationService] Migrated {migrated} legacy conversations to bucketed storage ({failed} failed)")
 
-        # Create synthetic "system" message with summary
-        summary_message = {
+    @staticmethod
+    def _build_summary_message(summary: Dict) -> Dict:
+        """Create the synthetic "system" message carrying the stored summary."""
+        return {
             "role": "system",
             "content": f"""Previous conversation context (summarized):
 
-            {summary_result.summary}
+            {summary["summary"]}
 
-            Key entities mentioned: {', '.join(summary_result.key_entities)}
-            User intent: {summary_result.user_intent}
+            Key entities mentioned: {', '.join(summary["key_entities"])}
+            User intent: {summary["user_intent"]}
 
             [Recent conversation continues below...]"""
         }
 
-        # Convert recent messages to Pydantic format
-        recent_pydantic = ConversationService._convert_to_pydantic_format(recent_messages)
+    @staticmethod
+    def schedule_summary_refresh(conversation_id: str):
+        """
+        Request a background refresh of the rolling summary.
+
+        At most one refresh runs per conversation; requests that arrive while it
+        runs are folded into one more pass once it finishes.
+        """
+        ConversationService._summary_requested.add(conversation_id)
+
+        task = ConversationService._summary_tasks.get(conversation_id)
+        if task is not None and not task.done():
+            return
+
+        ConversationService._summary_tasks[conversation_id] = asyncio.create_task(
+            ConversationService._run_summary_refresh(conversation_id)
+        )
 
-        # Return: [Summary] + [Recent messages]
-        return [summary_message] + recent_pydantic
+    @staticmethod
+    async def _run_summary_refresh(conversation_id: str):
+        """Drain pending refresh requests for one conversation."""
+        try:
+            while conversation_id in ConversationService._summary_requested:
+                ConversationService._summary_requested.discard(conversation_id)
+                try:
+                    await ConversationService.refresh_summary(conversation_id)
+                except Exception as e:
+                    print(f"[ConversationService] Summary refresh failed for {conversation_id}: {str(e)}")
+        finally:
+            ConversationService._summary_tasks.pop(conversation_id, None)
+
+    @staticmethod
+    async def shutdown(timeout: float = 10.0):
+        """
+        Finish background summary refreshes before the MongoDB connection closes.
+
+        Queued follow-up passes are dropped (the next save after a restart schedules
+        them again). Refreshes already running get `timeout` seconds to write their
+        summary and are cancelled after that.
+
+        Args:
+            timeout: Seconds to wait for running refreshes
+        """
+        ConversationService._summary_requested.clear()
+        tasks = [task for task in ConversationService._summary_tasks.values() if not task.done()]
+        if not tasks:
+            return
+
+        print(f"[ConversationService] Waiting for {len(tasks)} summary refreshes before shutdown...")
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+            print(f"[ConversationService] Cancelled {len(pending)} summary refreshes still running after {timeout:g}s")
+
+    @staticmethod
+    async def refresh_summary(conversation_id: str):
+        """
+        Extend the stored rolling summary with messages that no longer fit the token budget.
+
+        The recent window is the tail that fits HISTORY_TOKEN_BUDGET next to a
+        summary of up to MAX_SUMMARY_TOKENS. Only messages between the current
+        high-water mark and the start of that window are sent to the
+        summarization agent.
+
+        Args:
+            conversation_id: Unique conversation identifier
+        """
+        from src.agents.summarizationAgent import summarize_messages, ConversationSummary
+
+        collection = mongodb.conversations
+
+        conversation = await collection.find_one(
+            {"conversationId": conversation_id},
+            projection={"_id": 0, "messageCount": 1, "tokenCount": 1, "summary": 1, "summarizedUpTo": 1}
+        )
+        if not conversation or not conversation.get("messageCount"):
+            return
+
+        # The whole conversation still fits the budget: nothing to summarize
+        if conversation.get("tokenCount", HISTORY_TOKEN_BUDGET + 1) <= HISTORY_TOKEN_BUDGET:
+            return
+
+        total_messages = conversation["messageCount"]
+        stored_summary = conversation.get("summary")
+        summarized_up_to = conversation.get("summarizedUpTo", 0) if stored_summary else 0
+
+        start = max(summarized_up_to, total_messages - HISTORY_MAX_MESSAGES)
+        window = await ConversationService._read_messages(conversation_id, start, total_messages)
+        _, _, _, first_kept = ConversationService._fit_to_budget(
+            window, HISTORY_TOKEN_BUDGET - MAX_SUMMARY_TOKENS
+        )
+        target = window[first_kept]["seq"] if first_kept < len(window) else total_messages
+
+        if target <= summarized_up_to:
+            return
+
+        previous_summary = ConversationSummary(**stored_summary) if stored_summary else None
+        print(f"[ConversationService] Extending summary for {conversation_id}: messages {summarized_up_to}-{target}")
+
+        aged_out_messages = await ConversationService._read_messages(
+            conversation_id, summarized_up_to, start
+        ) + window[:first_kept]
+        with timed_stage("summary"):
+            summary_result = await summarize_messages(
+                aged_out_messages,
+                previous_summary=previous_summary,
+                start_index=summarized_up_to
+            )
+
+        # Only move the high-water mark forward from the value we read
+        if "summarizedUpTo" in conversation:
+            hwm_filter = {"summarizedUpTo": conversation["summarizedUpTo"]}
+        else:
+            hwm_filter = {"summarizedUpTo": {"$exists": False}}
+
+        result = await collection.update_one(
+            {"conversationId": conversation_id, **hwm_filter},
+            {
+                "$set": {
+                    "summary": summary_result.model_dump(),
+                    "summarizedUpTo": target
+                }
+            }
+        )
+
+        if result.modified_count:
+            print(f"[ConversationService] Stored summary for {conversation_id} up to message {target}")
+        else:
+            print(f"[ConversationService] Summary for {conversation_id} changed concurrently, skipped")
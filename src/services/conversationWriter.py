@@ -0,0 +1,357 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from pymongo.errors import BulkWriteError
+
+from src.db.mongodb import mongodb
+from src.services.conversationService import ConversationService, DUPLICATE_KEY
+from src.utils.constants import (
+    CONVERSATION_WRITE_FLUSH_INTERVAL_MS,
+    CONVERSATION_WRITE_BATCH_SIZE,
+    CONVERSATION_WRITE_QUEUE_SIZE,
+    CONVERSATION_WRITE_MAX_RETRIES,
+    CONVERSATION_WRITE_RETRY_BACKOFF_MS,
+)
+
+
+@dataclass
+class PendingPair:
+    """A message pair acknowledged to the client but not yet written to MongoDB."""
+    conversation_id: str
+    user_message: str
+    agent_response: str
+    agent_metadata: Optional[Dict]
+    timestamp: datetime
+    written: asyncio.Future = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+
+
+class ConversationWriter:
+    """
+    Write-behind queue for conversation message pairs.
+
+    /chat enqueues the pair and returns immediately. A single flush loop drains
+    the queue every CONVERSATION_WRITE_FLUSH_INTERVAL_MS and writes everything
+    pending in one batch:
+    - one $inc per conversation reserves sequence numbers for all its pairs
+    - one bulk_write pushes every pair into its bucket
+
+    Guarantees:
+    - Per-conversation order: pairs get sequence numbers in enqueue order, and
+      batches are flushed one after another
+    - Backpressure: the queue is bounded, so when MongoDB falls behind enqueue()
+      waits for space instead of buffering without limit
+    - Read-your-writes: wait_for() blocks until a conversation's queued pairs are
+      written; get_conversation_history() calls it before reading
+    - Retries: a failed batch is retried with exponential backoff, keeping the
+      sequence numbers it reserved (bucket pushes are idempotent), so a transient
+      MongoDB error neither loses pairs nor leaves gaps in the conversation
+    """
+
+    def __init__(
+        self,
+        flush_interval_ms: int = CONVERSATION_WRITE_FLUSH_INTERVAL_MS,
+        batch_size: int = CONVERSATION_WRITE_BATCH_SIZE,
+        max_queue: int = CONVERSATION_WRITE_QUEUE_SIZE,
+        max_retries: int = CONVERSATION_WRITE_MAX_RETRIES,
+        retry_backoff_ms: int = CONVERSATION_WRITE_RETRY_BACKOFF_MS
+    ):
+        """
+        Initialize the writer (call start() from a running event loop).
+
+        Args:
+            flush_interval_ms: How long the flush loop gathers pairs before writing
+            batch_size: Maximum pairs written per batch
+            max_queue: Maximum queued pairs before enqueue() waits
+            max_retries: Retries of a failed batch before its pairs are given up
+            retry_backoff_ms: Delay before the first retry (doubled for each further one)
+        """
+        self.flush_interval = flush_interval_ms / 1000
+        self.batch_size = batch_size
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff_ms / 1000
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._flusher: Optional[asyncio.Task] = None
+        # Last queued pair per conversation; once written, all earlier ones are too
+        self._last_pending: Dict[str, PendingPair] = {}
+        self._saturated = False
+
+        self.enqueued = 0
+        self.written = 0
+        self.failed = 0
+        self.retries = 0
+        self.batches = 0
+        self.backpressure_waits = 0
+        self.total_flush_time = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._flusher is not None and not self._flusher.done()
+
+    def start(self):
+        """Start the flush loop."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._flusher = asyncio.create_task(self._flush_loop())
+        print(f"[ConversationWriter] Started (flush every {self.flush_interval * 1000:.0f}ms, batch {self.batch_size}, queue {self.max_queue})")
+
+    async def enqueue(
+        self,
+        conversation_id: str,
+        user_message: str,
+        agent_response: str,
+        agent_metadata: Optional[Dict] = None
+    ):
+        """
+        Queue a message pair for writing.
+
+        Returns as soon as the pair is queued. Falls back to a direct write when
+        the writer is not running (e.g. scripts outside the app lifespan).
+
+        Args:
+            conversation_id: Unique conversation identifier
+            user_message: User's message text
+            agent_response: Agent's response text
+            agent_metadata: Optional metadata about agent's response (tool calls, model, etc.)
+        """
+        if not self.running:
+            await ConversationService.save_message_pair(
+                conversation_id, user_message, agent_response, agent_metadata
+            )
+            return
+
+        pair = PendingPair(
+            conversation_id=conversation_id,
+            user_message=user_message,
+            agent_response=agent_response,
+            agent_metadata=agent_metadata,
+            timestamp=datetime.now()
+        )
+
+        if self._queue.full():
+            self.backpressure_waits += 1
+            if not self._saturated:
+                self._saturated = True
+                print(f"[ConversationWriter] Queue full ({self.max_queue} pairs), waiting for MongoDB to catch up")
+
+        await self._queue.put(pair)
+        self._last_pending[conversation_id] = pair
+        self.enqueued += 1
+
+    async def wait_for(self, conversation_id: str):
+        """Wait until every queued pair of a conversation has been written (or failed)."""
+        pair = self._last_pending.get(conversation_id)
+        if pair is None:
+            return
+
+        try:
+            await asyncio.shield(pair.written)
+        except Exception:
+            # The failure was logged by the flush; read whatever was stored
+            pass
+
+    async def _flush_loop(self):
+        """Collect pairs for one flush interval, then write them as one batch."""
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._write_batch(batch)
+
+    async def _write_batch(self, batch: List[PendingPair]):
+        """Write one batch of pairs (retrying on errors) and resolve their futures."""
+        start = time.perf_counter()
+
+        by_conversation: "OrderedDict[str, List[PendingPair]]" = OrderedDict()
+        for pair in batch:
+            by_conversation.setdefault(pair.conversation_id, []).append(pair)
+
+        messages_by_conversation = {
+            conversation_id: [
+                msg
+                for pair in pairs
+                for msg in ConversationService._build_message_pair(
+                    pair.user_message, pair.agent_response, pair.agent_metadata, pair.timestamp
+                )
+            ]
+            for conversation_id, pairs in by_conversation.items()
+        }
+        # Conversations whose sequence numbers are reserved; kept across retries so a
+        # retried write fills exactly the slots it reserved
+        reserved: Dict[str, List[Dict]] = {}
+
+        error = None
+        for attempt in range(self.max_retries + 1):
+            if error is not None:
+                delay = self.retry_backoff * 2 ** (attempt - 1)
+                self.retries += 1
+                print(
+                    f"[ConversationWriter] Batch of {len(batch)} pairs failed ({str(error)}), "
+                    f"retry {attempt}/{self.max_retries} in {delay * 1000:.0f}ms"
+                )
+                await asyncio.sleep(delay)
+            try:
+                await self._reserve_sequences(messages_by_conversation, by_conversation, reserved)
+                await self._push_messages(reserved)
+                error = None
+                break
+            except Exception as e:
+                error = e
+
+        try:
+            if error is not None:
+                self._give_up(batch, by_conversation, reserved, error)
+            else:
+                self.written += len(batch)
+                for pair in batch:
+                    pair.written.set_result(None)
+
+                # Extend rolling summaries off the request path
+                for conversation_id in by_conversation:
+                    ConversationService.schedule_summary_refresh(conversation_id)
+
+        finally:
+            for pair in batch:
+                if self._last_pending.get(pair.conversation_id) is pair:
+                    del self._last_pending[pair.conversation_id]
+                self._queue.task_done()
+
+            self._saturated = False
+            elapsed = time.perf_counter() - start
+            self.batches += 1
+            self.total_flush_time += elapsed
+            print(f"[ConversationWriter] Flushed {len(batch)} pairs for {len(by_conversation)} conversations in {elapsed * 1000:.1f}ms")
+
+    @staticmethod
+    async def _reserve_sequences(
+        messages_by_conversation: Dict[str, List[Dict]],
+        by_conversation: Dict[str, List[PendingPair]],
+        reserved: Dict[str, List[Dict]]
+    ):
+        """
+        Reserve sequence numbers for the conversations not reserved yet (all concurrently).
+
+        Successful reservations are numbered and added to `reserved` even when
+        another conversation's reservation fails; the first failure is then raised.
+        """
+        pending = [cid for cid in messages_by_conversation if cid not in reserved]
+        results = await asyncio.gather(*[
+            ConversationService._reserve_sequence(
+                conversation_id,
+                len(messages_by_conversation[conversation_id]),
+                sum(msg["tokens"] for msg in messages_by_conversation[conversation_id]),
+                by_conversation[conversation_id][-1].timestamp
+            )
+            for conversation_id in pending
+        ], return_exceptions=True)
+
+        failure = None
+        for conversation_id, result in zip(pending, results):
+            if isinstance(result, Exception):
+                failure = failure or result
+                continue
+            messages = messages_by_conversation[conversation_id]
+            ConversationService._assign_sequence(messages, result["messageCount"] - len(messages))
+            reserved[conversation_id] = messages
+
+        if failure is not None:
+            raise failure
+
+    @staticmethod
+    async def _push_messages(reserved: Dict[str, List[Dict]]):
+        """
+        Push the reserved conversations' messages into their buckets with one bulk_write.
+
+        Safe to resend: a push whose messages are already stored does not match and
+        fails on the unique bucket index. A duplicate key can also mean another writer
+        created the bucket concurrently, so those operations are sent once more; a
+        second duplicate key means the messages are stored.
+        """
+        operations = [
+            operation
+            for conversation_id, messages in reserved.items()
+            for operation in ConversationService._bucket_push_operations(conversation_id, messages)
+        ]
+
+        for attempt in range(2):
+            try:
+                await mongodb.conversation_buckets.bulk_write(operations, ordered=False)
+                return
+            except BulkWriteError as e:
+                errors = e.details.get("writeErrors", [])
+                if not errors or any(err.get("code") != DUPLICATE_KEY for err in errors):
+                    raise
+                operations = [operations[err["index"]] for err in errors]
+
+    def _give_up(
+        self,
+        batch: List[PendingPair],
+        by_conversation: Dict[str, List[PendingPair]],
+        reserved: Dict[str, List[Dict]],
+        error: Exception
+    ):
+        """Fail the pairs of a batch that kept failing, logging what was lost per conversation."""
+        self.failed += len(batch)
+        print(f"[ConversationWriter] Giving up on batch of {len(batch)} pairs after {self.max_retries} retries: {str(error)}")
+        for conversation_id, pairs in by_conversation.items():
+            messages = reserved.get(conversation_id)
+            gap = f", seq {messages[0]['seq']}-{messages[-1]['seq']} left unfilled" if messages else ""
+            print(f"[ConversationWriter] Lost {len(pairs)} pairs of conversation {conversation_id}{gap}")
+
+        for pair in batch:
+            if not pair.written.done():
+                pair.written.set_exception(error)
+                # Nobody may await it; avoid "exception was never retrieved" warnings
+                pair.written.exception()
+
+    async def close(self):
+        """Flush everything still queued and stop the flush loop."""
+        if not self.running:
+            return
+
+        pending = self._queue.qsize()
+        if pending:
+            print(f"[ConversationWriter] Flushing {pending} pending pairs before shutdown...")
+
+        await self._queue.join()
+        self._flusher.cancel()
+        try:
+            await self._flusher
+        except asyncio.CancelledError:
+            pass
+        self._flusher = None
+        print("[ConversationWriter] Stopped")
+
+    def stats(self) -> Dict:
+        """Snapshot of queue depth and write counters."""
+        return {
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_queue": self.max_queue,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "failed": self.failed,
+            "retries": self.retries,
+            "batches": self.batches,
+            "backpressure_waits": self.backpressure_waits,
+            "avg_batch_size": (self.written + self.failed) / self.batches if self.batches else 0.0,
+            "avg_flush_ms": self.total_flush_time / self.batches * 1000 if self.batches else 0.0
+        }
+
+
+# Global instance
+conversation_writer = ConversationWriter()
@@ -0,0 +1,209 @@
+"""
+Deterministic fast path for common report queries.
+
+Recognizes site/guard IDs, "all" / "top N" / "last N" / "latest" and relative
+date expressions and builds ChromaQueryParams without calling the Parsing Agent. A query is only
+compiled when every word is accounted for; anything with semantic content
+(e.g. "loitering", "white vehicle") returns None and goes to the LLM.
+
+Dates and result counts follow the Parsing Agent's rules: UTC day boundaries,
+filtered on the 'timestamp' metadata field with $gte (start) and $lt (exclusive
+end); 1000 results for "all", 10 for guard and activity queries, otherwise 5;
+newest first for "last N", "latest" and "most recent".
+The rules' structured examples are golden cases for this module
+(benchmarks/goldenQueries.py).
+"""
+
+import json
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from src.models.chromadb import ChromaQueryParams
+from src.utils.constants import DEFAULT_N_RESULTS, MAX_N_RESULTS
+
+SITE_PATTERN = re.compile(r"\b(?:site\s*)?(s\d{2,})\b")
+GUARD_PATTERN = re.compile(r"\b(?:guard\s*)?(g\d{2,})(?:'s)?\b")
+ISO_DATE_PATTERN = re.compile(r"\b(?:on\s+)?(\d{4})-(\d{2})-(\d{2})\b")
+MONTH_DAY_PATTERN = re.compile(
+    r"\b(?:on\s+)?(jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?\s+"
+    r"(\d{1,2})(?:st|nd|rd|th)?(?:,?\s+(\d{4}))?\b"
+)
+TOP_N_PATTERN = re.compile(r"\b(?:top|first|last|latest|newest|most\s+recent)\s+(\d{1,4})\b|\b(\d{1,4})\s+(?:reports?|incidents?)\b")
+# Matched after date expressions ("last week", "last 3 days") are removed
+NEWEST_FIRST_PATTERN = re.compile(r"\b(?:last|latest|newest|most\s+recent|recent)\b")
+LAST_N_DAYS_PATTERN = re.compile(r"\b(?:in\s+the\s+)?(?:last|past)\s+(\d{1,3})\s+days?\b")
+MONTH_RANGE_PATTERN = re.compile(r"\b(this|last|past|previous)\s+month(?:'s)?\b")
+ALL_PATTERN = re.compile(r"\b(?:all|every|everything|entire|full)\b")
+# "what did guard G03 do": matched before IDs are removed from the text
+ACTIVITY_PATTERN = re.compile(r"\b(?:what\s+happened|activities|activity|what\s+did\s+(?:[\w']+\s+){1,3}do)\b")
+
+# n_results of guard and activity queries (the Parsing Agent rules use the same)
+ACTIVITY_N_RESULTS = 10
+
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "sept": 9, "oct": 10, "nov": 11, "dec": 12
+}
+
+# (pattern, day offset of start from today, day offset of exclusive end)
+RELATIVE_DAY_RANGES: List[Tuple[re.Pattern, int, int]] = [
+    (re.compile(r"\b(?:today|tonight|this\s+morning|this\s+afternoon|this\s+evening)\b"), 0, 1),
+    (re.compile(r"\b(?:yesterday|last\s+night)\b"), -1, 0),
+    (re.compile(r"\b(?:last|past|previous)\s+week\b"), -7, 0),
+]
+
+# Words that carry no search meaning once IDs, counts and dates are extracted
+FILLER_WORDS = {
+    "a", "an", "the", "show", "me", "give", "get", "list", "find", "fetch", "display",
+    "pull", "up", "see", "view", "retrieve", "any", "all", "every", "everything",
+    "entire", "full", "report", "reports", "log", "logs", "entries", "records",
+    "from", "at", "for", "by", "on", "in", "of", "during", "to", "and", "with",
+    "site", "sites", "guard", "guards", "what", "happened", "did", "do", "does",
+    "activities", "activity", "were", "was", "there", "is", "are", "please", "can",
+    "you", "i", "want", "need", "filed", "written", "submitted", "top", "first",
+    "last", "latest", "newest", "most", "recent", "s", "tell", "about", "this", "that",
+}
+
+
+def compile_query(user_query: str, now: Optional[datetime] = None) -> Optional[ChromaQueryParams]:
+    """
+    Compile a structured report query into ChromaQueryParams without the LLM.
+
+    Args:
+        user_query: Natural language query from user
+        now: Current time (defaults to the real current UTC time)
+
+    Returns:
+        ChromaQueryParams if the query was fully resolved, otherwise None
+    """
+    now = now or datetime.now(timezone.utc)
+    today = datetime(now.year, now.month, now.day, tzinfo=timezone.utc)
+
+    text = user_query.lower().strip()
+    text = re.sub(r"[?!.,;:]+(\s|$)", r"\1", text)
+
+    filters: List[Dict] = []
+    consumed = text
+    activity = ACTIVITY_PATTERN.search(text) is not None
+
+    # Site and guard identifiers
+    sites = sorted({m.upper() for m in SITE_PATTERN.findall(text)})
+    guards = sorted({m.upper() for m in GUARD_PATTERN.findall(text)})
+    consumed = SITE_PATTERN.sub(" ", consumed)
+    consumed = GUARD_PATTERN.sub(" ", consumed)
+
+    if guards:
+        filters.append(_id_filter("guardId", guards))
+    if sites:
+        filters.append(_id_filter("siteId", sites))
+
+    # Date range (at most one date expression is compiled)
+    date_range, consumed = _extract_date_range(consumed, today)
+    if date_range == "ambiguous":
+        return None
+    if date_range:
+        start, end = date_range
+        filters.append({"timestamp": {"$gte": int(start.timestamp())}})
+        filters.append({"timestamp": {"$lt": int(end.timestamp())}})
+
+    # Ordering and result count
+    newest_first = NEWEST_FIRST_PATTERN.search(consumed) is not None
+    n_results = DEFAULT_N_RESULTS
+    top_n = TOP_N_PATTERN.search(consumed)
+    if top_n:
+        n_results = min(int(top_n.group(1) or top_n.group(2)), MAX_N_RESULTS)
+        consumed = TOP_N_PATTERN.sub(" ", consumed)
+    elif ALL_PATTERN.search(consumed):
+        n_results = MAX_N_RESULTS
+    elif guards or activity:
+        n_results = ACTIVITY_N_RESULTS
+
+    # Any remaining meaningful word means there is semantic content for the LLM
+    leftover = [w for w in re.findall(r"[a-z0-9']+", consumed) if w.strip("'") not in FILLER_WORDS]
+    if leftover or not filters:
+        return None
+
+    where_filter = filters[0] if len(filters) == 1 else {"$and": filters}
+
+    return ChromaQueryParams(
+        query_texts=None,
+        where_filter=json.dumps(where_filter),
+        n_results=max(n_results, 1),
+        newest_first=newest_first
+    )
+
+
+def _id_filter(field: str, values: List[str]) -> Dict:
+    """Exact match for one ID, $in for several."""
+    if len(values) == 1:
+        return {field: values[0]}
+    return {field: {"$in": values}}
+
+
+def _extract_date_range(text: str, today: datetime):
+    """
+    Find a single date expression and return ((start, end), remaining_text).
+
+    Returns ("ambiguous", text) when more than one date expression is present.
+    """
+    matches = []
+
+    for pattern, start_offset, end_offset in RELATIVE_DAY_RANGES:
+        if pattern.search(text):
+            matches.append((pattern, (today + timedelta(days=start_offset), today + timedelta(days=end_offset))))
+
+    last_n_days = LAST_N_DAYS_PATTERN.search(text)
+    if last_n_days:
+        days = int(last_n_days.group(1))
+        matches.append((LAST_N_DAYS_PATTERN, (today - timedelta(days=days), today)))
+
+    month_range = _month_range(text, today)
+    if month_range:
+        matches.append(month_range)
+
+    iso = ISO_DATE_PATTERN.search(text)
+    if iso:
+        try:
+            day = datetime(int(iso.group(1)), int(iso.group(2)), int(iso.group(3)), tzinfo=timezone.utc)
+            matches.append((ISO_DATE_PATTERN, (day, day + timedelta(days=1))))
+        except ValueError:
+            return "ambiguous", text
+
+    month_day = MONTH_DAY_PATTERN.search(text)
+    if month_day:
+        month = MONTHS[month_day.group(1)]
+        year = int(month_day.group(3)) if month_day.group(3) else today.year
+        try:
+            day = datetime(year, month, int(month_day.group(2)), tzinfo=timezone.utc)
+        except ValueError:
+            return "ambiguous", text
+        # Without an explicit year, a future date means last year's
+        if not month_day.group(3) and day > today:
+            day = day.replace(year=year - 1)
+        matches.append((MONTH_DAY_PATTERN, (day, day + timedelta(days=1))))
+
+    if not matches:
+        return None, text
+    if len(matches) > 1:
+        return "ambiguous", text
+
+    pattern, date_range = matches[0]
+    return date_range, pattern.sub(" ", text)
+
+
+def _month_range(text: str, today: datetime):
+    """Calendar month ranges for "this month" / "last month"."""
+    match = MONTH_RANGE_PATTERN.search(text)
+    if not match:
+        return None
+
+    month_start = today.replace(day=1)
+    if match.group(1) == "this":
+        start = month_start
+        end = today + timedelta(days=1)
+    else:
+        end = month_start
+        start = (month_start - timedelta(days=1)).replace(day=1)
+
+    return MONTH_RANGE_PATTERN, (start, end)
@@ -0,0 +1,169 @@
+import json
+import os
+import re
+from typing import Dict, Optional
+
+import numpy as np
+
+from src.utils.cache import LRUCache
+from src.utils.constants import (
+    EMBEDDING_MODEL_NAME,
+    QUERY_EMBEDDING_CACHE_SIZE,
+    QUERY_EMBEDDING_CACHE_PATH,
+    QUERY_EMBEDDING_WARMUP_COUNT,
+)
+
+
+class QueryEmbedder:
+    """
+    Embeds semantic query texts for ReportsTool, with an in-memory cache.
+
+    Guards search the same short phrases ("loitering", "geofence exit", "Camry")
+    over and over. Vectors are cached and passed to ChromaDB as query_embeddings,
+    so the ONNX model only runs for phrases it has not seen.
+
+    Query frequencies (and vectors) can be persisted to a JSON file so a restart
+    can warm the cache with the most frequent historical queries.
+    """
+
+    def __init__(
+        self,
+        embedding_function,
+        query_layer,
+        cache_size: int = QUERY_EMBEDDING_CACHE_SIZE,
+        persist_path: Optional[str] = QUERY_EMBEDDING_CACHE_PATH,
+        model_name: str = EMBEDDING_MODEL_NAME
+    ):
+        """
+        Initialize the embedder.
+
+        Args:
+            embedding_function: ChromaDB embedding function used for the collection
+            query_layer: AsyncReportCollection whose thread pool runs the embedding
+            cache_size: Maximum number of cached query vectors
+            persist_path: JSON file for persisting the cache (None or "" disables it)
+            model_name: Embedding model identifier stored with persisted vectors
+        """
+        self.embedding_function = embedding_function
+        self.query_layer = query_layer
+        self.persist_path = persist_path or None
+        self.model_name = model_name
+
+        self.cache = LRUCache(maxsize=cache_size, name="QueryEmbeddingCache")
+        # How often each normalized query was embedded or served (for warm-up)
+        self.query_counts: Dict[str, int] = {}
+        self._max_tracked = cache_size * 10
+
+        self._load()
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        """The embedding model is uncased, so case and spacing do not change the vector."""
+        return re.sub(r"\s+", " ", text.lower()).strip()
+
+    async def embed(self, text: str) -> np.ndarray:
+        """
+        Return the embedding for a query text, computing it on a cache miss.
+
+        Args:
+            text: Semantic query text
+
+        Returns:
+            Embedding vector
+        """
+        key = self._normalize(text)
+        self._count(key)
+
+        vector, _ = await self.cache.get_or_load(key, lambda: self._compute(key))
+        return vector
+
+    async def _compute(self, text: str) -> np.ndarray:
+        """Run the embedding function on the query thread pool."""
+        embeddings = await self.query_layer.embed(self.embedding_function, [text])
+        return np.asarray(embeddings[0], dtype=np.float32)
+
+    def _count(self, key: str):
+        """Track query frequency, pruning the rarest entries when too many are tracked."""
+        self.query_counts[key] = self.query_counts.get(key, 0) + 1
+
+        if len(self.query_counts) > self._max_tracked:
+            keep = sorted(self.query_counts.items(), key=lambda item: item[1], reverse=True)
+            self.query_counts = dict(keep[:self._max_tracked // 2])
+
+    async def warm_up(self, top_n: int = QUERY_EMBEDDING_WARMUP_COUNT):
+        """
+        Pre-embed the most frequent historical queries that are not cached yet.
+
+        Also loads the ONNX model, so the first real query does not pay for it.
+
+        Args:
+            top_n: Number of most frequent queries to make sure are cached
+        """
+        frequent = sorted(self.query_counts.items(), key=lambda item: item[1], reverse=True)[:top_n]
+        missing = [text for text, _ in frequent if text not in self.cache]
+
+        if not missing:
+            # Nothing to embed, but still initialize the model
+            await self.query_layer.embed(self.embedding_function, ["security report"])
+            print(f"[QueryEmbedder] Warm-up: {len(frequent)} frequent queries already cached")
+            return
+
+        embeddings = await self.query_layer.embed(self.embedding_function, missing)
+        for text, vector in zip(missing, embeddings):
+            self.cache.set(text, np.asarray(vector, dtype=np.float32))
+
+        print(f"[QueryEmbedder] Warm-up: embedded {len(missing)} of the {len(frequent)} most frequent queries")
+
+    def _load(self):
+        """Load persisted query counts and vectors (vectors only if the model matches)."""
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+
+        try:
+            with open(self.persist_path, 'r') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"[QueryEmbedder] Could not read {self.persist_path}: {str(e)}")
+            return
+
+        same_model = data.get("model") == self.model_name
+        loaded = 0
+
+        # Least frequent first, so the most frequent end up most recently used
+        for entry in sorted(data.get("queries", []), key=lambda item: item.get("count", 0)):
+            self.query_counts[entry["text"]] = entry.get("count", 1)
+            if same_model and entry.get("embedding"):
+                self.cache.set(entry["text"], np.asarray(entry["embedding"], dtype=np.float32))
+                loaded += 1
+
+        if not same_model:
+            print(f"[QueryEmbedder] Persisted vectors are for model {data.get('model')!r}, re-embedding on warm-up")
+        print(f"[QueryEmbedder] Loaded {len(self.query_counts)} historical queries ({loaded} vectors)")
+
+    def save(self):
+        """Persist query counts and cached vectors to disk."""
+        if not self.persist_path:
+            return
+
+        queries = []
+        for text, count in sorted(self.query_counts.items(), key=lambda item: item[1], reverse=True):
+            vector = self.cache.peek(text)
+            queries.append({
+                "text": text,
+                "count": count,
+                "embedding": vector.tolist() if vector is not None else None
+            })
+
+        directory = os.path.dirname(self.persist_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.persist_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"model": self.model_name, "queries": queries}, f)
+        os.replace(tmp_path, self.persist_path)
+
+        print(f"[QueryEmbedder] Saved {len(queries)} queries to {self.persist_path}")
+
+    def stats(self) -> Dict:
+        """Cache counters plus the number of tracked queries."""
+        return {**self.cache.stats(), "tracked_queries": len(self.query_counts)}
@@ -0,0 +1,100 @@
+"""
+Local aggregation over report metadata.
+
+Counts matched reports, optionally grouped by siteId / guardId and by time
+buckets derived from the 'timestamp' metadata field (UTC). Used by the
+aggregate_security_reports tool so the Guard Agent gets a small table instead
+of counting rows in a report dump.
+"""
+
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+# Group-by dimensions the tool accepts
+GROUP_BY_FIELDS = ("siteId", "guardId", "day", "hour", "hour_of_day")
+TIME_FIELDS = ("day", "hour", "hour_of_day")
+
+UNKNOWN = "unknown"
+# Longest gap-filled histogram (e.g. a bit over a year of days)
+MAX_FILLED_BUCKETS = 400
+
+
+def aggregate_metadata(
+    metadatas: List[Dict[str, Any]],
+    group_by: Optional[List[str]] = None
+) -> List[Tuple[Tuple[str, ...], int]]:
+    """
+    Count reports per group.
+
+    Args:
+        metadatas: Metadata dicts of the matched reports
+        group_by: Dimensions from GROUP_BY_FIELDS (empty = one overall count)
+
+    Returns:
+        (group key, count) rows. Rows with a time dimension are in time order;
+        others are sorted by count, largest first. A single time dimension
+        is gap-filled with zero counts.
+    """
+    group_by = list(group_by or [])
+    unknown_fields = [name for name in group_by if name not in GROUP_BY_FIELDS]
+    if unknown_fields:
+        raise ValueError(f"Unsupported group_by field(s): {', '.join(unknown_fields)}")
+
+    counts = Counter(
+        tuple(_group_value(metadata, name) for name in group_by)
+        for metadata in metadatas
+    )
+
+    if not group_by:
+        return [((), len(metadatas))]
+
+    if len(group_by) == 1 and group_by[0] in TIME_FIELDS:
+        _fill_time_gaps(counts, group_by[0])
+
+    if any(name in TIME_FIELDS for name in group_by):
+        return sorted(counts.items())
+    return sorted(counts.items(), key=lambda row: (-row[1], row[0]))
+
+
+def _group_value(metadata: Dict[str, Any], name: str) -> str:
+    """Group key of one report for one dimension."""
+    if name not in TIME_FIELDS:
+        return str(metadata.get(name) or UNKNOWN)
+
+    timestamp = metadata.get('timestamp')
+    if not isinstance(timestamp, (int, float)):
+        return UNKNOWN
+
+    moment = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+    if name == "day":
+        return moment.strftime("%Y-%m-%d")
+    if name == "hour":
+        return moment.strftime("%Y-%m-%d %H:00")
+    return moment.strftime("%H:00")
+
+
+def _fill_time_gaps(counts: Counter, name: str):
+    """Add zero-count buckets so a histogram shows quiet periods too."""
+    if name == "hour_of_day":
+        for hour in range(24):
+            counts.setdefault((f"{hour:02d}:00",), 0)
+        return
+
+    known = sorted(key[0] for key in counts if key[0] != UNKNOWN)
+    if len(known) < 2:
+        return
+
+    if name == "day":
+        step, fmt = timedelta(days=1), "%Y-%m-%d"
+    else:
+        step, fmt = timedelta(hours=1), "%Y-%m-%d %H:00"
+
+    current = datetime.strptime(known[0], fmt)
+    end = datetime.strptime(known[-1], fmt)
+    if (end - current) / step > MAX_FILLED_BUCKETS:
+        return
+
+    while current < end:
+        counts.setdefault((current.strftime(fmt),), 0)
+        current += step
@@ -0,0 +1,246 @@
+"""
+Renders retrieved reports as text for the Guard Agent.
+
+Two modes:
+- full: one block per report (id, site, guard, date, text, relevance)
+- compact: reports with identical or near-identical text are merged into one
+  entry with a count and the lists of sites, guards and dates involved
+
+Both modes stop at a hard character cap and end with an explicit truncation
+note, so a 1000-report result cannot blow up the prompt.
+
+Aggregation results (counts per group) are rendered as a Markdown table.
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Tuple
+
+from src.utils.constants import REPORT_RENDER_MODE, REPORT_RENDER_MAX_CHARS, AGGREGATION_MAX_ROWS
+
+# Report IDs / values listed per group before collapsing to "+N more"
+MAX_LISTED_IDS = 3
+MAX_LISTED_VALUES = 6
+
+# Result "ordering" values as shown in the paging note
+ORDERING_LABELS = {"time": "time (oldest first)", "time_desc": "time (newest first)", "relevance": "relevance"}
+
+_DIGITS = re.compile(r"\d+")
+_NON_WORD = re.compile(r"[^a-z#\s]+")
+_SPACES = re.compile(r"\s+")
+
+
+def format_reports(
+    results: List[Dict[str, Any]],
+    mode: str = REPORT_RENDER_MODE,
+    max_chars: int = REPORT_RENDER_MAX_CHARS
+) -> str:
+    """
+    Render query results for the Guard Agent.
+
+    Args:
+        results: Reports as returned by ReportsTool ({id, text, metadata, distance?, keyword_score?})
+        mode: "compact" (group near-identical reports) or "full" (one entry per report)
+        max_chars: Hard cap on the rendered length
+
+    Returns:
+        Rendered text, ending with a truncation note if the cap was hit
+    """
+    # Entries are rendered lazily, so nothing past the cap is formatted
+    if mode == "full":
+        header = f"Found {len(results)} reports:\n\n"
+        entries = ((_render_report(i, report), 1) for i, report in enumerate(results, 1))
+        entry_count = len(results)
+    else:
+        groups = _group_reports(results)
+        header = f"Found {len(results)} reports ({len(groups)} distinct):\n\n"
+        entries = ((_render_group(i, group), len(group["reports"])) for i, group in enumerate(groups, 1))
+        entry_count = len(groups)
+
+    return _join_capped(header, entries, entry_count, len(results), max_chars)
+
+
+def _normalize_text(text: str) -> str:
+    """Grouping key: case, punctuation, spacing and numbers (times, minutes, counts) ignored."""
+    text = _DIGITS.sub("#", text.lower())
+    text = _NON_WORD.sub(" ", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+def _group_reports(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Merge reports whose normalized text matches.
+
+    Semantic results keep their relevance order (by best distance); filter
+    results list the largest groups first.
+    """
+    groups: Dict[str, Dict[str, Any]] = {}
+    for report in results:
+        key = _normalize_text(report["text"])
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {"text": report["text"], "reports": [], "distance": None, "keyword": False}
+        group["reports"].append(report)
+        group["keyword"] = group["keyword"] or "keyword_score" in report
+
+        if "distance" in report:
+            distance = report["distance"]
+            if group["distance"] is None or distance < group["distance"]:
+                group["distance"] = distance
+
+    ordered = list(groups.values())
+    if any(group["distance"] is not None for group in ordered):
+        return ordered
+    return sorted(ordered, key=lambda group: len(group["reports"]), reverse=True)
+
+
+def _display_date(metadata: Dict[str, Any]) -> str:
+    """Original ISO date (date_str) trimmed to minutes, or 'N/A'."""
+    date = str(metadata.get('date_str', metadata.get('date', 'N/A')))
+    return date[:16].replace("T", " ") if len(date) >= 16 else date
+
+
+def _render_report(index: int, report: Dict[str, Any]) -> str:
+    """One report in the full layout."""
+    metadata = report['metadata']
+    lines = [
+        f"{index}. Report {report['id']}",
+        f"   Site: {metadata.get('siteId', 'N/A')}, Guard: {metadata.get('guardId', 'N/A')}, "
+        f"Date: {_display_date(metadata)}",
+        f"   {report['text']}"
+    ]
+
+    # Include distance for semantic searches
+    if 'distance' in report:
+        keyword = ", keyword match" if 'keyword_score' in report else ""
+        lines.append(f"   (Relevance score: {report['distance']:.2f}{keyword})")
+
+    return "\n".join(lines) + "\n\n"
+
+
+def _render_group(index: int, group: Dict[str, Any]) -> str:
+    """One group of near-identical reports in the compact layout."""
+    reports = group["reports"]
+
+    if len(reports) == 1:
+        report = reports[0]
+        metadata = report['metadata']
+        line = (
+            f"{index}. {report['id']} | {metadata.get('siteId', 'N/A')} | "
+            f"{metadata.get('guardId', 'N/A')} | {_display_date(metadata)}"
+        )
+    else:
+        dates = sorted({_display_date(report['metadata'])[:10] for report in reports})
+        date_text = dates[0] if len(dates) == 1 else (
+            _list_values(dates) if len(dates) <= MAX_LISTED_VALUES else f"{dates[0]} to {dates[-1]}"
+        )
+        line = (
+            f"{index}. {len(reports)} reports ({_list_values([r['id'] for r in reports], MAX_LISTED_IDS)}) | "
+            f"Sites: {_list_values(sorted({r['metadata'].get('siteId', 'N/A') for r in reports}))} | "
+            f"Guards: {_list_values(sorted({r['metadata'].get('guardId', 'N/A') for r in reports}))} | "
+            f"Dates: {date_text}"
+        )
+
+    if group["distance"] is not None:
+        line += f" | Relevance score: {group['distance']:.2f}"
+    if group["keyword"]:
+        line += " | Keyword match"
+
+    return f"{line}\n   {group['text']}\n\n"
+
+
+def _list_values(values: List[str], limit: int = MAX_LISTED_VALUES) -> str:
+    """Comma-separated values, collapsing the tail to '+N more'."""
+    if len(values) <= limit:
+        return ", ".join(values)
+    return f"{', '.join(values[:limit])}, +{len(values) - limit} more"
+
+
+def _join_capped(
+    header: str,
+    entries: Iterable[Tuple[str, int]],
+    entry_count: int,
+    total_reports: int,
+    max_chars: int
+) -> str:
+    """Join (entry, report count) pairs until the next would pass max_chars, then add a truncation note."""
+    parts = [header]
+    length = len(header)
+    shown_reports = 0
+
+    for shown, (entry, size) in enumerate(entries):
+        # Leave room for the truncation note
+        if length + len(entry) > max_chars - 200:
+            parts.append(
+                f"[Truncated: showing {shown} of {entry_count} entries "
+                f"({shown_reports} of {total_reports} reports) to stay within the response size limit. "
+                f"Ask for a narrower site, guard or date range to see the rest.]\n"
+            )
+            break
+        parts.append(entry)
+        length += len(entry)
+        shown_reports += size
+
+    return "".join(parts)
+
+
+def format_page_note(result: Dict[str, Any], tool_name: str = "retrieve_security_reports") -> str:
+    """
+    Paging footer for a retrieval result: which slice is shown and the cursor of the next page.
+
+    Args:
+        result: Output of ReportsTool.execute()
+        tool_name: Guard Agent tool to call with the cursor
+
+    Returns:
+        Note text, or "" when the whole result fit on one page
+    """
+    offset = result.get("offset", 0)
+    next_cursor = result.get("next_cursor")
+    if not offset and not next_cursor:
+        return ""
+
+    total = result.get("total")
+    of_total = f" of {total}" if total is not None else ""
+    ordering = ORDERING_LABELS.get(result.get("ordering"), "relevance")
+    note = f"[Page: reports {offset + 1}-{offset + result['count']}{of_total}, ordered by {ordering}."
+    if next_cursor:
+        return note + f' More reports are available: call {tool_name} with cursor="{next_cursor}" for the next page.]\n'
+    return note + " This is the last page.]\n"
+
+
+def format_aggregation(result: Dict[str, Any], max_rows: int = AGGREGATION_MAX_ROWS) -> str:
+    """
+    Render an aggregation result as a Markdown table.
+
+    Args:
+        result: Output of ReportsTool.aggregate()
+        max_rows: Rows shown before the rest are summarized in a note
+
+    Returns:
+        Table text with the total, or just the total without a group-by
+    """
+    group_by = result["group_by"]
+    scope = " (semantic matches only)" if result.get("semantic") else ""
+    header = f"Matched {result['total']} reports{scope}."
+    if result.get("truncated"):
+        header += (
+            f" [Truncated: only the {result['total']} nearest matches were counted and more reports match;"
+            " the counts are lower bounds, not totals.]"
+        )
+
+    if not group_by:
+        return header + "\n"
+
+    rows = result["rows"]
+    parts = [
+        f"{header} Counts by {', '.join(group_by)}:\n\n",
+        f"| {' | '.join(group_by)} | count |\n",
+        f"|{'---|' * (len(group_by) + 1)}\n"
+    ]
+    parts.extend(f"| {' | '.join(key)} | {count} |\n" for key, count in rows[:max_rows])
+
+    if len(rows) > max_rows:
+        hidden = sum(count for _, count in rows[max_rows:])
+        parts.append(f"\n[Truncated: {len(rows) - max_rows} more rows covering {hidden} reports not shown.]\n")
+
+    return "".join(parts)
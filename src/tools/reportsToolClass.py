@@ -1,7 +1,38 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
+import base64
 import json
+from chromadb.api.types import validate_where
 from src.models.chromadb import ChromaQueryParams
-from src.agents.parsingAgent import parse_natural_language_query
+from src.agents.parsingAgent import resolve_query_params
+from src.collections.asyncCollection import AsyncReportCollection
+from src.collections.chromadb import get_ingest_generation
+from src.collections.keywordIndex import KeywordIndex
+from src.collections.metadataIndex import MetadataIndex, UnsupportedFilter
+from src.tools.queryEmbedder import QueryEmbedder
+from src.tools.reportAggregator import aggregate_metadata, GROUP_BY_FIELDS
+from src.utils.cache import LRUCache
+from src.utils.metrics import timed_stage
+from src.utils.constants import (
+    RESULT_CACHE_SIZE,
+    RESULT_CACHE_MAX_REPORTS,
+    MAX_N_RESULTS,
+    REPORT_PAGE_SIZE,
+    AGGREGATION_MAX_DISTANCE,
+    AGGREGATION_MAX_MATCHES,
+    SEARCH_MODE,
+    HYBRID_RRF_K,
+    HYBRID_CANDIDATE_MULTIPLIER,
+    HYBRID_MAX_DISTANCE,
+)
+
+NO_RESULTS_MESSAGE = "No reports matching those criteria could be found in the database."
+NO_MORE_RESULTS_MESSAGE = "There are no more reports for this query."
+INVALID_CURSOR_MESSAGE = "That page cursor is invalid. Run the query again without a cursor to start from the first page."
+
+# "error" of unsuccessful results: the query itself is invalid, or running it failed
+INVALID_QUERY_ERROR = "invalid_query"
+QUERY_FAILED_ERROR = "query_failed"
 
 
 class ReportsTool:
@@ -10,42 +41,87 @@ class ReportsTool:
     Encapsulates: Parsing → ChromaDB Query → Result Formatting
     """
 
-    def __init__(self, collection):
+    def __init__(
+        self,
+        collection,
+        embedding_function=None,
+        metadata_index: Optional[MetadataIndex] = None,
+        keyword_index: Optional[KeywordIndex] = None,
+        search_mode: str = SEARCH_MODE
+    ):
         """
         Initialize the Reports Tool.
 
         Args:
             collection: ChromaDB collection object
+            embedding_function: Embedding function of the collection (defaults to ChromaDB's default model)
+            metadata_index: Columnar metadata index answering pure-filter queries (None = always ask ChromaDB)
+            keyword_index: BM25 index over report text used by hybrid search
+            search_mode: "hybrid" (fuse keyword and vector rankings) or "vector"
         """
         self.collection = collection
+        self.metadata_index = metadata_index
+        self.keyword_index = keyword_index
+        self.search_mode = search_mode
+        # Blocking ChromaDB calls run on a bounded thread pool, off the event loop
+        self.query_layer = AsyncReportCollection(collection)
+
+        # Semantic query texts are embedded here (cached) and sent as query_embeddings
+        if embedding_function is None:
+            from chromadb.utils import embedding_functions
+            embedding_function = embedding_functions.DefaultEmbeddingFunction()
+        self.embedder = QueryEmbedder(embedding_function, self.query_layer)
 
-    async def execute(self, user_query: str) -> Dict[str, Any]:
+        # Query results keyed on canonicalized params, bounded by total reports held
+        self.result_cache = LRUCache(
+            maxsize=RESULT_CACHE_SIZE,
+            name="ResultCache",
+            max_weight=RESULT_CACHE_MAX_REPORTS,
+            weigher=lambda result: max(result["count"], 1)
+        )
+        self._cache_generation = get_ingest_generation()
+
+    async def execute(self, user_query: str, cursor: Optional[str] = None) -> Dict[str, Any]:
         """
         Main entry point called by Guard Agent.
 
         Workflow:
-        1. Parse natural language query using Parsing Agent
-        2. Execute ChromaDB query based on parsed parameters
+        1. Parse natural language query (rule-based fast path, parse cache, else Parsing Agent),
+           or resume the query stored in a page cursor
+        2. Execute ChromaDB query for one page of results (at most REPORT_PAGE_SIZE reports)
         3. Format and return results
 
         Args:
             user_query: Natural language query from user
+            cursor: next_cursor of a previous result, to fetch the following page
 
         Returns:
             {
                 "success": bool,
                 "count": int,
                 "message": str,
-                "results": List[Dict]
+                "results": List[Dict],
+                "offset": int,         # position of the first result of this page
+                "total": int | None,   # reports across all pages (None for semantic search)
+                "ordering": str,       # "time" / "time_desc" (filter queries) or "relevance"
+                "next_cursor": str | None,
+                "parse_path": str,     # "fast_path", "cache", "speculative", "llm" or "cursor"
+                "error": str           # failures other than "no results" only: INVALID_QUERY_ERROR or QUERY_FAILED_ERROR
             }
         """
         try:
-            # Step A: Call Parsing Agent
-            query_params = await parse_natural_language_query(user_query)
-            print(f"[ReportsTool] Parsed query parameters: {query_params}")
+            # Next page: the cursor carries the parsed query, no parsing needed
+            if cursor:
+                return await self.search(None, cursor)
+
+            # Step A: Resolve query parameters (fast path or Parsing Agent)
+            with timed_stage("parse"):
+                query_params, parse_path = await resolve_query_params(user_query)
+            print(f"[ReportsTool] Parsed query parameters ({parse_path}): {query_params}")
 
-            # Step B: Execute ChromaDB Query
-            results = self._execute_chromadb_query(query_params)
+            # Step B: Execute ChromaDB Query (served from the result cache when possible)
+            results = await self._cached_chromadb_query(query_params)
+            results["parse_path"] = parse_path
 
             # Step C: Return formatted results
             return results
@@ -56,18 +132,476 @@ class ReportsTool:
                 "success": False,
                 "count": 0,
                 "message": f"Error processing query: {str(e)}",
-                "results": []
+                "results": [],
+                "error": QUERY_FAILED_ERROR
+            }
+
+    async def search(self, params: Optional[ChromaQueryParams], cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Run already-structured query parameters (no Parsing Agent), one page at a time.
+
+        Args:
+            params: Query parameters; ignored when a cursor is given
+            cursor: next_cursor of a previous result
+
+        Returns:
+            Same shape as execute(); parse_path is "direct" or "cursor"
+        """
+        offset, parse_path = 0, "direct"
+        if cursor:
+            try:
+                params, offset = self.decode_cursor(cursor)
+            except ValueError as e:
+                print(f"[ReportsTool] Invalid cursor: {str(e)}")
+                return {
+                    "success": False,
+                    "count": 0,
+                    "message": INVALID_CURSOR_MESSAGE,
+                    "results": [],
+                    "error": INVALID_QUERY_ERROR
+                }
+            parse_path = "cursor"
+            print(f"[ReportsTool] Continuing query at offset {offset}: {params}")
+
+        results = await self._cached_chromadb_query(params, offset)
+        results["parse_path"] = parse_path
+        return results
+
+    @staticmethod
+    def encode_cursor(params: ChromaQueryParams, offset: int) -> str:
+        """Opaque page cursor: the query parameters and the offset of the next page."""
+        state = {"q": params.query_texts, "w": params.where_filter, "n": params.n_results, "o": offset}
+        if params.newest_first:
+            state["d"] = True
+        encoded = base64.urlsafe_b64encode(json.dumps(state, separators=(",", ":")).encode())
+        return encoded.decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[ChromaQueryParams, int]:
+        """
+        Restore the query parameters and offset from a page cursor.
+
+        Raises:
+            ValueError: the cursor is malformed
+        """
+        try:
+            state = json.loads(base64.urlsafe_b64decode(cursor.strip() + "=" * (-len(cursor.strip()) % 4)))
+            params = ChromaQueryParams(
+                query_texts=state["q"],
+                where_filter=state["w"],
+                n_results=state["n"],
+                newest_first=state.get("d", False)
+            )
+            offset = state["o"]
+        except Exception as e:
+            raise ValueError(f"Malformed cursor: {str(e)}") from e
+
+        if not isinstance(offset, int) or offset < 0:
+            raise ValueError(f"Invalid cursor offset {offset!r}")
+        return params, offset
+
+    async def _cached_chromadb_query(self, params: ChromaQueryParams, offset: int = 0) -> Dict[str, Any]:
+        """
+        Execute a ChromaDB query for one page through the result cache.
+
+        The cache is dropped whenever the ingest generation changes, and the
+        generation is part of the key so a query racing an ingest is never
+        stored under the new generation. Errors are not cached.
+
+        Args:
+            params: Structured query parameters from Parsing Agent
+            offset: Position of the first result of the page
+
+        Returns:
+            A copy of the (possibly cached) query result dictionary
+        """
+        generation = self._current_generation()
+
+        key = self._result_cache_key(params, generation)
+        if key is None:
+            return await self._execute_chromadb_query(params, offset)
+
+        results, from_cache = await self.result_cache.get_or_load(
+            key + (offset,),
+            lambda: self._execute_chromadb_query(params, offset),
+            cache_if=lambda result: result["success"] or result["message"] == NO_RESULTS_MESSAGE
+        )
+        if from_cache:
+            print(f"[ReportsTool] Result cache hit ({self.result_cache.stats()['hit_rate']:.0%} hit rate)")
+
+        # Shallow copy so per-request fields never leak into the cached entry
+        return dict(results)
+
+    def _current_generation(self) -> int:
+        """Current ingest generation, dropping the result cache if it changed."""
+        generation = get_ingest_generation()
+        if generation != self._cache_generation:
+            self.result_cache.clear()
+            self._cache_generation = generation
+            print(f"[ReportsTool] Result cache invalidated (ingest generation {generation})")
+        return generation
+
+    async def aggregate(self, filter_query: Optional[str], group_by: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Count matching reports, optionally grouped by site, guard or time bucket.
+
+        Workflow:
+        1. Parse the filter description like execute() (no filter = all reports)
+        2. Fetch only the metadata of every matching report (semantic filters keep
+           matches within AGGREGATION_MAX_DISTANCE)
+        3. Aggregate locally
+
+        Args:
+            filter_query: Natural language description of which reports to count
+            group_by: Dimensions from reportAggregator.GROUP_BY_FIELDS
+
+        Returns:
+            {
+                "success": bool,
+                "count": int,          # number of rows
+                "total": int,          # number of matched reports
+                "group_by": List[str],
+                "rows": List[Tuple[Tuple[str, ...], int]],
+                "semantic": bool,      # a semantic filter was applied
+                "truncated": bool,     # more semantic matches than AGGREGATION_MAX_MATCHES (counts are lower bounds)
+                "message": str,
+                "parse_path": str
+            }
+        """
+        group_by = list(group_by or [])
+        unknown_fields = [name for name in group_by if name not in GROUP_BY_FIELDS]
+        if unknown_fields:
+            return {
+                "success": False,
+                "count": 0,
+                "total": 0,
+                "group_by": group_by,
+                "rows": [],
+                "semantic": False,
+                "truncated": False,
+                "message": f"Cannot group by {', '.join(unknown_fields)}. Use: {', '.join(GROUP_BY_FIELDS)}"
+            }
+
+        try:
+            if filter_query and filter_query.strip():
+                with timed_stage("parse"):
+                    query_params, parse_path = await resolve_query_params(filter_query)
+            else:
+                query_params, parse_path = ChromaQueryParams(query_texts=None, where_filter=None), "none"
+            print(f"[ReportsTool] Aggregating by {group_by or 'count'} ({parse_path}): {query_params}")
+
+            generation = self._current_generation()
+            key = self._result_cache_key(query_params, generation)
+
+            async def load():
+                return await self._execute_aggregation(query_params, group_by)
+
+            if key is None:
+                result = await load()
+            else:
+                # n_results does not affect aggregation, the group-by does
+                key = ("aggregate",) + key[:3] + (tuple(group_by),)
+                result, _ = await self.result_cache.get_or_load(key, load, cache_if=lambda r: r["success"])
+
+            return {**result, "parse_path": parse_path}
+
+        except Exception as e:
+            print(f"[ReportsTool] Error in aggregate: {str(e)}")
+            return {
+                "success": False,
+                "count": 0,
+                "total": 0,
+                "group_by": group_by,
+                "rows": [],
+                "semantic": False,
+                "truncated": False,
+                "message": f"Error aggregating reports: {str(e)}"
+            }
+
+    def _index_select(self, where: Optional[Dict[str, Any]], limit: Optional[int] = None) -> Optional[List[str]]:
+        """Matching ids from the metadata index, or None if it cannot answer the filter."""
+        if self.metadata_index is None or not self.metadata_index.ready:
+            return None
+        try:
+            return self.metadata_index.select(where, limit)
+        except UnsupportedFilter as e:
+            print(f"[ReportsTool] Metadata index cannot evaluate filter ({str(e)}), using ChromaDB")
+            return None
+
+    def _index_metadatas(self, where: Optional[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+        """Indexed metadata of matching reports, or None if the index cannot answer the filter."""
+        if self.metadata_index is None or not self.metadata_index.ready:
+            return None
+        try:
+            return self.metadata_index.metadatas(where)
+        except UnsupportedFilter as e:
+            print(f"[ReportsTool] Metadata index cannot evaluate filter ({str(e)}), using ChromaDB")
+            return None
+
+    async def _filter_page(
+        self,
+        where: Dict[str, Any],
+        offset: int,
+        limit: int,
+        newest_first: bool = False
+    ) -> Tuple[Dict[str, Any], int]:
+        """
+        One page of a pure metadata filter query, in timestamp order (oldest first
+        unless newest_first; reports without a timestamp last).
+
+        The metadata index sorts the matches when it can evaluate the filter.
+        Otherwise ChromaDB returns the metadata of every match (get() pages in
+        insertion order, not by time), which is sorted here; either way
+        documents are fetched only for the ids of the page.
+
+        Returns:
+            (page results, total number of matches)
+        """
+        page = None
+        if self.metadata_index is not None and self.metadata_index.ready:
+            try:
+                page = self.metadata_index.select_page(where, offset, limit, newest_first)
+            except UnsupportedFilter as e:
+                print(f"[ReportsTool] Metadata index cannot evaluate filter ({str(e)}), using ChromaDB")
+
+        if page is None:
+            matches = await self.query_layer.get(where=where, include=["metadatas"])
+
+            def by_time(i):
+                timestamp = matches['metadatas'][i].get('timestamp')
+                if not isinstance(timestamp, (int, float)):
+                    return (1, 0, i)
+                return (0, -timestamp if newest_first else timestamp, i)
+
+            order = sorted(range(len(matches['ids'])), key=by_time)
+            page = [matches['ids'][i] for i in order[offset:offset + limit]], len(order)
+
+        ids, total = page
+        if not ids:
+            return {"ids": [], "documents": [], "metadatas": []}, total
+
+        results = await self.query_layer.get(ids=ids, include=["documents", "metadatas"])
+
+        # get(ids=...) does not preserve the requested order
+        position = {report_id: i for i, report_id in enumerate(results['ids'])}
+        found = [report_id for report_id in ids if report_id in position]
+        return {
+            "ids": found,
+            "documents": [results['documents'][position[report_id]] for report_id in found],
+            "metadatas": [results['metadatas'][position[report_id]] for report_id in found]
+        }, total
+
+    def _hybrid_enabled(self) -> bool:
+        """Hybrid search needs the mode switched on and a built keyword index."""
+        return self.search_mode == "hybrid" and self.keyword_index is not None and self.keyword_index.ready
+
+    async def _vector_query(self, query_text: str, where: Optional[Dict[str, Any]], n_results: int) -> List[Dict[str, Any]]:
+        """Nearest reports by embedding distance."""
+        query_embedding = await self.embedder.embed(query_text)
+        results = await self.query_layer.query(
+            query_embeddings=[query_embedding],
+            where=where,
+            n_results=n_results
+        )
+        return self._format_query_results(results)
+
+    async def _hybrid_query(
+        self,
+        query_text: str,
+        where: Optional[Dict[str, Any]],
+        n_results: int
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Fuse the BM25 keyword ranking with the vector ranking.
+
+        Both rankings contribute 1 / (HYBRID_RRF_K + rank) per report
+        (reciprocal rank fusion), so reports containing the exact query terms
+        rise to the top even when their embedding is not the closest. When any
+        report matched a keyword, vector-only hits farther than
+        HYBRID_MAX_DISTANCE are dropped instead of being left for the agent to
+        discard.
+
+        Returns:
+            Top n_results reports with distance plus keyword_score for keyword
+            hits, or None if the metadata filter cannot be applied to the
+            keyword index (the caller falls back to vector search)
+        """
+        allowed_ids = None
+        if where:
+            ids = self._index_select(where)
+            if ids is None:
+                return None
+            allowed_ids = set(ids)
+
+        candidates = min(max(n_results * HYBRID_CANDIDATE_MULTIPLIER, 20), MAX_N_RESULTS)
+        query_embedding = await self.embedder.embed(query_text)
+
+        vector_results, keyword_hits = await asyncio.gather(
+            self.query_layer.query(query_embeddings=[query_embedding], where=where, n_results=candidates),
+            self.query_layer.call("keyword", self.keyword_index.search, query=query_text, limit=candidates, allowed_ids=allowed_ids)
+        )
+        reports = {report["id"]: report for report in self._format_query_results(vector_results)}
+        keyword_scores = dict(keyword_hits)
+
+        fused: Dict[str, float] = {}
+        for rank, report_id in enumerate(reports, 1):
+            fused[report_id] = 1 / (HYBRID_RRF_K + rank)
+        for rank, (report_id, _) in enumerate(keyword_hits, 1):
+            fused[report_id] = fused.get(report_id, 0.0) + 1 / (HYBRID_RRF_K + rank)
+
+        ranked = sorted(fused, key=fused.get, reverse=True)
+        if keyword_scores:
+            ranked = [
+                report_id for report_id in ranked
+                if report_id in keyword_scores or reports[report_id]["distance"] <= HYBRID_MAX_DISTANCE
+            ]
+        ranked = ranked[:n_results]
+
+        # Keyword-only hits: fetch text, metadata and distance in one query restricted to their ids
+        missing = [report_id for report_id in ranked if report_id not in reports]
+        if missing:
+            extra = await self.query_layer.query(
+                query_embeddings=[query_embedding],
+                ids=missing,
+                n_results=len(missing)
+            )
+            reports.update((report["id"], report) for report in self._format_query_results(extra))
+
+        results = []
+        for report_id in ranked:
+            report = reports.get(report_id)
+            if report is None:
+                continue
+            if report_id in keyword_scores:
+                report["keyword_score"] = round(keyword_scores[report_id], 2)
+            results.append(report)
+
+        print(
+            f"[ReportsTool] Hybrid search: {len(keyword_hits)} keyword hits, {len(vector_results['ids'][0])} vector hits "
+            f"-> {len(results)} reports"
+        )
+        return results
+
+    @staticmethod
+    def _format_query_results(results: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Flatten a single-query ChromaDB query() result into report dicts."""
+        return [
+            {
+                "id": results['ids'][0][i],
+                "text": results['documents'][0][i],
+                "metadata": results['metadatas'][0][i],
+                "distance": results['distances'][0][i]
             }
+            for i in range(len(results['ids'][0]))
+        ]
+
+    async def _execute_aggregation(self, params: ChromaQueryParams, group_by: List[str]) -> Dict[str, Any]:
+        """Fetch the metadata of all matching reports and aggregate it."""
+        where_filter_dict = json.loads(params.where_filter) if params.where_filter else None
+
+        truncated = False
+        if params.query_texts:
+            # Semantic filter: nearest reports, keeping only relevant ones. The search
+            # widens until it reaches the distance cutoff or runs out of reports, so
+            # groups are not cut off at the first MAX_N_RESULTS neighbours.
+            query_embedding = await self.embedder.embed(params.query_texts)
+            n_results = min(MAX_N_RESULTS, AGGREGATION_MAX_MATCHES)
+            while True:
+                results = await self.query_layer.query(
+                    query_embeddings=[query_embedding],
+                    where=where_filter_dict,
+                    n_results=n_results,
+                    include=["metadatas", "distances"]
+                )
+                distances = results['distances'][0]
+                exhausted = len(distances) < n_results
+                if exhausted or distances[-1] > AGGREGATION_MAX_DISTANCE or n_results >= AGGREGATION_MAX_MATCHES:
+                    break
+                n_results = min(n_results * 4, AGGREGATION_MAX_MATCHES)
+
+            # Hit the cap with every match still inside the cutoff: more reports match
+            truncated = not exhausted and bool(distances) and distances[-1] <= AGGREGATION_MAX_DISTANCE
+            metadatas = [
+                metadata
+                for metadata, distance in zip(results['metadatas'][0], distances)
+                if distance <= AGGREGATION_MAX_DISTANCE
+            ]
+        else:
+            # Pure filter: the metadata index holds every field the aggregation needs
+            metadatas = self._index_metadatas(where_filter_dict)
+            if metadatas is None:
+                results = await self.query_layer.get(where=where_filter_dict, include=["metadatas"])
+                metadatas = results['metadatas']
 
-    def _execute_chromadb_query(self, params: ChromaQueryParams) -> Dict[str, Any]:
+        rows = aggregate_metadata(metadatas, group_by)
+        return {
+            "success": True,
+            "count": len(rows),
+            "total": len(metadatas),
+            "group_by": group_by,
+            "rows": rows,
+            "semantic": bool(params.query_texts),
+            "truncated": truncated,
+            "message": f"Aggregated {len(metadatas)} reports into {len(rows)} rows"
+                       + (f" (stopped at {AGGREGATION_MAX_MATCHES} matches)" if truncated else "")
+        }
+
+    def _page_result(
+        self,
+        params: ChromaQueryParams,
+        results: List[Dict[str, Any]],
+        offset: int,
+        total: Optional[int],
+        ordering: str
+    ) -> Dict[str, Any]:
+        """Successful page result, with a cursor when more reports follow."""
+        next_offset = offset + len(results)
+        if total is not None:
+            has_more = next_offset < total
+        else:
+            has_more = next_offset < params.n_results
+
+        return {
+            "success": True,
+            "count": len(results),
+            "message": f"Retrieved {len(results)} reports",
+            "results": results,
+            "offset": offset,
+            "total": total,
+            "ordering": ordering,
+            "next_cursor": self.encode_cursor(params, next_offset) if has_more else None
+        }
+
+    @staticmethod
+    def _result_cache_key(params: ChromaQueryParams, generation: int) -> Optional[Tuple]:
+        """
+        Canonical cache key: where_filter JSON with sorted keys, query text, n_results, order.
+
+        Returns None for an unparseable where_filter (the query reports the error).
         """
-        Execute the appropriate ChromaDB query based on parameters.
+        where_key = None
+        if params.where_filter:
+            try:
+                where_key = json.dumps(json.loads(params.where_filter), sort_keys=True, separators=(",", ":"))
+            except json.JSONDecodeError:
+                return None
+
+        return (generation, where_key, params.query_texts, params.n_results, params.newest_first)
+
+    async def _execute_chromadb_query(self, params: ChromaQueryParams, offset: int = 0) -> Dict[str, Any]:
+        """
+        Execute the appropriate ChromaDB query based on parameters, for one page of results.
+
+        Pages hold at most REPORT_PAGE_SIZE of the params.n_results reports.
+        Filter queries are paged in timestamp order (newest first when
+        params.newest_first), semantic searches in relevance order.
 
         Args:
             params: Structured query parameters from Parsing Agent
+            offset: Position of the first result of the page
 
         Returns:
-            Dictionary containing success status, count, message, and results
+            Dictionary containing success status, count, message, results and paging fields
         """
         try:
             # Parse where_filter from JSON string if present
@@ -81,21 +615,41 @@ class ReportsTool:
                         "success": False,
                         "count": 0,
                         "message": f"Invalid where_filter JSON: {str(e)}",
-                        "results": []
+                        "results": [],
+                        "error": INVALID_QUERY_ERROR
                     }
 
+                # Reject malformed filters here, so ChromaDB errors below are server faults
+                try:
+                    validate_where(where_filter_dict)
+                except ValueError as e:
+                    print(f"[ReportsTool] Invalid where_filter: {e}")
+                    return {
+                        "success": False,
+                        "count": 0,
+                        "message": f"Invalid where_filter: {str(e)}",
+                        "results": [],
+                        "error": INVALID_QUERY_ERROR
+                    }
+
+            limit = min(REPORT_PAGE_SIZE, params.n_results - offset)
+            if limit <= 0:
+                return {
+                    "success": False,
+                    "count": 0,
+                    "message": NO_MORE_RESULTS_MESSAGE,
+                    "results": []
+                }
+
             # Case 1: Pure metadata filtering (most efficient)
             if params.query_texts is None and where_filter_dict:
-                results = self.collection.get(
-                    where=where_filter_dict,
-                    limit=params.n_results
-                )
+                results, matches = await self._filter_page(where_filter_dict, offset, limit, params.newest_first)
 
                 if not results['ids']:
                     return {
                         "success": False,
                         "count": 0,
-                        "message": "No reports matching those criteria could be found in the database.",
+                        "message": NO_RESULTS_MESSAGE if offset == 0 else NO_MORE_RESULTS_MESSAGE,
                         "results": []
                     }
 
@@ -108,45 +662,30 @@ class ReportsTool:
                         "metadata": results['metadatas'][i]
                     })
 
-                return {
-                    "success": True,
-                    "count": len(formatted_results),
-                    "message": f"Retrieved {len(formatted_results)} reports",
-                    "results": formatted_results
-                }
+                ordering = "time_desc" if params.newest_first else "time"
+                return self._page_result(params, formatted_results, offset, min(matches, params.n_results), ordering)
 
             # Case 2: Semantic search (with optional metadata filtering)
             elif params.query_texts:
-                results = self.collection.query(
-                    query_texts=[params.query_texts],
-                    where=where_filter_dict,
-                    n_results=params.n_results
-                )
+                # Relevance ranking has no offset: rank through the end of the page and keep the page
+                ranked_results = None
+                if self._hybrid_enabled():
+                    ranked_results = await self._hybrid_query(params.query_texts, where_filter_dict, offset + limit)
+                if ranked_results is None:
+                    ranked_results = await self._vector_query(params.query_texts, where_filter_dict, offset + limit)
+                formatted_results = ranked_results[offset:]
 
-                if not results['ids'][0]:
+                if not formatted_results:
                     return {
                         "success": False,
                         "count": 0,
-                        "message": "No reports matching those criteria could be found in the database.",
+                        "message": NO_RESULTS_MESSAGE if offset == 0 else NO_MORE_RESULTS_MESSAGE,
                         "results": []
                     }
 
-                # Format results
-                formatted_results = []
-                for i in range(len(results['ids'][0])):
-                    formatted_results.append({
-                        "id": results['ids'][0][i],
-                        "text": results['documents'][0][i],
-                        "metadata": results['metadatas'][0][i],
-                        "distance": results['distances'][0][i]
-                    })
-
-                return {
-                    "success": True,
-                    "count": len(formatted_results),
-                    "message": f"Retrieved {len(formatted_results)} reports",
-                    "results": formatted_results
-                }
+                # Fewer results than asked for means the ranking is exhausted
+                total = offset + len(formatted_results) if len(formatted_results) < limit else None
+                return self._page_result(params, formatted_results, offset, total, "relevance")
 
             # Case 3: Invalid query (no search criteria)
             else:
@@ -154,7 +693,8 @@ class ReportsTool:
                     "success": False,
                     "count": 0,
                     "message": "Query must include either semantic search text or metadata filters.",
-                    "results": []
+                    "results": [],
+                    "error": INVALID_QUERY_ERROR
                 }
 
         except Exception as e:
@@ -163,5 +703,6 @@ class ReportsTool:
                 "success": False,
                 "count": 0,
                 "message": f"Error executing query: {str(e)}",
-                "results": []
+                "results": [],
+                "error": QUERY_FAILED_ERROR
             }
@@ -0,0 +1,182 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    Bounded in-memory cache with LRU eviction and optional TTL.
+
+    Keeps hit/miss counters for metrics. get_or_load() coalesces concurrent
+    misses for the same key into a single in-flight load.
+
+    Besides the entry count, the cache can be bounded by total weight
+    (e.g. number of reports held) using a weigher function.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl_seconds: Optional[float] = None,
+        name: str = "cache",
+        max_weight: Optional[int] = None,
+        weigher: Optional[Callable[[Any], int]] = None
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of entries before the least recently used is evicted
+            ttl_seconds: Entry lifetime in seconds (None = no expiry)
+            name: Label used in log messages
+            max_weight: Maximum total weight of all entries (None = unbounded)
+            weigher: Returns the weight of a value (required with max_weight)
+        """
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.name = name
+        self.max_weight = max_weight
+        self.weigher = weigher
+
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any, int]]" = OrderedDict()
+        self._weight = 0
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value (refreshing its LRU position) or default."""
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            expires_at, value, weight = entry
+            if expires_at and expires_at <= time.monotonic():
+                del self._entries[key]
+                self._weight -= weight
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Return a live cached value without touching counters or LRU order."""
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING or (entry[0] and entry[0] <= time.monotonic()):
+                return default
+            return entry[1]
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.peek(key, _MISSING) is not _MISSING
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value, evicting least recently used entries while over capacity."""
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else 0.0
+        weight = self.weigher(value) if self.weigher else 1
+
+        # A single value heavier than the whole budget is not worth caching
+        if self.max_weight is not None and weight > self.max_weight:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._weight -= previous[2]
+
+            self._entries[key] = (expires_at, value, weight)
+            self._weight += weight
+
+            while len(self._entries) > self.maxsize or (
+                self.max_weight is not None and self._weight > self.max_weight
+            ):
+                _, (_, _, evicted_weight) = self._entries.popitem(last=False)
+                self._weight -= evicted_weight
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._weight = 0
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        cache_if: Optional[Callable[[Any], bool]] = None
+    ) -> Tuple[Any, bool]:
+        """
+        Return the cached value, loading it on a miss.
+
+        Concurrent misses for the same key share one load. The load runs as its
+        own task, so a cancelled caller does not cancel it for the others.
+
+        Args:
+            key: Cache key
+            loader: Coroutine factory producing the value
+            cache_if: Predicate deciding whether a loaded value is stored (default: always)
+
+        Returns:
+            (value, from_cache) where from_cache is False only for the caller that ran the load
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value, True
+
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(loader())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish_load(key, done, cache_if))
+            from_cache = False
+        else:
+            self.coalesced += 1
+            from_cache = True
+
+        return await asyncio.shield(task), from_cache
+
+    def _finish_load(self, key: Hashable, task: asyncio.Future, cache_if: Optional[Callable[[Any], bool]]):
+        """Store a completed load and release the in-flight slot."""
+        self._in_flight.pop(key, None)
+
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            print(f"[{self.name}] Load failed for key {key!r}: {task.exception()}")
+            return
+
+        if cache_if is None or cache_if(task.result()):
+            self.set(key, task.result())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of cache size and counters."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "weight": self._weight,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
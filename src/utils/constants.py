@@ -18,6 +18,78 @@ MONGODB_URI = os.getenv('MONGODB_URI')
 MONGODB_DB_NAME = os.getenv('MONGODB_DB_NAME', 'guardowl_db')
 
 # Conversation History Summarization
-RECENT_MESSAGES_THRESHOLD = 10  # Keep last 10 messages (5 pairs) in full detail
-SUMMARIZATION_THRESHOLD = 12    # Only summarize if total messages > 12
-MAX_SUMMARY_TOKENS = 500        # Target token count for summary
\ No newline at end of file
+# History sent to the agent is fitted to a token budget (estimated locally, see src/utils/tokens.py)
+HISTORY_TOKEN_BUDGET = int(os.getenv('HISTORY_TOKEN_BUDGET', '4000'))
+HISTORY_MAX_MESSAGES = int(os.getenv('HISTORY_MAX_MESSAGES', '40'))  # Upper bound on messages read per history load
+HISTORY_TRIMMED_MESSAGE_TOKENS = int(os.getenv('HISTORY_TRIMMED_MESSAGE_TOKENS', '200'))  # Old tool-heavy replies are cut to this size first
+# Messages per conversation bucket document (kept even so a user/agent pair never spans two buckets)
+CONVERSATION_BUCKET_SIZE = max(2, int(os.getenv('CONVERSATION_BUCKET_SIZE', '50')) // 2 * 2)
+MAX_SUMMARY_TOKENS = 500        # Target token count for summary
+
+# Conversation write-behind queue (message pairs are written in batches off the response path)
+CONVERSATION_WRITE_FLUSH_INTERVAL_MS = int(os.getenv('CONVERSATION_WRITE_FLUSH_INTERVAL_MS', '50'))
+CONVERSATION_WRITE_BATCH_SIZE = int(os.getenv('CONVERSATION_WRITE_BATCH_SIZE', '200'))
+CONVERSATION_WRITE_QUEUE_SIZE = int(os.getenv('CONVERSATION_WRITE_QUEUE_SIZE', '1000'))
+CONVERSATION_WRITE_MAX_RETRIES = int(os.getenv('CONVERSATION_WRITE_MAX_RETRIES', '5'))  # Retries of a failed batch before its pairs are given up
+CONVERSATION_WRITE_RETRY_BACKOFF_MS = int(os.getenv('CONVERSATION_WRITE_RETRY_BACKOFF_MS', '100'))  # First retry delay, doubled per retry
+
+# /chat/batch (supervisor console fan-out)
+CHAT_BATCH_CONCURRENCY = max(1, int(os.getenv('CHAT_BATCH_CONCURRENCY', '8')))  # Concurrent agent runs across all batches
+CHAT_BATCH_MAX_ITEMS = int(os.getenv('CHAT_BATCH_MAX_ITEMS', '100'))  # Queries accepted per batch
+
+# Guard Agent report lookups: "two_hop" (tool takes the question, Parsing Agent builds the
+# query parameters) or "single_hop" (tool takes the query parameters, no Parsing Agent call)
+GUARD_AGENT_MODE = os.getenv('GUARD_AGENT_MODE', 'two_hop').lower()
+
+# Report rendering for the Guard Agent ("compact" groups near-identical reports, "full" lists each one)
+REPORT_RENDER_MODE = os.getenv('REPORT_RENDER_MODE', 'compact').lower()
+REPORT_RENDER_MAX_CHARS = int(os.getenv('REPORT_RENDER_MAX_CHARS', '16000'))  # ~4000 tokens
+REPORT_PAGE_SIZE = max(1, int(os.getenv('REPORT_PAGE_SIZE', '20')))  # Reports per retrieval page (further pages via cursor)
+
+# In-memory columnar metadata index (answers pure-filter queries without ChromaDB's metadata scan)
+METADATA_INDEX_ENABLED = os.getenv('METADATA_INDEX_ENABLED', 'true').lower() == 'true'
+
+# Hybrid search: BM25 keyword ranking fused with vector ranking (reciprocal rank fusion)
+KEYWORD_INDEX_ENABLED = os.getenv('KEYWORD_INDEX_ENABLED', 'true').lower() == 'true'
+SEARCH_MODE = os.getenv('SEARCH_MODE', 'hybrid').lower()  # "hybrid" or "vector"
+HYBRID_RRF_K = int(os.getenv('HYBRID_RRF_K', '60'))  # Rank damping constant of reciprocal rank fusion
+HYBRID_CANDIDATE_MULTIPLIER = int(os.getenv('HYBRID_CANDIDATE_MULTIPLIER', '4'))  # Candidates per ranking = n_results * this (min 20)
+HYBRID_MAX_DISTANCE = float(os.getenv('HYBRID_MAX_DISTANCE', '1.0'))  # Vector-only hits farther than this are dropped when keywords matched
+
+# Report aggregation tool
+AGGREGATION_MAX_DISTANCE = float(os.getenv('AGGREGATION_MAX_DISTANCE', '1.0'))  # Semantic matches farther than this are not counted
+AGGREGATION_MAX_ROWS = int(os.getenv('AGGREGATION_MAX_ROWS', '200'))  # Rows shown to the agent
+AGGREGATION_MAX_MATCHES = int(os.getenv('AGGREGATION_MAX_MATCHES', '20000'))  # Semantic matches fetched at most (beyond that counts are lower bounds)
+
+# ChromaDB Query Layer (thread pool for blocking vector search / embedding)
+CHROMA_QUERY_WORKERS = int(os.getenv('CHROMA_QUERY_WORKERS', '4'))
+CHROMA_QUERY_MAX_QUEUE = int(os.getenv('CHROMA_QUERY_MAX_QUEUE', '32'))
+
+# Parsed query cache (in front of the Parsing Agent)
+PARSE_CACHE_SIZE = int(os.getenv('PARSE_CACHE_SIZE', '1024'))
+PARSE_CACHE_TTL_SECONDS = int(os.getenv('PARSE_CACHE_TTL_SECONDS', '3600'))
+
+# Speculative parsing (two-hop mode): the Parsing Agent starts on the raw question while the
+# Guard Agent plans its first turn; the result is reused when the tool's query is close enough
+PARSE_SPECULATION_ENABLED = os.getenv('PARSE_SPECULATION_ENABLED', 'false').lower() == 'true'
+PARSE_SPECULATION_MIN_SIMILARITY = float(os.getenv('PARSE_SPECULATION_MIN_SIMILARITY', '0.85'))  # difflib ratio of the normalized queries
+
+# ChromaDB query result cache (invalidated on every ingest)
+RESULT_CACHE_SIZE = int(os.getenv('RESULT_CACHE_SIZE', '256'))             # Max cached queries
+RESULT_CACHE_MAX_REPORTS = int(os.getenv('RESULT_CACHE_MAX_REPORTS', '20000'))  # Max reports held across all entries
+
+# Query embeddings (cached and passed to ChromaDB as query_embeddings)
+EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'  # ChromaDB default ONNX embedding model
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv('QUERY_EMBEDDING_CACHE_SIZE', '2048'))
+# Kept next to the ChromaDB data, not in the working directory; empty disables persistence
+QUERY_EMBEDDING_CACHE_PATH = os.getenv('QUERY_EMBEDDING_CACHE_PATH', os.path.join(CHROMA_PERSIST_DIR, 'query_embeddings.json'))
+QUERY_EMBEDDING_WARMUP_COUNT = int(os.getenv('QUERY_EMBEDDING_WARMUP_COUNT', '200'))
+
+# Bulk ingestion
+CHROMA_INGEST_BATCH_SIZE = int(os.getenv('CHROMA_INGEST_BATCH_SIZE', '1000'))  # Reports per upsert
+CHROMA_INGEST_WORKERS = int(os.getenv('CHROMA_INGEST_WORKERS', '4'))           # Parallel embedding threads
+
+# Offline index snapshots (built with `python -m src.collections.buildIndex`)
+INDEX_SCHEMA_VERSION = 1  # Bump when report metadata layout changes (fields, timestamp/contentHash encoding)
+CHROMA_SNAPSHOT_DIR = os.getenv('CHROMA_SNAPSHOT_DIR')  # If set, load this snapshot read-only instead of syncing data.json
+CHROMA_SNAPSHOT_STRICT = os.getenv('CHROMA_SNAPSHOT_STRICT', 'true').lower() == 'true'  # Refuse (vs warn) on model/schema mismatch
@@ -0,0 +1,287 @@
+"""
+In-process latency instrumentation and Prometheus metrics (no Logfire needed).
+
+Each HTTP request gets a stage table held in a contextvar. Code wrapped in
+timed_stage() adds its duration to that table and to the stage histogram.
+ServerTimingMiddleware returns the table as a Server-Timing header. /metrics
+renders the histograms and counters, plus numeric stats of registered
+components, in the Prometheus text format.
+
+Stage names in use:
+- history / history_wait / history_read: loading conversation history
+- summary: background rolling-summary refresh (not part of the request)
+- agent: a whole Guard Agent run; guard_llm / parse_llm / summary_llm: model turns
+- parse: resolving query parameters (fast path, parse cache or Parsing Agent)
+- embed / chroma / keyword: query embedding, ChromaDB calls, BM25 search
+- tool:<name>: a Guard Agent tool call
+- save: queueing the message pair for MongoDB
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from starlette.datastructures import MutableHeaders
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21)
+
+# stage name -> [total seconds, calls] for the current request (None outside requests)
+_request_stages: ContextVar[Optional[Dict[str, List[float]]]] = ContextVar("request_stages", default=None)
+
+# [input, output] tokens of the current Guard Agent run, nested agents included (None outside runs)
+_run_tokens: ContextVar[Optional[List[int]]] = ContextVar("run_tokens", default=None)
+
+
+class Histogram:
+    """Prometheus histogram with fixed buckets, one series per label set."""
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # labels -> [count per bucket (non-cumulative, last = +Inf), sum]
+        self._series: Dict[Tuple[Tuple[str, str], ...], List] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else _format_value(bound)
+                    lines.append(f"{self.name}_bucket{_format_labels(key + (('le', le),))} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+class Counter:
+    """Prometheus counter, one series per label set."""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[Tuple[str, str], ...], float] = {}
+
+    def inc(self, value: float = 1, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._series.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {_format_value(value)}")
+        return lines
+
+
+STAGE_SECONDS = Histogram("guardowl_stage_duration_seconds", "Duration of timed request stages", LATENCY_BUCKETS)
+REQUEST_SECONDS = Histogram("guardowl_http_request_duration_seconds", "HTTP request duration by route", LATENCY_BUCKETS)
+REQUEST_TOKENS = Histogram("guardowl_request_llm_tokens", "LLM tokens per Guard Agent run, nested agents included (input/output)", TOKEN_BUCKETS)
+REQUEST_TOOL_CALLS = Histogram("guardowl_request_tool_calls", "Tool calls per agent run", COUNT_BUCKETS)
+LLM_TOKENS = Counter("guardowl_llm_tokens_total", "LLM tokens by model stage (guard_llm/parse_llm/summary_llm) and type (input/output)")
+TOOL_CALLS = Counter("guardowl_tool_calls_total", "Guard Agent tool calls by tool")
+PARSE_SPECULATIONS = Counter("guardowl_parse_speculations_total", "Speculative Parsing Agent runs by outcome (hit/miss/unused/failed)")
+PARSE_SPECULATION_SAVED_SECONDS = Counter("guardowl_parse_speculation_saved_seconds_total", "Parsing Agent time hidden behind the Guard Agent's first turn")
+
+_METRICS = (
+    STAGE_SECONDS, REQUEST_SECONDS, REQUEST_TOKENS, REQUEST_TOOL_CALLS, LLM_TOKENS, TOOL_CALLS,
+    PARSE_SPECULATIONS, PARSE_SPECULATION_SAVED_SECONDS
+)
+
+# component name -> callable returning a stats dict (numeric values become gauges)
+_components: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+def register_component(name: str, stats: Callable[[], Dict[str, Any]]):
+    """
+    Export a component's stats() on /metrics as guardowl_<name>_<key> gauges.
+
+    Args:
+        name: Component name (e.g. "result_cache")
+        stats: Callable returning a dict; non-numeric values are skipped, nested dicts flattened
+    """
+    _components[name] = stats
+
+
+def record_stage(name: str, seconds: float):
+    """Add a stage duration to the current request's table and the stage histogram."""
+    STAGE_SECONDS.observe(seconds, stage=name)
+
+    stages = _request_stages.get()
+    if stages is not None:
+        entry = stages.setdefault(name, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+
+@contextmanager
+def timed_stage(name: str) -> Iterator[None]:
+    """Time the enclosed block as a stage (also when it raises)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+
+def record_llm_usage(stage: str, input_tokens: int, output_tokens: int):
+    """Tokens of one model turn of any agent (TimedModel calls this), added to the current run."""
+    LLM_TOKENS.inc(input_tokens, stage=stage, type="input")
+    LLM_TOKENS.inc(output_tokens, stage=stage, type="output")
+
+    tokens = _run_tokens.get()
+    if tokens is not None:
+        tokens[0] += input_tokens
+        tokens[1] += output_tokens
+
+
+@contextmanager
+def agent_run_tokens() -> Iterator[List[int]]:
+    """
+    Sum the tokens of every model turn in the block into one per-run observation.
+
+    Turns of nested agents (Parsing Agent) and of tasks started inside the block
+    (speculative parsing) count toward the run.
+    """
+    tokens = [0, 0]
+    reset_token = _run_tokens.set(tokens)
+    try:
+        yield tokens
+    finally:
+        _run_tokens.reset(reset_token)
+        REQUEST_TOKENS.observe(tokens[0], type="input")
+        REQUEST_TOKENS.observe(tokens[1], type="output")
+
+
+def record_agent_run(tool_calls: List[str]):
+    """Tool-call metrics of one Guard Agent run (tokens are recorded per model turn)."""
+    REQUEST_TOOL_CALLS.observe(len(tool_calls))
+    for tool in tool_calls:
+        TOOL_CALLS.inc(tool=tool)
+
+
+def record_parse_speculation(outcome: str, saved_seconds: float = 0.0):
+    """Outcome of one speculative parse and the parsing time it saved."""
+    PARSE_SPECULATIONS.inc(outcome=outcome)
+    if saved_seconds > 0:
+        PARSE_SPECULATION_SAVED_SECONDS.inc(saved_seconds)
+
+
+def format_server_timing(stages: Dict[str, List[float]], total_seconds: float) -> str:
+    """Server-Timing header value: one entry per stage plus the total."""
+    entries = []
+    for name, (seconds, calls) in stages.items():
+        entry = f"{name.replace(':', '.')};dur={seconds * 1000:.1f}"
+        if calls > 1:
+            entry += f';desc="{calls} calls"'
+        entries.append(entry)
+    entries.append(f"total;dur={total_seconds * 1000:.1f}")
+    return ", ".join(entries)
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in _METRICS:
+        lines.extend(metric.render())
+
+    for component, stats in _components.items():
+        try:
+            values = _flatten(stats())
+        except Exception as e:
+            print(f"[Metrics] Stats of {component} failed: {str(e)}")
+            continue
+        for key, value in values:
+            name = f"guardowl_{component}_{key}"
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {_format_value(value)}")
+
+    return "\n".join(lines) + "\n"
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware: opens a stage table per HTTP request, adds the Server-Timing
+    header when the response starts and observes the request duration.
+
+    For streamed responses the header covers the stages finished before the
+    first byte (history loading); later stages still reach the histograms.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stages: Dict[str, List[float]] = {}
+        token = _request_stages.set(stages)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", format_server_timing(stages, time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            route = scope.get("route")
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=str(status)
+            )
+            _request_stages.reset(token)
+
+
+def _flatten(stats: Dict[str, Any], prefix: str = "") -> List[Tuple[str, float]]:
+    values = []
+    for key, value in stats.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            values.extend(_flatten(value, f"{name}_"))
+        elif isinstance(value, (int, float)):
+            values.append((name, float(value)))
+    return values
+
+
+def _format_labels(key: Tuple[Tuple[str, str], ...]) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in key) + "}"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
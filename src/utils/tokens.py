@@ -0,0 +1,54 @@
+"""
+Local token estimation for prompt budgeting.
+
+Gemini's tokenizer is not available offline, so history is budgeted with a
+character-based estimate (about 4 characters per token for English text, the
+usual rule of thumb for SentencePiece/BPE tokenizers). Report dumps with many
+IDs and dates tokenize denser than prose, so the estimate errs high for them
+rather than low.
+"""
+
+import re
+from typing import Dict
+
+CHARS_PER_TOKEN = 4
+# Role marker and turn delimiters added by the model's chat template
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_DENSE_PATTERN = re.compile(r"[0-9:\-/|#*_`]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens in a text.
+
+    Args:
+        text: Text to estimate
+
+    Returns:
+        Estimated token count (at least 1 for non-empty text)
+    """
+    if not text:
+        return 0
+
+    # Digits and markdown/table punctuation usually become their own tokens
+    dense_chars = len(_DENSE_PATTERN.findall(text))
+    return max(1, (len(text) - dense_chars + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN + dense_chars // 2)
+
+
+def estimate_message_tokens(message: Dict) -> int:
+    """Estimate the tokens a history message adds to the prompt (content + overhead)."""
+    return estimate_tokens(message.get("content", "")) + MESSAGE_OVERHEAD_TOKENS
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut a text to roughly max_tokens, at a line or word boundary where possible."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+
+    cut = text[:max_chars]
+    boundary = max(cut.rfind("\n"), cut.rfind(" "))
+    if boundary > max_chars // 2:
+        cut = cut[:boundary]
+    return cut.rstrip()